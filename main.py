@@ -3,13 +3,12 @@ Keil 项目管理工具主入口
 """
 
 import argparse
+import os
 import sys
-from pathlib import Path
 
-# 添加src目录到Python路径
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+# 添加src目录到Python路径（不使用 pathlib，构建前钩子的快速路径不需要导入它）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
-from keil_tool.ui import run_cli, run_gui
 from keil_tool.constants import APP_TITLE, APP_VERSION, APP_AUTHOR
 
 
@@ -21,18 +20,35 @@ def main():
     )
     parser.add_argument("--cli", action="store_true", help="使用命令行模式")
     parser.add_argument("--gui", action="store_true", help="使用GUI模式")
+    parser.add_argument("--change-feed", metavar="PATH", help="命令行模式下以 JSON Lines 输出变更事件，- 表示标准输出")
+    parser.add_argument("--sync", metavar="MANIFEST", help="按清单同步一次后退出，适合作为构建前钩子")
+    parser.add_argument("--project", metavar="PATH", help="--sync 使用的项目文件，未指定时在当前目录搜索")
     parser.add_argument("--version", action="version", version=f"{APP_TITLE} {APP_VERSION}")
     
     args = parser.parse_args()
     
+    if args.sync:
+        # 快速路径：同步戳未过期时不导入 lxml，也不读取项目内容
+        from keil_tool.core.sync_stamp import is_sync_up_to_date
+        if args.project and is_sync_up_to_date(args.project, args.sync):
+            print("项目、清单和目录均未变化，跳过同步")
+            return
+        
+        from keil_tool.ui import run_sync
+        if not run_sync(args.sync, args.project, args.change_feed):
+            sys.exit(1)
+        return
+    
     # 如果没有指定模式，默认使用GUI模式
     if not args.cli and not args.gui:
         args.gui = True
     
     try:
         if args.cli:
-            run_cli()
+            from keil_tool.ui import run_cli
+            run_cli(args.change_feed)
         elif args.gui:
+            from keil_tool.ui import run_gui
             run_gui()
     except KeyboardInterrupt:
         print("\n程序被用户中断")
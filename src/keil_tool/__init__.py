@@ -16,6 +16,12 @@ __version__ = "1.0.0"
 __author__ = "ZeroHzzzz"
 __email__ = ""
 
-from .core.keil_project import KeilProject
+__all__ = ["KeilProject", "AsyncKeilProject", "OperationResult", "RefreshPreview"]
 
-__all__ = ["KeilProject"]
+
+def __getattr__(name: str):
+    # 按需导入，避免导入子模块时就加载 lxml
+    if name in __all__:
+        from . import core
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,12 +16,85 @@ SUPPORTED_SOURCE_EXTENSIONS = [".c", ".cpp"]
 SUPPORTED_HEADER_EXTENSIONS = [".h", ".hpp"]
 SUPPORTED_ASSEMBLY_EXTENSIONS = [".s", ".asm"]
 
+# 会生成目标文件（.o）的源文件扩展名
+OBJECT_SOURCE_EXTENSIONS = SUPPORTED_SOURCE_EXTENSIONS + SUPPORTED_ASSEMBLY_EXTENSIONS
+
 # 项目文件扩展名
 PROJECT_FILE_EXTENSION = ".uvprojx"
 
+# 项目文件锁
+LOCK_FILE_SUFFIX = ".lock"
+DEFAULT_LOCK_TIMEOUT = 10.0
+
+# uVision 项目选项文件（与项目文件同名，保存组的展开状态、断点等界面信息）
+OPTIONS_FILE_EXTENSION = ".uvoptx"
+
+# 工具状态文件（保存在项目文件旁）
+STATE_FILE_SUFFIX = ".keiltool.json"
+
+# 同步戳文件（保存在项目文件旁），记录上次 sync 后的项目、配置和目录元数据指纹
+SYNC_STAMP_SUFFIX = ".sync.stamp"
+
+# 撤销日志（保存在项目文件旁）
+JOURNAL_FILE_SUFFIX = ".journal.jsonl"
+DEFAULT_JOURNAL_SIZE = 50
+
+# 变更事件输出：CHANGE_FEED_STDOUT 表示标准输出，CHANGE_FEED_OFF 表示关闭
+CHANGE_FEED_STDOUT = "-"
+CHANGE_FEED_OFF = "off"
+
+# 刷新前的变化检测模式：off 不检测，list 比较组成员，content 同时比较文件内容
+CHANGE_DETECTION_MODES = ["off", "list", "content"]
+DEFAULT_CHANGE_DETECTION = "off"
+
+# 目标文件名冲突检查：off 不检查，warn 只输出警告，error 存在冲突时放弃本次修改
+COLLISION_CHECK_MODES = ["off", "warn", "error"]
+DEFAULT_COLLISION_CHECK = "warn"
+
+# 新建 GroupOption/FileOption 时 CommonProperty 的默认内容（2 表示继承上一级设置）
+COMMON_PROPERTY_DEFAULTS = [
+    ("UseCPPCompiler", "0"),
+    ("RVCTCodeConst", "0"),
+    ("RVCTZI", "0"),
+    ("RVCTOtherData", "0"),
+    ("ModuleSelection", "0"),
+    ("IncludeInBuild", "1"),
+    ("AlwaysBuild", "2"),
+    ("GenerateAssemblyFile", "2"),
+    ("AssembleAssemblyFile", "2"),
+    ("PublicsOnly", "2"),
+    ("StopOnExitCode", "11"),
+    ("CustomArgument", ""),
+    ("IncludeLibraryModules", ""),
+    ("ComprImg", "1"),
+]
+
 # 默认搜索深度
 DEFAULT_MAX_DEPTH = 3
 
+# 扫描时是否跟随符号链接（同一物理目录只会被列出一次）
+DEFAULT_FOLLOW_SYMLINKS = True
+
+# 文件枚举后端：disk 遍历磁盘；git 读取 .git/index 中跟踪的文件；
+# git-untracked 在 git 的基础上合并未跟踪且未被忽略的文件（不在 git 工作区中时退回 disk）
+SCAN_BACKENDS = ["disk", "git", "git-untracked"]
+DEFAULT_SCAN_BACKEND = "disk"
+
+# 同步清单
+MANIFEST_FILE_EXTENSIONS = [".toml", ".json"]
+DEFAULT_SYNC_WORKERS = 8
+
+# GUI 最近项目缓存：最多缓存的项目数、估算内存上限（字节），
+# 解析后的 XML 树按项目文件大小的 PROJECT_CACHE_TREE_FACTOR 倍估算，
+# 预扫描结果按每个文件 PROJECT_CACHE_SCAN_FILE_SIZE 字节估算
+PROJECT_CACHE_SIZE = 10
+PROJECT_CACHE_MAX_MEMORY = 512 * 1024 * 1024
+PROJECT_CACHE_TREE_FACTOR = 10
+PROJECT_CACHE_SCAN_FILE_SIZE = 512
+
+# 扫描与修改 XML 流水线的队列容量（按文件夹计）
+DEFAULT_PIPELINE_QUEUE_SIZE = 64
+
 # XML路径常量
 XPATH_GROUPS = "//Groups"
 XPATH_GROUP_NAME = "//Groups//GroupName"
@@ -1,7 +1,39 @@
 """
 核心模块
+
+导出项在首次访问时才导入，使 manifest、sync_stamp 等不依赖 lxml 的模块可以单独导入
+（构建前钩子的快速路径不需要加载 lxml）。
 """
 
-from .keil_project import KeilProject
+import importlib
+
+_EXPORTS = {
+    "KeilProject": ".keil_project",
+    "AsyncKeilProject": ".async_project",
+    "OperationResult": ".results",
+    "GroupScan": ".results",
+    "RefreshPreview": ".results",
+    "ProjectCache": ".project_cache",
+    "GroupMapping": ".manifest",
+    "SyncManifest": ".manifest",
+    "load_manifest": ".manifest",
+    "ProjectVariant": ".manifest",
+    "GenerationSpec": ".manifest",
+    "load_generation_spec": ".manifest",
+    "generate_projects": ".generator",
+    "GroupRule": ".rules",
+    "RuleSet": ".rules",
+    "load_rules": ".rules",
+    "is_sync_up_to_date": ".sync_stamp",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ["KeilProject"]
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,156 @@
+"""
+KeilProject 的异步封装
+
+供基于 asyncio 的构建系统调用：文件系统扫描和 XML 读写都放到执行器中运行，
+不会阻塞事件循环；同一项目上的并发调用通过 asyncio.Lock 串行执行。
+每个操作都调用 KeilProject 的同名公开方法，变化检测、预扫描结果、撤销日志等行为与同步调用一致。
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+from ..constants import DEFAULT_MAX_DEPTH
+from ..exceptions import FileOperationError, ProjectNotLoadedError
+from ..utils import normalize_path
+from .keil_project import KeilProject
+from .results import OperationResult
+
+
+class AsyncKeilProject:
+    """Keil 项目管理类的异步封装"""
+
+    def __init__(self, project: Optional[KeilProject] = None,
+                 executor: Optional[Executor] = None,
+                 callback_func: Optional[Callable[[str], None]] = None):
+        """
+        初始化异步项目管理器
+
+        Args:
+            project: 已有的 KeilProject 实例，未指定时新建
+            executor: 运行阻塞操作的执行器，默认使用事件循环的默认执行器
+            callback_func: 新建 KeilProject 时使用的日志回调函数
+        """
+        self.project = project or KeilProject(callback_func=callback_func)
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        """在执行器中运行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _apply(self, result: OperationResult, start_time: float, func: Callable, *args, **kwargs) -> OperationResult:
+        """
+        在执行器中调用修改项目的公开方法并填充耗时
+
+        Raises:
+            KeilToolError: 操作失败，抛出操作中记录的异常
+        """
+        succeeded = await self._run(func, *args, result=result, **kwargs)
+        result.total_time = time.perf_counter() - start_time
+        result.apply_time = result.total_time - result.scan_time
+        if not succeeded:
+            raise result.error or FileOperationError(f"操作 {result.operation} 失败")
+        return result
+
+    async def load(self, project_path: str) -> None:
+        """
+        加载项目文件
+
+        Args:
+            project_path: .uvprojx 文件的路径
+        """
+        async with self._lock:
+            if not await self._run(self.project.set_project_file, project_path):
+                raise ProjectNotLoadedError(f"无法加载项目文件: {project_path}")
+
+    async def _refresh(self, clean: bool, group_name: str, path: str, max_depth: int,
+                       min_group_files: int, max_groups: int, max_group_depth: int) -> OperationResult:
+        """刷新或重建单个文件组：先在锁外扫描，再把扫描结果交给 KeilProject"""
+        async with self._lock:
+            method = self.project.clean_rebuild_group if clean else self.project.refresh_group
+            result = OperationResult(operation=method.__name__)
+            start_time = time.perf_counter()
+
+            path = normalize_path(path)
+            scan = await self._run(
+                self.project.scan_group, group_name, path, max_depth, clean,
+                min_group_files, max_groups, max_group_depth
+            )
+            result.scan_time = time.perf_counter() - start_time
+
+            return await self._apply(
+                result, start_time, method, group_name, path, max_depth,
+                min_group_files, max_groups, max_group_depth, scan=scan
+            )
+
+    async def refresh_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                            min_group_files: int = 0, max_groups: int = 0,
+                            max_group_depth: int = 0) -> OperationResult:
+        """
+        刷新指定的文件组，并同步头文件路径
+
+        Args:
+            group_name: 要刷新的组名
+            path: 源文件路径
+            max_depth: 搜索深度
+            min_group_files: 文件数少于该值的子组并入上一级组，0 表示不合并
+            max_groups: 最大子组数，0 表示不限制
+            max_group_depth: 子组最大深度，0 表示不限制
+
+        Returns:
+            操作结果
+        """
+        return await self._refresh(False, group_name, path, max_depth,
+                                   min_group_files, max_groups, max_group_depth)
+
+    async def clean_rebuild_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                                  min_group_files: int = 0, max_groups: int = 0,
+                                  max_group_depth: int = 0) -> OperationResult:
+        """
+        完全清理并重建指定的文件组，并同步头文件路径
+
+        Args:
+            group_name: 要重建的组名
+            path: 源文件路径
+            max_depth: 搜索深度
+            min_group_files: 文件数少于该值的子组并入上一级组，0 表示不合并
+            max_groups: 最大子组数，0 表示不限制
+            max_group_depth: 子组最大深度，0 表示不限制
+
+        Returns:
+            操作结果
+        """
+        return await self._refresh(True, group_name, path, max_depth,
+                                   min_group_files, max_groups, max_group_depth)
+
+    async def add_include_path(self, path: str) -> OperationResult:
+        """
+        添加头文件路径
+
+        Args:
+            path: 递归起始路径
+
+        Returns:
+            操作结果
+        """
+        async with self._lock:
+            result = OperationResult(operation="add_include_path")
+            return await self._apply(result, time.perf_counter(), self.project.add_include_path, path)
+
+    async def sync(self, manifest_path: str) -> OperationResult:
+        """
+        按同步清单刷新多个文件组，所有目录并发扫描，只保存一次
+
+        Args:
+            manifest_path: 清单文件路径（.toml 或 .json）
+
+        Returns:
+            操作结果，scan_time 为 KeilProject.sync 中并发扫描的耗时
+        """
+        async with self._lock:
+            result = OperationResult(operation="sync")
+            return await self._apply(result, time.perf_counter(), self.project.sync, manifest_path)
@@ -0,0 +1,111 @@
+"""
+变更事件流
+
+把撤销日志中每个已保存事务的结构化增量转换为 JSON Lines 事件，写到标准输出或文件，
+下游工具据此增量更新，无需重新解析整个 .uvprojx。
+
+事件格式（每行一个 JSON 对象）::
+
+    {"ts": 时间戳, "operation": 操作名, "event": "group_added", "group": 组名}
+    {"ts": ..., "operation": ..., "event": "group_removed", "group": 组名}
+    {"ts": ..., "operation": ..., "event": "group_renamed", "group": 新组名, "old": 原组名}
+    {"ts": ..., "operation": ..., "event": "file_added", "group": 组名, "file": 文件名, "path": 文件路径}
+    {"ts": ..., "operation": ..., "event": "file_removed", "group": 组名, "file": 文件名}
+    {"ts": ..., "operation": ..., "event": "include_path_added", "path": 头文件路径}
+    {"ts": ..., "operation": ..., "event": "include_path_removed", "path": 头文件路径}
+    {"ts": ..., "operation": ..., "event": "option_changed", "group": 组名, "file": 文件名或 null}
+    {"ts": ..., "operation": ..., "event": "operation", "changes": 事件数, "duration": 耗时（秒）}
+
+每个操作的事件以 "operation" 汇总事件结束。撤销/重做的 operation 为 "undo"/"redo"。
+"""
+
+import json
+import sys
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+from lxml import etree
+
+from ..constants import CHANGE_FEED_STDOUT
+
+
+def _split_paths(text: Optional[str]) -> List[str]:
+    """拆分 IncludePath 文本"""
+    return [path for path in (text or "").split(";") if path]
+
+
+def delta_events(delta: dict) -> Iterator[dict]:
+    """将一个撤销日志增量转换为事件"""
+    op = delta["op"]
+    if op == "add_group":
+        yield {"event": "group_added", "group": delta["group"]}
+    elif op == "insert_group":
+        yield {"event": "group_added", "group": etree.fromstring(delta["xml"]).findtext("GroupName")}
+    elif op == "remove_group":
+        yield {"event": "group_removed", "group": delta["group"]}
+    elif op == "rename_group":
+        yield {"event": "group_renamed", "group": delta["new"], "old": delta["old"]}
+    elif op == "add_file":
+        yield {"event": "file_added", "group": delta["group"], "file": delta["name"], "path": delta["path"]}
+    elif op == "insert_file":
+        file_element = etree.fromstring(delta["xml"])
+        yield {"event": "file_added", "group": delta["group"],
+               "file": file_element.findtext("FileName"), "path": file_element.findtext("FilePath")}
+    elif op == "remove_file":
+        yield {"event": "file_removed", "group": delta["group"], "file": delta["name"]}
+    elif op == "set_include_paths":
+        old_paths = _split_paths(delta["old"])
+        new_paths = _split_paths(delta["new"])
+        old_set, new_set = set(old_paths), set(new_paths)
+        for path in new_paths:
+            if path not in old_set:
+                yield {"event": "include_path_added", "path": path}
+        for path in old_paths:
+            if path not in new_set:
+                yield {"event": "include_path_removed", "path": path}
+    elif op == "set_option":
+        yield {"event": "option_changed", "group": delta["group"], "file": delta["name"]}
+
+
+class ChangeFeed:
+    """JSON Lines 变更事件输出"""
+
+    def __init__(self, target: str = CHANGE_FEED_STDOUT):
+        """
+        Args:
+            target: 输出文件路径（追加写入），"-" 表示标准输出
+        """
+        self.target = target
+        self._lock = threading.Lock()
+
+    def emit(self, operation: str, deltas: Iterable[dict], timestamp: float, duration: float) -> int:
+        """
+        输出一个操作的全部事件
+
+        Args:
+            operation: 操作名
+            deltas: 操作产生的撤销日志增量
+            timestamp: 操作开始时间
+            duration: 操作耗时（秒）
+
+        Returns:
+            输出的变更事件数（不含汇总事件）
+        """
+        lines = []
+        for delta in deltas:
+            for event in delta_events(delta):
+                lines.append(json.dumps({"ts": timestamp, "operation": operation, **event}, ensure_ascii=False))
+        lines.append(json.dumps({
+            "ts": timestamp, "operation": operation, "event": "operation",
+            "changes": len(lines), "duration": round(duration, 6)
+        }, ensure_ascii=False))
+        data = "\n".join(lines) + "\n"
+
+        with self._lock:
+            if self.target == CHANGE_FEED_STDOUT:
+                sys.stdout.write(data)
+                sys.stdout.flush()
+            else:
+                with open(self.target, "a", encoding="utf-8") as f:
+                    f.write(data)
+        return len(lines) - 1
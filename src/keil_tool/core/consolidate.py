@@ -0,0 +1,103 @@
+"""
+文件组合并
+
+把扫描得到的 “一个叶子文件夹一个组” 的结果合并成较少的组，避免深层 SDK 目录
+在 uVision 中展开成成千上万个组。
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def _group_depth(group_name: str, name: str) -> int:
+    """子组相对于根组的深度，根组为 0"""
+    if name == group_name:
+        return 0
+    return name[len(group_name) + 1:].count("/") + 1
+
+
+def _parent_group(group_name: str, name: str) -> Optional[str]:
+    """上一级组名，根组没有上一级"""
+    if name == group_name:
+        return None
+    parent = name.rsplit("/", 1)[0]
+    return parent if len(parent) >= len(group_name) else group_name
+
+
+def consolidate_groups(group_name: str, scan_result: List[Tuple[str, List[dict]]],
+                       min_group_files: int = 0, max_groups: int = 0,
+                       max_group_depth: int = 0) -> List[Tuple[str, List[dict]]]:
+    """
+    合并扫描结果中的子组
+
+    依次执行：超过 max_group_depth 的组并入对应深度的祖先组；文件数少于 min_group_files
+    的组并入上一级组；组数仍超过 max_groups 时，从最深、文件最少的组开始继续向上合并。
+    合并后同一组内的文件名必须唯一，会产生重名的合并将被跳过（宁可多一个组也不丢文件）。
+
+    Args:
+        group_name: 根组名
+        scan_result: (子组名, 文件信息列表) 列表
+        min_group_files: 每组最少文件数，0 表示不限制
+        max_groups: 最大组数，0 表示不限制
+        max_group_depth: 子组最大深度，0 表示不限制
+
+    Returns:
+        合并后的 (子组名, 文件信息列表) 列表，保持原有顺序
+    """
+    if not (min_group_files or max_groups or max_group_depth):
+        return scan_result
+
+    groups: Dict[str, List[dict]] = {}
+    file_names: Dict[str, Set[str]] = {}
+    order: Dict[str, int] = {}
+    for index, (name, files) in enumerate(scan_result):
+        groups[name] = list(files)
+        file_names[name] = {file_info["file_name"] for file_info in files}
+        order[name] = index
+
+    def merge(source: str, target: str) -> bool:
+        """将 source 组并入 target 组，文件名冲突时放弃"""
+        if file_names[source] & file_names.get(target, set()):
+            return False
+        if target not in groups:
+            groups[target] = []
+            file_names[target] = set()
+            order[target] = order[source]
+        groups[target].extend(groups.pop(source))
+        file_names[target] |= file_names.pop(source)
+        order[target] = min(order[target], order.pop(source))
+        return True
+
+    def by_depth(names: List[str]) -> List[str]:
+        return sorted(names, key=lambda name: _group_depth(group_name, name), reverse=True)
+
+    if max_group_depth:
+        for name in by_depth(list(groups)):
+            depth = _group_depth(group_name, name)
+            if depth > max_group_depth:
+                segments = name[len(group_name) + 1:].split("/")
+                merge(name, "/".join([group_name] + segments[:max_group_depth]))
+
+    if min_group_files and groups:
+        # 逐层向上处理，合并时新建的上一级组也会在下一层被检查
+        deepest = max(_group_depth(group_name, name) for name in groups)
+        for depth in range(deepest, 0, -1):
+            for name in [name for name in groups if _group_depth(group_name, name) == depth]:
+                if len(groups[name]) < min_group_files:
+                    merge(name, _parent_group(group_name, name))
+
+    if max_groups:
+        while len(groups) > max_groups:
+            candidates = sorted(
+                (name for name in groups if name != group_name),
+                key=lambda name: (-_group_depth(group_name, name), len(groups[name]))
+            )
+            merged = False
+            for name in candidates:
+                if len(groups) <= max_groups:
+                    break
+                if name in groups and merge(name, _parent_group(group_name, name)):
+                    merged = True
+            if not merged:
+                break
+
+    return [(name, groups[name]) for name in sorted(groups, key=lambda name: order[name])]
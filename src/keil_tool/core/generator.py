@@ -0,0 +1,81 @@
+"""
+按模板批量生成项目
+
+模板项目只解析一次，每个变体深拷贝解析后的 XML 树；所有变体共用同一份扫描结果
+（相同的组映射只扫描一次），最后并发写出全部项目文件。
+输出到其他目录的变体，模板中已有的相对 FilePath 和 IncludePath 改为相对于变体的位置。
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+from ..constants import DEFAULT_SYNC_WORKERS, DEFAULT_FOLLOW_SYMLINKS, DEFAULT_SCAN_BACKEND
+from ..exceptions import InvalidProjectFileError, ProjectFileNotFoundError
+from .keil_project import KeilProject
+from .manifest import GroupMapping, load_generation_spec
+from .results import GroupScan
+
+
+def generate_projects(spec_path: str, max_workers: Optional[int] = None,
+                      callback_func: Optional[Callable[[str], None]] = None,
+                      follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                      scan_backend: str = DEFAULT_SCAN_BACKEND) -> List[str]:
+    """
+    按生成清单从模板批量生成项目
+
+    Args:
+        spec_path: 生成清单路径（.toml 或 .json）
+        max_workers: 扫描和写出的线程数，未指定时使用清单中的 max_workers
+        callback_func: 日志回调函数
+        follow_symlinks: 扫描时是否跟随符号链接
+        scan_backend: 文件枚举后端，见 KeilProject.set_scan_backend
+
+    Returns:
+        生成的项目文件路径列表
+    """
+    log = callback_func or print
+    spec = load_generation_spec(spec_path)
+    workers = max_workers or spec.max_workers or DEFAULT_SYNC_WORKERS
+    start_time = time.perf_counter()
+
+    if not os.path.isfile(spec.template):
+        raise ProjectFileNotFoundError(f"模板项目不存在: {spec.template}")
+    try:
+        with open(spec.template, "rb") as f:
+            template_root = etree.fromstring(f.read())
+    except etree.XMLSyntaxError as e:
+        raise InvalidProjectFileError(f"模板项目解析失败: {str(e)}")
+
+    # 所有变体中不同的组映射只扫描一次
+    scanner = KeilProject(callback_func=log, follow_symlinks=follow_symlinks, scan_backend=scan_backend)
+    mappings: Dict[Tuple, GroupMapping] = {}
+    for variant in spec.variants:
+        for mapping in variant.groups:
+            mappings.setdefault(mapping.scan_key(), mapping)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {key: executor.submit(scanner.scan_mapping, mapping) for key, mapping in mappings.items()}
+        scan_index: Dict[Tuple, GroupScan] = {key: future.result() for key, future in futures.items()}
+    scan_time = time.perf_counter() - start_time
+    log(f"扫描了 {len(scan_index)} 个组映射（{scan_time:.2f}s），开始生成 {len(spec.variants)} 个项目")
+
+    projects = []
+    for variant in spec.variants:
+        # 每个变体使用模板的深拷贝，相对路径以各自的输出位置为基准
+        project = KeilProject.from_template(
+            template_root, spec.template, variant.output,
+            callback_func=log, follow_symlinks=follow_symlinks, scan_backend=scan_backend
+        )
+        for mapping in variant.groups:
+            project.apply_mapping(mapping, scan_index[mapping.scan_key()])
+        projects.append((variant.output, project))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda output: output[1].export(output[0]), projects))
+
+    log(f"生成完成！共 {len(projects)} 个项目，总耗时 {time.perf_counter() - start_time:.2f}s")
+    return [path for path, _ in projects]
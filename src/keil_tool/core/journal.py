@@ -0,0 +1,171 @@
+"""
+撤销日志
+
+KeilProject 的每次修改都以结构化增量记录（组增删、文件增删、头文件路径和构建选项变化），
+一次公开操作的所有增量构成一个事务，用于撤销/重做；开启持久化时以 JSON Lines 形式保存在
+项目文件旁，代替整份项目文件的备份。
+
+增量格式::
+
+    {"op": "add_group", "group": 组名, "index": 位置}
+    {"op": "remove_group", "group": 组名, "index": 位置, "xml": 组的 XML}
+    {"op": "add_file", "group": 组名, "name": 文件名, "type": 文件类型, "path": 文件路径}
+    {"op": "remove_file", "group": 组名, "name": 文件名, "index": 位置, "xml": 文件的 XML}
+    {"op": "insert_file", "group": 组名, "index": 位置, "xml": 文件的 XML}
+    {"op": "rename_group", "old": 原组名, "new": 新组名}
+    {"op": "set_include_paths", "old": 原值, "new": 新值}
+    {"op": "set_option", "group": 组名, "name": 文件名或 None, "old": 原选项 XML, "new": 新选项 XML}
+"""
+
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from lxml import etree
+
+from ..constants import DEFAULT_JOURNAL_SIZE
+
+
+def invert_delta(delta: dict) -> dict:
+    """返回撤销该增量所需的增量"""
+    op = delta["op"]
+    if op == "add_group":
+        return {"op": "remove_group", "group": delta["group"], "index": delta["index"]}
+    if op == "remove_group":
+        return {"op": "insert_group", "index": delta["index"], "xml": delta["xml"]}
+    if op == "add_file":
+        return {"op": "remove_file", "group": delta["group"], "name": delta["name"]}
+    if op == "remove_file":
+        return {"op": "insert_file", "group": delta["group"], "index": delta["index"], "xml": delta["xml"]}
+    if op == "insert_file":
+        name = etree.fromstring(delta["xml"]).findtext("FileName")
+        return {"op": "remove_file", "group": delta["group"], "name": name}
+    if op == "rename_group":
+        return {"op": "rename_group", "old": delta["new"], "new": delta["old"]}
+    if op in ("set_include_paths", "set_option"):
+        return dict(delta, old=delta["new"], new=delta["old"])
+    raise ValueError(f"未知的增量类型: {op}")
+
+
+class Journal:
+    """撤销/重做日志"""
+
+    def __init__(self, max_entries: int = DEFAULT_JOURNAL_SIZE):
+        """
+        Args:
+            max_entries: 保留的最大事务数
+        """
+        self.max_entries = max_entries
+        self.undo_stack: List[dict] = []
+        self.redo_stack: List[dict] = []
+        self._current: Optional[dict] = None
+        self._depth = 0
+        self._suspended = 0
+        self._saved_mark = 0
+
+    @contextmanager
+    def transaction(self, label: str, on_commit: Optional[Callable[[], None]] = None) -> Iterator[None]:
+        """
+        开始一个事务，嵌套调用并入最外层事务
+
+        Args:
+            label: 操作名称
+            on_commit: 事务产生了增量并入栈后调用（用于持久化和输出变更事件）
+        """
+        if self._depth == 0:
+            self._current = {"label": label, "time": time.time(), "deltas": []}
+            self._saved_mark = 0
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                entry, self._current = self._current, None
+                entry["duration"] = time.time() - entry["time"]
+                if entry["deltas"]:
+                    self.undo_stack.append(entry)
+                    del self.undo_stack[:-self.max_entries]
+                    self.redo_stack.clear()
+                    if on_commit:
+                        on_commit()
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """暂停记录（撤销/重做本身不再记录）"""
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    def record(self, delta: dict) -> None:
+        """记录一个增量，不在事务中时忽略"""
+        if self._current is not None and not self._suspended:
+            self._current["deltas"].append(delta)
+
+    def mark_saved(self) -> None:
+        """标记当前事务中已写入项目文件的增量"""
+        self._saved_mark = len(self._current["deltas"]) if self._current is not None else 0
+
+    def discard_unsaved(self) -> None:
+        """丢弃当前事务中尚未写入项目文件的增量（重放修改前调用，重放时会重新记录）"""
+        if self._current is not None:
+            del self._current["deltas"][self._saved_mark:]
+
+    def save(self, path: str, fingerprint: str) -> None:
+        """
+        将撤销栈写入 JSON Lines 文件
+
+        Args:
+            path: 日志文件路径
+            fingerprint: 当前项目文件内容的哈希，加载时据此判断日志是否仍然有效
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+            for entry in self.undo_stack:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_path, path)
+
+    def load(self, path: str, fingerprint: str) -> bool:
+        """
+        从 JSON Lines 文件恢复撤销栈，项目文件已不是日志记录时的内容则清空
+
+        Returns:
+            是否恢复了日志
+        """
+        self.undo_stack = []
+        self.redo_stack = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("fingerprint") != fingerprint:
+                    return False
+                self.undo_stack = [json.loads(line) for line in f if line.strip()]
+            return True
+        except (OSError, ValueError):
+            self.undo_stack = []
+            return False
+
+
+def journaled(label: str) -> Callable:
+    """
+    把 KeilProject 的公开方法包装为一个日志事务
+
+    公开方法成功时总会保存项目，返回后仍有未保存的修改说明操作中途失败，
+    此时丢弃这些修改，避免被下一次操作一并保存。整个事务持有项目的写锁。
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self._rw_lock.write(), self._journal.transaction(label, self._on_journal_commit):
+                result = func(self, *args, **kwargs)
+                if self._pending_edits:
+                    self._discard_unsaved_changes()
+                return result
+        return wrapper
+    return decorator
@@ -2,16 +2,35 @@
 Keil 项目管理核心类
 """
 
+import hashlib
 import os
 import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from copy import deepcopy
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Dict, Iterable, Iterator, List, Optional, Callable, Tuple
 from lxml import etree
 from lxml.etree import _Element
 
 from ..constants import (
     PROJECT_FILE_EXTENSION,
+    JOURNAL_FILE_SUFFIX,
     DEFAULT_MAX_DEPTH,
+    DEFAULT_SYNC_WORKERS,
+    DEFAULT_FOLLOW_SYMLINKS,
+    DEFAULT_CHANGE_DETECTION,
+    CHANGE_DETECTION_MODES,
+    DEFAULT_COLLISION_CHECK,
+    COLLISION_CHECK_MODES,
+    DEFAULT_SCAN_BACKEND,
+    SCAN_BACKENDS,
+    COMMON_PROPERTY_DEFAULTS,
+    CHANGE_FEED_OFF,
+    CHANGE_FEED_STDOUT,
     XPATH_GROUPS,
     XPATH_GROUP_NAME,
     XPATH_INCLUDE_PATH,
@@ -22,36 +41,146 @@ from ..exceptions import (
     ProjectFileNotFoundError,
     InvalidProjectFileError,
     ProjectNotLoadedError,
-    FileOperationError
+    FileOperationError,
+    ObjectNameCollisionError
 )
 from ..utils import (
     normalize_path,
     get_relative_path,
     validate_regex_pattern,
     get_subfolders,
+    iter_subfolders,
     find_files_by_extensions,
-    find_folders_with_files
+    find_folders_with_files,
+    find_missing_paths,
+    file_lock,
+    ReadWriteLock,
+    read_locked,
+    write_locked,
+    iter_in_background,
+    hash_files,
+    membership_digest
 )
+from .consolidate import consolidate_groups
+from .manifest import GroupMapping, load_manifest
+from .change_feed import ChangeFeed
+from .journal import Journal, invert_delta, journaled
+from .project_cache import CachedProject, ProjectCache
+from .project_index import ProjectIndex
+from .rules import RuleMatcher, RuleSet, load_rules
+from .results import GroupScan, OperationResult, RefreshPreview
+from .state import load_state, save_state
+from .sync_stamp import is_sync_up_to_date, stamp_config, tree_digest, write_sync_stamp
+from .uvoptx import RTE_GROUP_PREFIX, options_file_path, sync_option_groups
+from .xml_writer import write_xml_file
 
 
 class KeilProject:
-    """Keil 项目管理类"""
+    """
+    Keil 项目管理类
     
-    def __init__(self, callback_func: Optional[Callable[[str], None]] = None):
+    公开方法可以在多个线程中调用：修改项目的操作持有写锁，依次执行；
+    查询操作持有读锁，可以并发执行，看到的总是某次修改完成后的状态。
+    """
+    
+    def __init__(self, callback_func: Optional[Callable[[str], None]] = None,
+                 follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                 change_detection: str = DEFAULT_CHANGE_DETECTION,
+                 collision_check: str = DEFAULT_COLLISION_CHECK,
+                 change_feed: Optional[str] = None,
+                 scan_backend: str = DEFAULT_SCAN_BACKEND,
+                 project_cache: Optional[ProjectCache] = None,
+                 sync_options: bool = False,
+                 persist_journal: bool = False):
         """
         初始化 Keil 项目管理器
         
         Args:
             callback_func: 日志回调函数，用于向 GUI 发送消息
+            follow_symlinks: 扫描时是否跟随符号链接，同一物理目录/文件只会被收录一次
+            change_detection: 刷新前的变化检测模式，见 set_change_detection
+            collision_check: 目标文件名冲突检查模式，见 set_collision_check
+            change_feed: 变更事件输出目标，见 set_change_feed，None 表示不输出
+            scan_backend: 文件枚举后端，见 set_scan_backend
+            project_cache: 最近项目缓存，切换项目时保留已解析的项目，None 表示不缓存
+            sync_options: 保存项目时是否同时更新 .uvoptx 中的组和文件条目，见 set_options_sync
+            persist_journal: 是否把撤销日志写入项目文件旁的 .journal.jsonl，见 set_journal_persistence
         """
         self.project_path: str = ""
         self.etree_root: Optional[_Element] = None
         self.callback_func = callback_func
+        self.follow_symlinks = follow_symlinks
+        self.change_detection = change_detection
+        self.collision_check = collision_check
+        self.scan_backend = scan_backend
+        self.sync_options = sync_options
+        self.persist_journal = persist_journal
+        
+        # 加载时记录的项目文件指纹 (mtime_ns, size, sha1)，保存前用于检测外部修改
+        self._fingerprint: Optional[Tuple[int, int, str]] = None
+        # 自上次加载/保存以来的修改记录 (类型, 参数, 修改时是否维护头文件路径)，外部修改后用于在新内容上重放
+        self._pending_edits: List[Tuple[str, tuple, bool]] = []
+        # 组与文件的反向索引，随修改增量更新
+        self._index: Optional[ProjectIndex] = None
+        # 撤销/重做日志
+        self._journal = Journal()
+        # JSON Lines 变更事件输出
+        self._change_feed: Optional[ChangeFeed] = ChangeFeed(change_feed) if change_feed else None
+        # 打开项目时在后台预扫描的结果，键为扫描参数
+        self._prefetched: Dict[tuple, Future] = {}
+        # 最近项目缓存，以及当前 etree_root 对应的项目文件（find_uvprojx_files 会提前改写 project_path）
+        self.project_cache = project_cache
+        self._loaded_path: Optional[str] = None
+        # 已解析的 .uvoptx 及解析时的 (mtime_ns, size)，第一次同步时读取，之后只在被外部修改时重新解析
+        self._options_root: Optional[_Element] = None
+        self._options_stat: Optional[Tuple[int, int]] = None
+        # 修改操作持有写锁，查询操作持有读锁；读锁下延迟加载项目和建立索引时另需 _init_lock
+        self._rw_lock = ReadWriteLock()
+        self._init_lock = threading.RLock()
+    
+    @classmethod
+    def from_template(cls, template_root: _Element, template_path: str, project_path: str,
+                      **kwargs) -> "KeilProject":
+        """
+        以已解析的模板创建一个尚未写出的新项目
+        
+        使用模板 XML 的深拷贝，模板本身不受影响。输出位置与模板不在同一目录时，
+        模板中已有的相对 FilePath 和 IncludePath 改为相对于新项目（绝对路径和含宏、环境变量的路径不变）。
+        之后用 apply_mapping 填充组，用 export 写出。
+        
+        Args:
+            template_root: 模板项目的 XML 根元素
+            template_path: 模板项目文件路径，模板中的相对路径以它为基准
+            project_path: 新项目的文件路径
+            **kwargs: 传给构造函数的其他参数
+            
+        Returns:
+            新的项目实例
+        """
+        project = cls(**kwargs)
+        project.project_path = project_path
+        project.etree_root = deepcopy(template_root)
+        project._loaded_path = project_path
+        # 在建立索引之前改写，索引键按新项目的位置解析
+        project._rebase_template(template_path)
+        return project
+    
+    def log_message(self, message: str) -> None:
+        """
+        按本实例的日志设置输出消息，供调用方输出与项目操作相关的日志
+        
+        Args:
+            message: 日志消息
+        """
+        self._log_message(message)
     
     def _log_message(self, message: str) -> None:
         """发送日志消息"""
         if self.callback_func:
             self.callback_func(message)
+        elif self._change_feed is not None and self._change_feed.target == CHANGE_FEED_STDOUT:
+            # 标准输出留给变更事件，日志改写到标准错误
+            print(message, file=sys.stderr)
         else:
             print(message)
     
@@ -61,17 +190,22 @@ class KeilProject:
             raise ProjectNotLoadedError("项目文件路径未设置")
         
         if self.etree_root is None:
-            try:
-                self._load_project()
-            except Exception as e:
-                raise ProjectNotLoadedError(f"无法加载项目文件: {str(e)}")
+            with self._init_lock:
+                if self.etree_root is not None:
+                    return
+                try:
+                    self._load_project()
+                except Exception as e:
+                    raise ProjectNotLoadedError(f"无法加载项目文件: {str(e)}")
     
-    def set_project_file(self, project_path: str) -> bool:
+    @write_locked
+    def set_project_file(self, project_path: str, prefetch: bool = False) -> bool:
         """
         设置项目文件路径
         
         Args:
             project_path: .uvprojx 文件的路径
+            prefetch: 是否在解析项目的同时后台扫描上次刷新过的目录，供之后第一次刷新直接使用
             
         Returns:
             是否成功设置
@@ -88,6 +222,17 @@ class KeilProject:
             self.project_path = str(project_path)
             self._log_message(f"已设置项目文件: {self.project_path}")
             
+            # 切换前缓存当前项目，切回最近用过且未被修改的项目时无需重新解析，尚未使用的预扫描结果也随之恢复
+            restored = self._restore_from_cache()
+            if not restored:
+                self._prefetched = {}
+            if prefetch:
+                self._start_prefetch()
+            
+            if restored:
+                self._log_message("已从缓存切换到项目")
+                return True
+            
             # 自动加载项目
             return self._load_project()
             
@@ -130,13 +275,63 @@ class KeilProject:
             是否成功加载
         """
         try:
-            root_str = etree.tostring(etree.parse(self.project_path)).decode('utf-8')
-            self.etree_root = etree.XML(root_str)
+            self.etree_root, self._fingerprint = self._read_project_file()
+            self._loaded_path = self.project_path
+            self._options_root = None
+            self._pending_edits = []
+            if self.persist_journal:
+                self._journal.load(self._journal_path(), self._fingerprint[2])
             return True
         except Exception as e:
             self._log_message(f"加载项目文件失败: {str(e)}")
             return False
     
+    def _restore_from_cache(self) -> bool:
+        """
+        把当前项目放入缓存，再尝试从缓存恢复 project_path 指向的项目
+        
+        Returns:
+            是否从缓存恢复
+        """
+        if self.project_cache is None:
+            return False
+        if self.etree_root is not None and self._loaded_path and self._fingerprint is not None:
+            self.project_cache.put(CachedProject(
+                self._loaded_path, self.etree_root, self._fingerprint, self._index, self._journal,
+                self._prefetched
+            ))
+            # 缓存中的对象不再由当前实例修改，未命中时重新解析
+            self.etree_root = None
+            self._index = None
+            self._journal = Journal(self._journal.max_entries)
+            self._prefetched = {}
+            self._loaded_path = None
+        
+        entry = self.project_cache.take(self.project_path)
+        if entry is None:
+            return False
+        self.etree_root = entry.etree_root
+        self._fingerprint = entry.fingerprint
+        self._index = entry.index
+        self._journal = entry.journal
+        self._prefetched = entry.scans
+        self._loaded_path = self.project_path
+        self._options_root = None
+        self._pending_edits = []
+        return True
+    
+    @read_locked
+    def recent_projects(self) -> List[str]:
+        """
+        最近使用的项目，当前项目在前
+        
+        Returns:
+            项目文件路径列表，未启用项目缓存时只包含当前项目
+        """
+        cached = self.project_cache.recent_projects() if self.project_cache is not None else []
+        return ([self._loaded_path] if self._loaded_path else []) + cached
+    
+    @write_locked
     def refresh_project(self) -> bool:
         """
         刷新项目文件
@@ -152,6 +347,7 @@ class KeilProject:
                 return self._load_project()
             return False
     
+    @journaled("create_files_group")
     def create_files_group(self, path: str, max_depth: int, group_root_name: Optional[str] = None) -> bool:
         """
         创建文件组
@@ -168,11 +364,15 @@ class KeilProject:
             self._ensure_project_loaded()
             
             path = normalize_path(path)
-            folders = get_subfolders(path, max_depth)
+            folders = get_subfolders(path, max_depth, self.follow_symlinks, self.scan_backend)
             
             files_added = 0
+            groups_created = []
+            visited = set()
             for folder in folders:
-                source_files = find_files_by_extensions(folder, SUPPORTED_SOURCE_EXTENSIONS)
+                source_files = find_files_by_extensions(
+                    folder, SUPPORTED_SOURCE_EXTENSIONS, self.follow_symlinks, visited, self.scan_backend
+                )
                 if not source_files:
                     continue
                 
@@ -183,7 +383,9 @@ class KeilProject:
                 for file_info in source_files:
                     self._add_file_to_group(files_element, file_info)
                     files_added += 1
+                groups_created.append(group_name)
             
+            self._check_collisions(groups_created)
             self._save_project()
             self._log_message(f"成功创建文件组，添加了 {files_added} 个文件")
             return True
@@ -192,7 +394,10 @@ class KeilProject:
             self._log_message(f"创建文件组失败: {str(e)}")
             return False
     
-    def refresh_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH) -> bool:
+    @journaled("refresh_group")
+    def refresh_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                      min_group_files: int = 0, max_groups: int = 0, max_group_depth: int = 0,
+                      scan: Optional[GroupScan] = None, result: Optional[OperationResult] = None) -> bool:
         """
         刷新指定的文件组
         
@@ -200,6 +405,11 @@ class KeilProject:
             group_name: 要刷新的组名
             path: 源文件路径
             max_depth: 搜索深度
+            min_group_files: 文件数少于该值的子组并入上一级组，0 表示不合并
+            max_groups: 最大子组数，0 表示不限制
+            max_group_depth: 子组最大深度，0 表示不限制
+            scan: scan_group 事先得到的扫描结果（clean=False，参数相同），未指定时在此扫描
+            result: 填充本次修改内容的操作结果，失败时记录异常
             
         Returns:
             是否成功刷新
@@ -208,63 +418,50 @@ class KeilProject:
             self._ensure_project_loaded()
             
             path = normalize_path(path)
+            scan_args = (group_name, path, max_depth, False, min_group_files, max_groups, max_group_depth)
+            scan_result, header_dirs = self._take_scan(scan_args, scan)
             
-            # 删除现有组
-            self._delete_groups_by_prefix(group_name)
-            
-            # 重新创建组
-            folders = get_subfolders(path, max_depth)
-            files_added = 0
-            groups_created = set()
+            # 变化检测需要完整的扫描结果，未变化时不修改也不保存项目
+            content_digest = None
+            if self.change_detection != "off":
+                scan_result = list(scan_result)
+                changed, content_digest = self._detect_scan_change(group_name, scan_result)
+                if not changed:
+                    self._store_content_digest(group_name, content_digest)
+                    # 组未变化时仍按扫描根目录补全头文件路径，路径有变化才保存
+                    with self._header_tracking():
+                        self._seed_header_dirs(path, header_dirs)
+                    include_added, include_removed = self._update_include_refs()
+                    if include_added or include_removed:
+                        self._save_project()
+                    self._fill_result(result, [], [], 0, include_added, include_removed)
+                    self._log_message(f"组 '{group_name}' 未发生变化，跳过刷新")
+                    return True
             
-            for folder in folders:
-                all_files = (find_files_by_extensions(folder, SUPPORTED_SOURCE_EXTENSIONS) +
-                           find_files_by_extensions(folder, SUPPORTED_HEADER_EXTENSIONS))
-                
-                if not all_files:
-                    continue
-                
-                # 计算子组名
-                try:
-                    rel_path = os.path.relpath(folder, path).replace("\\", "/")
-                    if rel_path in [".", ""]:
-                        sub_group_name = group_name
-                    else:
-                        sub_group_name = f"{group_name}/{rel_path}"
-                except ValueError:
-                    folder_name = os.path.basename(folder)
-                    sub_group_name = f"{group_name}/{folder_name}"
-                
-                if sub_group_name in groups_created:
-                    continue
-                
-                groups_created.add(sub_group_name)
-                group = self._get_or_create_group(sub_group_name)
-                files_element = group.xpath('.//Files')[0]
-                
-                # 清空现有文件
-                for file_element in files_element.xpath('.//File'):
-                    files_element.remove(file_element)
-                
-                # 添加文件
-                for file_info in all_files:
-                    self._add_file_to_group(files_element, file_info)
-                    files_added += 1
+            # 删除现有组并重新创建
+            with self._header_tracking():
+                deleted_groups, groups_created, files_added = self._apply_group_scan(group_name, scan_result)
+                self._seed_header_dirs(path, header_dirs)
+            include_added, include_removed = self._update_include_refs()
             
+            self._check_collisions(groups_created)
             self._save_project()
+            self._store_content_digest(group_name, content_digest)
+            self._store_scan_root(scan_args)
+            self._fill_result(result, deleted_groups, groups_created, files_added, include_added, include_removed)
             self._log_message(f"成功刷新组 '{group_name}'，创建了 {len(groups_created)} 个子组，添加了 {files_added} 个文件")
-            
-            # 同时更新头文件路径
-            if self.add_include_path(path):
-                self._log_message(f"同时更新了头文件路径: {path}")
-            
             return True
             
         except Exception as e:
             self._log_message(f"刷新组失败: {str(e)}")
+            if result is not None:
+                result.error = e
             return False
     
-    def clean_rebuild_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH) -> bool:
+    @journaled("clean_rebuild_group")
+    def clean_rebuild_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                            min_group_files: int = 0, max_groups: int = 0, max_group_depth: int = 0,
+                            scan: Optional[GroupScan] = None, result: Optional[OperationResult] = None) -> bool:
         """
         完全清理并重建指定的文件组
         
@@ -272,6 +469,11 @@ class KeilProject:
             group_name: 要重建的组名
             path: 源文件路径
             max_depth: 搜索深度
+            min_group_files: 文件数少于该值的子组并入上一级组，0 表示不合并
+            max_groups: 最大子组数，0 表示不限制
+            max_group_depth: 子组最大深度，0 表示不限制
+            scan: scan_group 事先得到的扫描结果（clean=True，参数相同），未指定时在此扫描
+            result: 填充本次修改内容的操作结果，失败时记录异常
             
         Returns:
             是否成功重建
@@ -282,65 +484,298 @@ class KeilProject:
             path = normalize_path(path)
             self._log_message(f"开始清理重建组 '{group_name}'，路径: {path}")
             
-            # 删除所有相关组
-            deleted_groups = self._delete_groups_by_prefix(group_name)
-            if deleted_groups:
-                self._log_message(f"清理了旧组: {', '.join(deleted_groups)}")
+            # 获取文件夹并按深度排序
+            scan_args = (group_name, path, max_depth, True, min_group_files, max_groups, max_group_depth)
+            scan_result, header_dirs = self._take_scan(scan_args, scan)
             
-            # 获取文件夹并排序
-            folders = get_subfolders(path, max_depth)
-            folders.sort(key=lambda x: x.count('/'))
+            # 删除所有相关组并重新创建
+            with self._header_tracking():
+                deleted_groups, groups_created, files_added = self._apply_group_scan(
+                    group_name, scan_result, verbose=True
+                )
+                self._seed_header_dirs(path, header_dirs)
+            include_added, include_removed = self._update_include_refs()
             
-            self._log_message(f"找到 {len(folders)} 个文件夹")
+            self._check_collisions(groups_created)
+            self._save_project()
+            self._store_scan_root(scan_args)
+            self._fill_result(result, deleted_groups, groups_created, files_added, include_added, include_removed)
+            self._log_message(f"完成！创建了 {len(groups_created)} 个组，总共添加了 {files_added} 个文件")
+            return True
             
-            files_added = 0
-            groups_created = {}
+        except Exception as e:
+            self._log_message(f"清理重建组失败: {str(e)}")
+            if result is not None:
+                result.error = e
+            return False
+    
+    @journaled("sync")
+    def sync(self, manifest_path: str, max_workers: Optional[int] = None,
+             result: Optional[OperationResult] = None) -> bool:
+        """
+        按同步清单刷新多个文件组
+        
+        先在线程池中并发扫描清单中的所有目录，再依次修改 XML，最后只保存一次。
+        组成员与项目中一致的映射不重新生成（与变化检测模式无关），没有任何组或头文件路径变化时不保存项目。
+        完成后写入同步戳；下次同步时若项目文件、配置、清单和目录树元数据都未变化，直接跳过。
+        
+        Args:
+            manifest_path: 清单文件路径（.toml 或 .json）
+            max_workers: 扫描线程数，未指定时使用清单中的 max_workers
+            result: 填充本次修改内容和扫描耗时的操作结果，失败时记录异常
             
-            for folder in folders:
-                all_files = (find_files_by_extensions(folder, SUPPORTED_SOURCE_EXTENSIONS) +
-                           find_files_by_extensions(folder, SUPPORTED_HEADER_EXTENSIONS))
-                
-                if not all_files:
-                    continue
-                
-                # 计算相对路径
-                try:
-                    rel_path = os.path.relpath(folder, path).replace("\\", "/")
-                    if rel_path in [".", ""]:
-                        sub_group_name = group_name
-                    else:
-                        sub_group_name = f"{group_name}/{rel_path}"
-                except ValueError:
-                    folder_name = os.path.basename(folder)
-                    sub_group_name = f"{group_name}/{folder_name}"
-                
-                if sub_group_name in groups_created:
+        Returns:
+            是否成功同步
+        """
+        try:
+            if not self.project_path:
+                raise ProjectNotLoadedError("项目文件路径未设置")
+            
+            config = stamp_config(self.follow_symlinks, self.scan_backend, self.sync_options)
+            if is_sync_up_to_date(self.project_path, manifest_path, config):
+                self._log_message("项目、清单和目录均未变化，跳过同步")
+                return True
+            
+            manifest = load_manifest(manifest_path)
+            workers = max_workers or manifest.max_workers or DEFAULT_SYNC_WORKERS
+            self._log_message(f"开始同步清单 '{manifest.path}'，共 {len(manifest.groups)} 个组映射")
+            
+            start_time = time.perf_counter()
+            # 目录元数据在扫描之前记录，扫描期间的变化会让下次检查失败而不是被漏掉
+            roots = [mapping.path for mapping in manifest.groups]
+            digest = tree_digest(roots, self.follow_symlinks, self.scan_backend)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self.scan_mapping, mapping) for mapping in manifest.groups]
+                # 扫描与项目文件的解析同时进行
+                self._ensure_project_loaded()
+                scans = [future.result() for future in futures]
+            scan_time = time.perf_counter() - start_time
+            
+            deleted_groups = []
+            touched_groups = []
+            total_files = 0
+            content_digests = {}
+            for mapping, scan in zip(manifest.groups, scans):
+                if mapping.include_paths:
+                    with self._header_tracking():
+                        self._seed_header_dirs(mapping.path, scan.header_dirs)
+                # 扫描结果已经完整在内存中，无论检测模式如何都先比较组成员，未变化的组不重新生成
+                changed, content_digest = self._detect_scan_change(mapping.name, scan.groups)
+                if content_digest is not None:
+                    content_digests[mapping.name] = content_digest
+                if not changed:
+                    self._log_message(f"组 '{mapping.name}' 未发生变化，跳过")
                     continue
                 
-                # 创建组并添加文件
-                group = self._get_or_create_group(sub_group_name)
-                files_element = group.xpath('.//Files')[0]
-                
-                for file_info in all_files:
-                    self._add_file_to_group(files_element, file_info)
-                    files_added += 1
-                
-                groups_created[sub_group_name] = len(all_files)
-                self._log_message(f"创建组 '{sub_group_name}'，添加了 {len(all_files)} 个文件")
+                mapping_deleted, groups_created, files_added = self._apply_mapping(mapping, scan.groups)
+                deleted_groups.extend(mapping_deleted)
+                touched_groups.extend(groups_created)
+                total_files += files_added
+                self._log_message(f"组 '{mapping.name}'：创建了 {len(groups_created)} 个子组，添加了 {files_added} 个文件")
             
-            self._save_project()
-            self._log_message(f"完成！创建了 {len(groups_created)} 个组，总共添加了 {files_added} 个文件")
+            include_added, include_removed = self._update_include_refs()
+            
+            self._check_collisions(touched_groups)
+            if self._pending_edits:
+                self._save_project()
+            for group_name, content_digest in content_digests.items():
+                self._store_content_digest(group_name, content_digest)
+            write_sync_stamp(self.project_path, manifest_path, config, roots, digest)
+            self._fill_result(result, deleted_groups, touched_groups, total_files, include_added, include_removed)
+            if result is not None:
+                result.scan_time = scan_time
+            self._log_message(
+                f"同步完成！创建了 {len(touched_groups)} 个组，添加了 {total_files} 个文件，"
+                f"新增 {len(include_added)} 个、移除 {len(include_removed)} 个头文件路径（扫描耗时 {scan_time:.2f}s，"
+                f"总耗时 {time.perf_counter() - start_time:.2f}s）"
+            )
+            return True
+            
+        except Exception as e:
+            self._log_message(f"同步清单失败: {str(e)}")
+            if result is not None:
+                result.error = e
+            return False
+    
+    @journaled("group_by_rules")
+    def group_by_rules(self, path: str, rules_path: str) -> bool:
+        """
+        按规则文件把目录下的文件归入按职能命名的组
+        
+        只遍历一次目录树，每个文件由编译成一个正则表达式的规则分类一次；
+        规则涉及的组先删除再重新创建，最后只保存一次。
+        
+        Args:
+            path: 扫描根目录，规则中的路径相对于它
+            rules_path: 规则文件路径（.toml 或 .json）
+            
+        Returns:
+            是否成功
+        """
+        try:
+            self._ensure_project_loaded()
+            
+            path = normalize_path(path)
+            rule_set = load_rules(rules_path)
+            start_time = time.perf_counter()
+            scan_result = self._scan_by_rules(path, rule_set)
+            scan_time = time.perf_counter() - start_time
             
-            # 更新头文件路径
-            if self.add_include_path(path):
-                self._log_message("同时更新了头文件路径")
+            # include_paths = false 时头文件的增减不反映到 IncludePath
+            with self._header_tracking(rule_set.include_paths):
+                _, groups_created, files_added = self._apply_rule_scan(rule_set, scan_result)
+                if rule_set.include_paths:
+                    self._seed_header_dirs(path)
+            include_added, include_removed = self._update_include_refs()
             
+            self._check_collisions(groups_created)
+            self._save_project()
+            for group_name, files in scan_result:
+                self._log_message(f"组 '{group_name}'：{len(files)} 个文件")
+            self._log_message(
+                f"按规则分组完成！创建了 {len(groups_created)} 个组，添加了 {files_added} 个文件，"
+                f"新增 {len(include_added)} 个、移除 {len(include_removed)} 个头文件路径（扫描耗时 {scan_time:.2f}s）"
+            )
             return True
             
         except Exception as e:
-            self._log_message(f"清理重建组失败: {str(e)}")
+            self._log_message(f"按规则分组失败: {str(e)}")
+            return False
+    
+    def set_change_detection(self, mode: str) -> bool:
+        """
+        设置刷新前的变化检测模式
+        
+        Args:
+            mode: off 不检测；list 比较扫描到的组成员与项目中现有的组，一致时跳过刷新和保存；
+                  content 与 list 一样只按组成员决定是否刷新，另外计算文件内容哈希（保存在项目旁的状态文件中），
+                  报告成员未变但内容有变化的组
+            
+        Returns:
+            是否成功设置
+        """
+        if mode not in CHANGE_DETECTION_MODES:
+            self._log_message(f"无效的变化检测模式: {mode}，可选: {', '.join(CHANGE_DETECTION_MODES)}")
+            return False
+        
+        self.change_detection = mode
+        self._log_message(f"变化检测模式已设置为: {mode}")
+        return True
+    
+    def set_scan_backend(self, backend: str) -> bool:
+        """
+        设置创建/刷新文件组和添加头文件路径时枚举文件的方式
+        
+        Args:
+            backend: disk 遍历磁盘；git 直接读取 .git/index，只收录已跟踪的文件，
+                     不会扫到构建输出；git-untracked 同时收录未跟踪且未被 .gitignore 忽略的文件。
+                     路径不在 git 工作区中时退回 disk
+            
+        Returns:
+            是否成功设置
+        """
+        if backend not in SCAN_BACKENDS:
+            self._log_message(f"无效的扫描后端: {backend}，可选: {', '.join(SCAN_BACKENDS)}")
+            return False
+        
+        self.scan_backend = backend
+        self._log_message(f"扫描后端已设置为: {backend}")
+        return True
+    
+    def set_collision_check(self, mode: str) -> bool:
+        """
+        设置目标文件名冲突检查模式
+        
+        Args:
+            mode: off 不检查；warn 在创建/刷新/同步后输出涉及本次修改的组的冲突；
+                  error 存在冲突时放弃本次修改，项目文件保持不变
+            
+        Returns:
+            是否成功设置
+        """
+        if mode not in COLLISION_CHECK_MODES:
+            self._log_message(f"无效的冲突检查模式: {mode}，可选: {', '.join(COLLISION_CHECK_MODES)}")
             return False
+        
+        self.collision_check = mode
+        self._log_message(f"冲突检查模式已设置为: {mode}")
+        return True
+    
+    def set_options_sync(self, enabled: bool) -> bool:
+        """
+        设置保存项目时是否同步 .uvoptx
+        
+        启用后每次保存都按内存中的项目 XML 更新同名 .uvoptx 的组和文件条目（不重新扫描目录），
+        删除已不存在的条目，uVision 打开项目时无需再逐项核对。.uvoptx 不存在时跳过。
+        
+        Args:
+            enabled: 是否同步
+            
+        Returns:
+            是否成功设置
+        """
+        self.sync_options = enabled
+        self._log_message(f"同步 .uvoptx 已{'开启' if enabled else '关闭'}")
+        return True
+    
+    def set_journal_persistence(self, enabled: bool) -> bool:
+        """
+        设置是否持久化撤销日志
+        
+        默认只在内存中保留撤销记录；启用后每次保存都把日志写入项目文件旁的 .journal.jsonl，
+        重新打开未被外部修改的项目时可继续撤销。启用时立即写入当前日志。
+        
+        Args:
+            enabled: 是否持久化
+            
+        Returns:
+            是否成功设置
+        """
+        self.persist_journal = enabled
+        if enabled:
+            self._save_journal()
+        self._log_message(f"撤销日志持久化已{'开启' if enabled else '关闭'}")
+        return True
+    
+    def set_change_feed(self, target: Optional[str]) -> bool:
+        """
+        设置 JSON Lines 变更事件输出
+        
+        每个修改项目的操作保存后，为每个增删的组、文件、头文件路径输出一行事件，
+        最后输出一行带耗时的汇总事件。
+        
+        Args:
+            target: 输出文件路径（追加写入）；"-" 表示标准输出；None 或 "off" 表示关闭
+            
+        Returns:
+            是否成功设置
+        """
+        if not target or target == CHANGE_FEED_OFF:
+            self._change_feed = None
+            self._log_message("已关闭变更事件输出")
+            return True
+        
+        self._change_feed = ChangeFeed(target)
+        self._log_message(f"变更事件将输出到: {target}")
+        return True
     
+    @read_locked
+    def find_collisions(self) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, List[str]]]:
+        """
+        检查整个项目的目标文件名冲突和重复添加的源文件
+        
+        Returns:
+            (目标文件名 → {源文件路径: 组名列表}, 源文件路径 → 组名列表)
+        """
+        try:
+            self._ensure_project_loaded()
+            index = self._get_index()
+            return index.object_collisions(), index.duplicate_files()
+        except Exception as e:
+            self._log_message(f"检查冲突失败: {str(e)}")
+            return {}, {}
+    
+    @journaled("delete_existing_groups")
     def delete_existing_groups(self, regex_pattern: str) -> bool:
         """
         删除匹配正则表达式的文件组
@@ -357,15 +792,7 @@ class KeilProject:
             if not validate_regex_pattern(regex_pattern):
                 raise ValueError(f"无效的正则表达式: {regex_pattern}")
             
-            pattern = re.compile(regex_pattern)
-            groups = self.etree_root.xpath(XPATH_GROUPS)[0]
-            group_name_list = self.etree_root.xpath(XPATH_GROUP_NAME)
-            
-            deleted_count = 0
-            for group_name_element in group_name_list:
-                if pattern.search(group_name_element.text):
-                    groups.remove(group_name_element.getparent())
-                    deleted_count += 1
+            deleted_count = len(self._delete_groups_by_regex(regex_pattern))
             
             self._save_project()
             self._log_message(f"成功删除 {deleted_count} 个文件组")
@@ -375,12 +802,52 @@ class KeilProject:
             self._log_message(f"删除文件组失败: {str(e)}")
             return False
     
-    def add_include_path(self, path: str) -> bool:
+    @journaled("rename_groups")
+    def rename_groups(self, old_prefix: str, new_prefix: str) -> bool:
+        """
+        将组名前缀为 old_prefix 的所有组改为 new_prefix（如把 Drivers/... 移到 BSP/Drivers/...）
+        
+        只修改 GroupName，不重新扫描磁盘；新组名已存在时把文件并入已有的组（同名文件保留已有的）。
+        
+        Args:
+            old_prefix: 原组名前缀
+            new_prefix: 新组名前缀
+        
+        Returns:
+            是否成功
+        """
+        try:
+            self._ensure_project_loaded()
+            
+            old_prefix = old_prefix.strip("/")
+            new_prefix = new_prefix.strip("/")
+            if not old_prefix or not new_prefix:
+                raise ValueError("组名前缀不能为空")
+            if (old_prefix == new_prefix or new_prefix.startswith(f"{old_prefix}/")
+                    or old_prefix.startswith(f"{new_prefix}/")):
+                raise ValueError(f"新旧前缀不能相同或互相包含: {old_prefix} -> {new_prefix}")
+            
+            renamed, merged = self._rename_groups(old_prefix, new_prefix)
+            if not renamed and not merged:
+                self._log_message(f"没有以 '{old_prefix}' 为前缀的组")
+                return True
+            
+            self._save_project()
+            self._log_message(f"重命名了 {len(renamed)} 个组，{len(merged)} 个组并入了已有的组")
+            return True
+        
+        except Exception as e:
+            self._log_message(f"重命名组失败: {str(e)}")
+            return False
+    
+    @journaled("add_include_path")
+    def add_include_path(self, path: str, result: Optional[OperationResult] = None) -> bool:
         """
         添加头文件路径
         
         Args:
             path: 递归起始路径
+            result: 填充新增路径的操作结果，失败时记录异常
             
         Returns:
             是否成功添加
@@ -388,25 +855,21 @@ class KeilProject:
         try:
             self._ensure_project_loaded()
             
-            include_folders = find_folders_with_files(path, SUPPORTED_HEADER_EXTENSIONS)
-            include_folders = [get_relative_path(folder, self.project_path) for folder in include_folders]
-            
-            include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
-            current_paths = include_path_element.text.split(";") if include_path_element.text else []
-            
-            all_paths = list(set(current_paths + include_folders))
-            all_paths.sort()
-            
-            include_path_element.text = ";".join(all_paths)
+            include_folders = self._find_header_dirs(path)
+            include_added = self._merge_include_paths(include_folders)
             self._save_project()
             
+            self._fill_result(result, [], [], 0, include_added, [])
             self._log_message(f"成功添加 {len(include_folders)} 个头文件路径")
             return True
             
         except Exception as e:
             self._log_message(f"添加头文件路径失败: {str(e)}")
+            if result is not None:
+                result.error = e
             return False
     
+    @journaled("delete_include_path")
     def delete_include_path(self, regex_pattern: str) -> bool:
         """
         删除匹配正则表达式的头文件路径
@@ -423,16 +886,7 @@ class KeilProject:
             if not validate_regex_pattern(regex_pattern):
                 raise ValueError(f"无效的正则表达式: {regex_pattern}")
             
-            include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
-            pattern = re.compile(regex_pattern)
-            
-            current_paths = include_path_element.text.split(";") if include_path_element.text else []
-            original_count = len(current_paths)
-            
-            filtered_paths = [path for path in current_paths if not pattern.search(path)]
-            deleted_count = original_count - len(filtered_paths)
-            
-            include_path_element.text = ";".join(list(set(filtered_paths)))
+            deleted_count = len(self._remove_include_paths(regex_pattern))
             self._save_project()
             
             self._log_message(f"成功删除 {deleted_count} 个头文件路径")
@@ -442,52 +896,1135 @@ class KeilProject:
             self._log_message(f"删除头文件路径失败: {str(e)}")
             return False
     
-    def _get_or_create_group(self, name: str) -> _Element:
-        """获取或创建文件组"""
-        group_name_element = self.etree_root.xpath(f'{XPATH_GROUP_NAME}[text()="{name}"]')
-        if group_name_element:
-            return group_name_element[0].getparent()
-        
-        # 创建新组
-        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
-        group = etree.Element("Group")
-        
-        group_name = etree.Element("GroupName")
-        group_name.text = name
-        group.append(group_name)
+    @journaled("sweep_stale_entries")
+    def sweep_stale_entries(self, remove: bool = True) -> bool:
+        """
+        清理指向不存在文件的条目
         
-        files = etree.Element("Files")
-        group.append(files)
+        收集所有 FilePath 和头文件路径，按所在目录批量检查是否存在（每个目录只列一次），
+        一次性删除不存在的文件、头文件路径和因此变空的组（RTE 组和原本就没有文件的组不受影响），只保存一次。
         
-        groups.append(group)
-        return group
+        Args:
+            remove: 为 False 时只报告，不修改项目
+            
+        Returns:
+            是否成功
+        """
+        try:
+            self._ensure_project_loaded()
+            
+            missing_files, missing_includes, empty_groups = self._sweep_stale_entries(remove)
+            action = "移除" if remove else "发现"
+            for group_name, file_path in missing_files:
+                self._log_message(f"{action}不存在的文件: {file_path}（组 '{group_name}'）")
+            for include_path in missing_includes:
+                self._log_message(f"{action}不存在的头文件路径: {include_path}")
+            for group_name in empty_groups:
+                self._log_message(f"{action}空组: {group_name}")
+            
+            if remove and (missing_files or missing_includes or empty_groups):
+                self._save_project()
+            self._log_message(
+                f"{action}了 {len(missing_files)} 个不存在的文件、{len(missing_includes)} 个头文件路径、"
+                f"{len(empty_groups)} 个空组"
+            )
+            return True
+            
+        except Exception as e:
+            self._log_message(f"清理失效条目失败: {str(e)}")
+            return False
     
-    def _add_file_to_group(self, files_element: _Element, file_info: dict) -> None:
-        """向文件组添加文件"""
-        # 检查文件是否已存在
-        file_name_element = files_element.xpath(f'.//FileName[text()="{file_info["file_name"]}"]')
-        if file_name_element:
-            return
-        
-        file_element = etree.Element("File")
-        
-        file_name = etree.Element("FileName")
-        file_name.text = file_info["file_name"]
+    @journaled("set_include_in_build")
+    def set_include_in_build(self, patterns: List[str], include_in_build: bool) -> bool:
+        """
+        批量设置组和文件的 IncludeInBuild 选项
         
-        file_type = etree.Element("FileType")
-        file_type.text = file_info["file_type"]
+        组名匹配时设置组的 GroupOption，否则逐个检查组中文件的 FilePath（正斜杠形式）
+        并设置 FileOption。设置会在 refresh_group/clean_rebuild_group 重新生成组时保留。
         
-        file_path = etree.Element("FilePath")
-        file_path.text = get_relative_path(file_info["file_path"], self.project_path)
+        Args:
+            patterns: 正则表达式列表，匹配任意一个即可
+            include_in_build: True 参与编译，False 排除出编译
+            
+        Returns:
+            是否成功设置
+        """
+        try:
+            self._ensure_project_loaded()
+            
+            if not patterns:
+                raise ValueError("至少需要一个正则表达式")
+            for pattern in patterns:
+                if not validate_regex_pattern(pattern):
+                    raise ValueError(f"无效的正则表达式: {pattern}")
+            
+            regex = "|".join(f"(?:{pattern})" for pattern in patterns)
+            groups_changed, files_changed = self._apply_include_in_build(regex, include_in_build)
+            
+            if self._pending_edits:
+                self._save_project()
+            action = "恢复编译" if include_in_build else "排除出编译"
+            self._log_message(f"已将 {groups_changed} 个组、{files_changed} 个文件{action}")
+            return True
+            
+        except Exception as e:
+            self._log_message(f"设置编译选项失败: {str(e)}")
+            return False
+    
+    def undo(self) -> bool:
+        """
+        撤销最近一次修改项目的操作
         
-        file_element.append(file_name)
-        file_element.append(file_type)
-        file_element.append(file_path)
+        Returns:
+            是否成功撤销
+        """
+        return self._undo_redo(undo=True)
+    
+    def redo(self) -> bool:
+        """
+        重做最近一次撤销的操作
         
-        files_element.append(file_element)
+        Returns:
+            是否成功重做
+        """
+        return self._undo_redo(undo=False)
     
-    def _delete_groups_by_prefix(self, prefix: str) -> List[str]:
+    @write_locked
+    def _undo_redo(self, undo: bool) -> bool:
+        """执行撤销或重做"""
+        action = "撤销" if undo else "重做"
+        try:
+            self._ensure_project_loaded()
+            
+            source, target = ((self._journal.undo_stack, self._journal.redo_stack) if undo
+                              else (self._journal.redo_stack, self._journal.undo_stack))
+            if not source:
+                self._log_message(f"没有可{action}的操作")
+                return False
+            
+            entry = source[-1]
+            deltas = [invert_delta(delta) for delta in reversed(entry["deltas"])] if undo else entry["deltas"]
+            start_time = time.time()
+            with self._journal.suspended():
+                try:
+                    for delta in deltas:
+                        self._apply_delta(delta)
+                    self._index = None
+                    self._save_project()
+                except Exception:
+                    # 恢复到磁盘上的状态，避免留下一半的修改
+                    self._load_project()
+                    raise
+            
+            target.append(source.pop())
+            self._save_journal()
+            self._emit_changes("undo" if undo else "redo", deltas, start_time, time.time() - start_time)
+            self._log_message(f"已{action}操作 '{entry['label']}'（{len(entry['deltas'])} 处修改）")
+            return True
+            
+        except Exception as e:
+            self._log_message(f"{action}失败: {str(e)}")
+            return False
+    
+    @read_locked
+    def list_groups(self) -> List[str]:
+        """
+        列出项目中的所有组
+        
+        Returns:
+            组名列表，按项目中的顺序
+        """
+        try:
+            self._ensure_project_loaded()
+            return self._get_index().group_names()
+        except Exception as e:
+            self._log_message(f"查询组失败: {str(e)}")
+            return []
+    
+    @read_locked
+    def list_include_paths(self) -> List[str]:
+        """
+        列出项目的头文件路径
+        
+        Returns:
+            IncludePath 中的路径列表，按项目中的顺序
+        """
+        try:
+            self._ensure_project_loaded()
+            include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
+            return [path for path in (include_path_element.text or "").split(";") if path]
+        except Exception as e:
+            self._log_message(f"查询头文件路径失败: {str(e)}")
+            return []
+    
+    @read_locked
+    def find_file_groups(self, file_paths: List[str]) -> Dict[str, List[str]]:
+        """
+        查询文件所属的组
+        
+        Args:
+            file_paths: 文件路径列表（绝对路径或相对于当前目录的路径）
+            
+        Returns:
+            文件路径 → 包含该文件的组名列表，不在任何组中的文件对应空列表
+        """
+        try:
+            self._ensure_project_loaded()
+            index = self._get_index()
+            return {file_path: index.groups_of(file_path) for file_path in file_paths}
+        except Exception as e:
+            self._log_message(f"查询文件所属组失败: {str(e)}")
+            return {}
+    
+    @read_locked
+    def list_group_files(self, group_name: str) -> List[str]:
+        """
+        列出组中的所有文件
+        
+        Args:
+            group_name: 组名
+            
+        Returns:
+            文件的绝对路径列表
+        """
+        try:
+            self._ensure_project_loaded()
+            return self._get_index().files_of(group_name)
+        except Exception as e:
+            self._log_message(f"查询组文件失败: {str(e)}")
+            return []
+    
+    def scan_group(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH, clean: bool = False,
+                   min_group_files: int = 0, max_groups: int = 0, max_group_depth: int = 0) -> GroupScan:
+        """
+        扫描文件组的目录，只访问文件系统，不修改项目也不持有锁
+        
+        结果传给 refresh_group（clean=False）或 clean_rebuild_group（clean=True）后，
+        耗时的扫描就不会占用项目的写锁；打开项目时的预扫描结果同样可以在这里取用。
+        
+        Args:
+            clean: 是否为 clean_rebuild_group 扫描（按文件夹深度排序）
+            其余参数同 refresh_group
+            
+        Returns:
+            扫描结果
+        """
+        start_time = time.perf_counter()
+        path = normalize_path(path)
+        scan_args = (group_name, path, max_depth, clean, min_group_files, max_groups, max_group_depth)
+        groups = self._take_prefetched(scan_args)
+        if groups is None:
+            groups = self._scan_with_args(scan_args)
+        return GroupScan(scan_args=scan_args, groups=groups, header_dirs=self._find_header_dirs(path),
+                         scan_time=time.perf_counter() - start_time)
+    
+    def scan_mapping(self, mapping: GroupMapping) -> GroupScan:
+        """
+        扫描清单中的单个组映射，只访问文件系统，不修改项目也不持有锁
+        
+        Args:
+            mapping: 组映射
+            
+        Returns:
+            扫描结果，交给 apply_mapping 使用；include_paths 为 False 时不查找头文件目录
+        """
+        start_time = time.perf_counter()
+        groups = self._scan_mapping(mapping)
+        header_dirs = self._find_header_dirs(mapping.path) if mapping.include_paths else []
+        return GroupScan(scan_args=mapping.scan_key(), groups=groups, header_dirs=header_dirs,
+                         scan_time=time.perf_counter() - start_time)
+    
+    @write_locked
+    def apply_mapping(self, mapping: GroupMapping, scan: GroupScan) -> Tuple[List[str], List[str], int]:
+        """
+        把组映射的扫描结果写入内存中的项目 XML，并按头文件的增减更新 IncludePath，不保存
+        
+        用于 from_template 创建、之后由 export 写出的项目；已有项目请使用 sync，以便保存和撤销。
+        
+        Args:
+            mapping: 组映射，include_paths 为 False 时不自动维护头文件路径
+            scan: scan_mapping(mapping) 的返回值，多个项目可以共用
+            
+        Returns:
+            (删除的组名列表, 创建的组名列表, 添加的文件数)
+            
+        Raises:
+            ValueError: 扫描结果与组映射不一致
+        """
+        self._ensure_project_loaded()
+        if tuple(scan.scan_args) != mapping.scan_key():
+            raise ValueError(f"扫描结果与组映射 '{mapping.name}' 不一致")
+        
+        changes = self._apply_mapping(mapping, scan.groups)
+        if mapping.include_paths:
+            with self._header_tracking():
+                self._seed_header_dirs(mapping.path, scan.header_dirs)
+        self._update_include_refs()
+        return changes
+    
+    @read_locked
+    def export(self, path: str) -> None:
+        """
+        把内存中的项目原子地写到指定路径，不改变当前项目文件，也不检查外部修改
+        
+        Args:
+            path: 输出文件路径，所在目录不存在时自动创建
+        """
+        self._ensure_project_loaded()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_xml_file(path, self.etree_root)
+    
+    def preview_refresh(self, group_name: str, path: str, max_depth: int = DEFAULT_MAX_DEPTH,
+                        min_group_files: int = 0, max_groups: int = 0,
+                        max_group_depth: int = 0) -> Optional[RefreshPreview]:
+        """
+        预览 refresh_group 将要做的修改，只扫描文件系统，不修改项目
+        
+        Args:
+            参数同 refresh_group
+            
+        Returns:
+            变更预览，失败时返回 None
+        """
+        try:
+            self._ensure_project_loaded()
+            
+            start_time = time.perf_counter()
+            path = normalize_path(path)
+            scan_result = consolidate_groups(
+                group_name, self._scan_group_folders(group_name, path, max_depth),
+                min_group_files, max_groups, max_group_depth
+            )
+            
+            # 扫描不持有锁，只在读取当前组时持有读锁
+            preview = RefreshPreview(group_name=group_name, scan_time=time.perf_counter() - start_time)
+            with self._rw_lock.read():
+                index = self._get_index()
+                existing = {
+                    name: dict(index.group_files.get(name, {})) for name in index.group_names()
+                    if name == group_name or name.startswith(f"{group_name}/")
+                }
+            
+            scanned_groups = set()
+            for sub_group_name, files in scan_result:
+                scanned_groups.add(sub_group_name)
+                old_files = existing.get(sub_group_name)
+                if old_files is None:
+                    preview.groups_added.append(sub_group_name)
+                    old_files = {}
+                
+                new_files = {}
+                for file_info in files:
+                    new_files.setdefault(file_info["file_name"], ProjectIndex.key_for(file_info["file_path"]))
+                added = [name for name, key in new_files.items() if old_files.get(name) != key]
+                removed = [name for name, key in old_files.items() if new_files.get(name) != key]
+                if added:
+                    preview.files_added[sub_group_name] = added
+                if removed:
+                    preview.files_removed[sub_group_name] = removed
+            
+            for name, old_files in existing.items():
+                if name not in scanned_groups:
+                    preview.groups_removed.append(name)
+                    if old_files:
+                        preview.files_removed[name] = list(old_files)
+            
+            return preview
+            
+        except Exception as e:
+            self._log_message(f"预览刷新失败: {str(e)}")
+            return None
+    
+    def _get_sub_group_name(self, group_name: str, folder: str, path: str) -> str:
+        """根据文件夹相对于根路径的位置计算子组名"""
+        try:
+            rel_path = os.path.relpath(folder, path).replace("\\", "/")
+            if rel_path in [".", ""]:
+                return group_name
+            return f"{group_name}/{rel_path}"
+        except ValueError:
+            folder_name = os.path.basename(folder)
+            return f"{group_name}/{folder_name}"
+    
+    def _scan_group_folders(self, group_name: str, path: str, max_depth: int,
+                            extensions: Optional[List[str]] = None,
+                            exclude: Optional[List[str]] = None,
+                            sort_by_depth: bool = False) -> List[Tuple[str, List[dict]]]:
+        """扫描路径下的文件夹，返回完整的扫描结果，参数同 _iter_group_scan"""
+        return list(self._iter_group_scan(group_name, path, max_depth, extensions, exclude, sort_by_depth))
+    
+    def _iter_group_scan(self, group_name: str, path: str, max_depth: int,
+                         extensions: Optional[List[str]] = None,
+                         exclude: Optional[List[str]] = None,
+                         sort_by_depth: bool = False) -> Iterator[Tuple[str, List[dict]]]:
+        """
+        扫描路径下的文件夹，每扫描完一个文件夹就产出一个结果，只访问文件系统，不修改 XML
+        
+        Args:
+            group_name: 组名
+            path: 已标准化的源文件路径
+            max_depth: 搜索深度
+            extensions: 文件扩展名，默认包含源文件和头文件
+            exclude: 排除文件路径的正则表达式列表
+            sort_by_depth: 是否按文件夹深度排序
+            
+        Returns:
+            (子组名, 文件信息列表) 迭代器，子组名不重复
+        """
+        if extensions is None:
+            extensions = SUPPORTED_SOURCE_EXTENSIONS + SUPPORTED_HEADER_EXTENSIONS
+        exclude_patterns = [re.compile(pattern) for pattern in exclude or []]
+        
+        folders = iter_subfolders(path, max_depth, self.follow_symlinks, self.scan_backend)
+        if sort_by_depth:
+            folders = sorted(folders, key=lambda x: x.count('/'))
+        
+        seen_groups = set()
+        # 所有文件夹共享同一组物理标识，经不同链接到达的同一目录/文件只出现一次
+        visited = set()
+        for folder in folders:
+            all_files = find_files_by_extensions(folder, extensions, self.follow_symlinks, visited, self.scan_backend)
+            # 源文件在前，头文件在后
+            all_files.sort(key=lambda file_info: os.path.splitext(file_info["file_name"])[1] in SUPPORTED_HEADER_EXTENSIONS)
+            if exclude_patterns:
+                all_files = [
+                    file_info for file_info in all_files
+                    if not any(p.search(file_info["file_path"].replace("\\", "/")) for p in exclude_patterns)
+                ]
+            
+            if not all_files:
+                continue
+            
+            sub_group_name = self._get_sub_group_name(group_name, folder, path)
+            if sub_group_name in seen_groups:
+                continue
+            
+            seen_groups.add(sub_group_name)
+            yield sub_group_name, all_files
+    
+    def _stream_group_scan(self, group_name: str, path: str, max_depth: int, sort_by_depth: bool,
+                           min_group_files: int, max_groups: int,
+                           max_group_depth: int) -> Iterable[Tuple[str, List[dict]]]:
+        """
+        在后台线程中扫描，边扫描边把结果交给调用方写入 XML
+        
+        需要合并组时必须拿到完整结果，此时先收集再合并。
+        """
+        scan_stream = iter_in_background(
+            self._iter_group_scan(group_name, path, max_depth, sort_by_depth=sort_by_depth)
+        )
+        if min_group_files or max_groups or max_group_depth:
+            return consolidate_groups(group_name, list(scan_stream), min_group_files, max_groups, max_group_depth)
+        return scan_stream
+    
+    def _start_prefetch(self) -> None:
+        """按状态文件中记录的刷新参数，在后台线程池中预扫描各组的目录，已有预扫描结果的组跳过"""
+        roots = load_state(self.project_path).get("scan_roots", {})
+        scan_args_list = [
+            (group_name, *root) for group_name, root in roots.items()
+            if isinstance(root, list) and len(root) == 6 and os.path.isdir(root[0])
+            and (group_name, *root) not in self._prefetched
+        ]
+        if not scan_args_list:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(DEFAULT_SYNC_WORKERS, len(scan_args_list)))
+        for scan_args in scan_args_list:
+            self._prefetched[tuple(scan_args)] = executor.submit(self._prefetch_scan, tuple(scan_args))
+        executor.shutdown(wait=False)
+        self._log_message(f"后台预扫描 {len(scan_args_list)} 个组的目录")
+    
+    def _scan_with_args(self, scan_args: tuple) -> List[Tuple[str, List[dict]]]:
+        """按刷新参数完整扫描一个组，需要时合并子组"""
+        group_name, path, max_depth, sort_by_depth, min_group_files, max_groups, max_group_depth = scan_args
+        scan_result = self._scan_group_folders(group_name, path, max_depth, sort_by_depth=sort_by_depth)
+        if min_group_files or max_groups or max_group_depth:
+            scan_result = consolidate_groups(group_name, scan_result, min_group_files, max_groups, max_group_depth)
+        return scan_result
+    
+    def _prefetch_scan(self, scan_args: tuple) -> Tuple[List[Tuple[str, List[dict]]], str]:
+        """
+        完整扫描一个组
+        
+        Returns:
+            (扫描结果, 扫描开始前目录树元数据的指纹)，扫描期间的变化会使之后的校验失败而不是被漏掉
+        """
+        digest = tree_digest([scan_args[1]], self.follow_symlinks, self.scan_backend)
+        return self._scan_with_args(scan_args), digest
+    
+    def _take_prefetched(self, scan_args: tuple) -> Optional[List[Tuple[str, List[dict]]]]:
+        """
+        取出参数相同的预扫描结果（只能使用一次），仍在扫描时等待其完成
+        
+        使用前重新计算目录树元数据的指纹（只读取目录，不列出文件），与扫描时不一致说明
+        打开项目后有文件或目录被增删、改名，此时丢弃预扫描结果。
+        
+        Returns:
+            扫描结果，没有预扫描、扫描失败或目录已变化时返回 None
+        """
+        future = self._prefetched.pop(scan_args, None)
+        if future is None:
+            return None
+        try:
+            scan_result, digest = future.result()
+        except Exception as e:
+            self._log_message(f"预扫描失败，重新扫描: {str(e)}")
+            return None
+        if tree_digest([scan_args[1]], self.follow_symlinks, self.scan_backend) != digest:
+            self._log_message(f"预扫描后目录 '{scan_args[1]}' 已变化，重新扫描")
+            return None
+        return scan_result
+    
+    def _take_scan(self, scan_args: tuple,
+                   scan: Optional[GroupScan]) -> Tuple[Iterable[Tuple[str, List[dict]]], Optional[List[str]]]:
+        """
+        取得刷新使用的扫描结果：调用方传入的 scan_group 结果、预扫描结果，或边扫描边写入
+        
+        Returns:
+            (扫描结果, 头文件目录)，头文件目录未知时为 None
+            
+        Raises:
+            ValueError: 传入的扫描结果与刷新参数不一致
+        """
+        if scan is not None:
+            if tuple(scan.scan_args) != scan_args:
+                raise ValueError(f"扫描结果的参数与本次刷新不一致: {scan.scan_args}")
+            return scan.groups, scan.header_dirs
+        scan_result = self._take_prefetched(scan_args)
+        if scan_result is None:
+            scan_result = self._stream_group_scan(*scan_args)
+        return scan_result, None
+    
+    @staticmethod
+    def _fill_result(result: Optional[OperationResult], groups_removed: List[str], groups_created: List[str],
+                     files_added: int, include_added: List[str], include_removed: List[str]) -> None:
+        """把一次操作的修改内容填入调用方传入的操作结果"""
+        if result is None:
+            return
+        result.groups_removed.extend(groups_removed)
+        result.groups_created.extend(groups_created)
+        result.files_added += files_added
+        result.include_paths_added.extend(include_added)
+        result.include_paths_removed.extend(include_removed)
+    
+    def _store_scan_root(self, scan_args: tuple) -> None:
+        """记录组的刷新参数到状态文件，下次打开项目时据此预扫描"""
+        group_name, *root = scan_args
+        state = load_state(self.project_path)
+        roots = state.setdefault("scan_roots", {})
+        if roots.get(group_name) != root:
+            roots[group_name] = root
+            save_state(self.project_path, state)
+    
+    def _detect_scan_change(self, group_name: str,
+                            scan_result: List[Tuple[str, List[dict]]]) -> Tuple[bool, Optional[str]]:
+        """
+        判断扫描结果相对项目中现有的组是否有变化
+        
+        只有组名、文件名或文件路径不同才算变化：项目中只记录文件列表，文件内容的变化不需要改写项目。
+        content 模式另外计算内容指纹，与上次记录的指纹不同时只输出日志。
+        
+        Returns:
+            (组成员是否有变化, content 模式下的内容指纹，其他模式为 None)
+        """
+        index = self._get_index()
+        
+        scanned = {}
+        for sub_group_name, files in scan_result:
+            members = scanned.setdefault(sub_group_name, {})
+            for file_info in files:
+                members.setdefault(file_info["file_name"], index.resolve(file_info["file_path"]))
+        
+        existing = {
+            name: index.group_files.get(name, {}) for name in index.group_names()
+            if name == group_name or name.startswith(f"{group_name}/")
+        }
+        changed = membership_digest(scanned) != membership_digest(existing)
+        
+        if self.change_detection != "content":
+            return changed, None
+        
+        paths = [file_info["file_path"] for _, files in scan_result for file_info in files]
+        content_hashes = {index.resolve(path): digest for path, digest in hash_files(paths).items()}
+        content_digest = membership_digest(scanned, content_hashes)
+        
+        stored_digest = load_state(self.project_path).get("content_digests", {}).get(group_name)
+        if not changed and stored_digest and stored_digest != content_digest:
+            self._log_message(f"组 '{group_name}' 的文件内容有变化，组成员未变，无需修改项目")
+        return changed, content_digest
+    
+    def _store_content_digest(self, group_name: str, content_digest: Optional[str]) -> None:
+        """记录组的内容指纹到状态文件"""
+        if content_digest is None:
+            return
+        state = load_state(self.project_path)
+        digests = state.setdefault("content_digests", {})
+        if digests.get(group_name) != content_digest:
+            digests[group_name] = content_digest
+            save_state(self.project_path, state)
+    
+    def _scan_by_rules(self, path: str, rule_set: RuleSet) -> List[Tuple[str, List[dict]]]:
+        """
+        遍历一次目录树，用编译好的规则把每个文件归入一个组
+        
+        Returns:
+            (组名, 文件信息列表) 列表，按规则中组的定义顺序排列，不含空组
+        """
+        matcher = RuleMatcher(rule_set)
+        exclude_patterns = [re.compile(pattern) for pattern in rule_set.exclude]
+        grouped: Dict[str, List[dict]] = {group_name: [] for group_name in rule_set.group_names}
+        
+        for file_info in find_files_by_extensions(path, rule_set.extensions, self.follow_symlinks,
+                                                  backend=self.scan_backend):
+            file_path = file_info["file_path"].replace("\\", "/")
+            if any(p.search(file_path) for p in exclude_patterns):
+                continue
+            group_name = matcher.classify(os.path.relpath(file_info["file_path"], path))
+            if group_name is not None:
+                grouped[group_name].append(file_info)
+        
+        scan_result = []
+        for group_name, files in grouped.items():
+            if files:
+                # 源文件在前，头文件在后
+                files.sort(key=lambda file_info: os.path.splitext(file_info["file_name"])[1] in SUPPORTED_HEADER_EXTENSIONS)
+                scan_result.append((group_name, files))
+        return scan_result
+    
+    def _scan_mapping(self, mapping: GroupMapping) -> List[Tuple[str, List[dict]]]:
+        """扫描清单中的单个组映射，返回文件组扫描结果"""
+        scan_result = self._scan_group_folders(
+            mapping.name, mapping.path, mapping.max_depth, mapping.extensions, mapping.exclude
+        )
+        return consolidate_groups(
+            mapping.name, scan_result, mapping.min_group_files, mapping.max_groups, mapping.max_group_depth
+        )
+    
+    def _apply_group_scan(self, group_name: str, scan_result: Iterable[Tuple[str, List[dict]]],
+                          verbose: bool = False) -> Tuple[List[str], List[str], int]:
+        """
+        将扫描结果写入 XML：删除指定前缀的旧组后重新创建
+        
+        Args:
+            group_name: 组名前缀
+            scan_result: _scan_group_folders 的返回值，或边扫描边产出的迭代器
+            verbose: 是否逐组输出日志
+            
+        Returns:
+            (删除的组名列表, 创建的组名列表, 添加的文件数)
+        """
+        # 重新生成的组和文件沿用旧的 GroupOption/FileOption（如 IncludeInBuild）
+        group_options, file_options = self._collect_options(group_name)
+        deleted_groups = self._delete_groups_by_prefix(group_name)
+        if verbose and deleted_groups:
+            self._log_message(f"清理了旧组: {', '.join(deleted_groups)}")
+        
+        groups_created, files_added = self._populate_groups(scan_result, group_options, file_options, verbose)
+        return deleted_groups, groups_created, files_added
+    
+    def _apply_mapping(self, mapping: GroupMapping,
+                       scan_result: List[Tuple[str, List[dict]]]) -> Tuple[List[str], List[str], int]:
+        """将组映射的扫描结果写入 XML，include_paths 为 False 的映射中头文件的增减不反映到 IncludePath"""
+        with self._header_tracking(mapping.include_paths):
+            return self._apply_group_scan(mapping.name, scan_result)
+    
+    def _apply_rule_scan(self, rule_set: RuleSet,
+                         scan_result: List[Tuple[str, List[dict]]]) -> Tuple[List[str], List[str], int]:
+        """
+        将按规则分组的扫描结果写入 XML：删除规则涉及的所有组（只删同名组，不含子组）后重新创建
+        
+        Returns:
+            (删除的组名列表, 创建的组名列表, 添加的文件数)
+        """
+        group_options, file_options = {}, {}
+        for group_name in rule_set.group_names:
+            options = self._collect_options(group_name)
+            group_options.update(options[0])
+            file_options.update(options[1])
+        
+        names_pattern = "|".join(re.escape(group_name) for group_name in rule_set.group_names)
+        deleted_groups = self._delete_groups_by_regex(f"^(?:{names_pattern})$")
+        groups_created, files_added = self._populate_groups(scan_result, group_options, file_options)
+        return deleted_groups, groups_created, files_added
+    
+    def _populate_groups(self, scan_result: Iterable[Tuple[str, List[dict]]], group_options: Dict[str, str],
+                         file_options: Dict[str, str], verbose: bool = False) -> Tuple[List[str], int]:
+        """
+        按扫描结果创建组并添加文件，沿用收集到的旧选项
+        
+        Returns:
+            (创建的组名列表, 添加的文件数)
+        """
+        groups_created = []
+        files_added = 0
+        for sub_group_name, all_files in scan_result:
+            group = self._get_or_create_group(sub_group_name)
+            if sub_group_name in group_options:
+                self._set_option(group, sub_group_name, None, group_options[sub_group_name])
+            files_element = group.xpath('.//Files')[0]
+            
+            for file_info in all_files:
+                file_element = self._add_file_to_group(files_element, file_info)
+                files_added += 1
+                if file_options and file_element is not None:
+                    option = file_options.get(ProjectIndex.key_for(file_info["file_path"]))
+                    if option is not None:
+                        self._set_option(file_element, sub_group_name, file_info["file_name"], option)
+            
+            groups_created.append(sub_group_name)
+            if verbose:
+                self._log_message(f"创建组 '{sub_group_name}'，添加了 {len(all_files)} 个文件")
+        
+        return groups_created, files_added
+    
+    def _merge_include_paths(self, include_folders: List[str]) -> List[str]:
+        """
+        将头文件目录合并到 IncludePath，不保存
+        
+        Args:
+            include_folders: 头文件目录的绝对路径列表
+            
+        Returns:
+            新增的路径列表
+        """
+        self._record_edit("merge_include_paths", list(include_folders))
+        include_folders = [get_relative_path(folder, self.project_path) for folder in include_folders]
+        
+        include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
+        current_paths = include_path_element.text.split(";") if include_path_element.text else []
+        
+        all_paths = list(set(current_paths + include_folders))
+        all_paths.sort()
+        
+        self._set_include_path_text(include_path_element, ";".join(all_paths))
+        current_set = set(current_paths)
+        return [include_path for include_path in all_paths if include_path not in current_set]
+    
+    def _remove_include_paths(self, regex_pattern: str) -> List[str]:
+        """
+        从 IncludePath 中删除匹配正则表达式的路径，不保存
+        
+        Returns:
+            删除的路径列表
+        """
+        self._record_edit("remove_include_paths", regex_pattern)
+        include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
+        pattern = re.compile(regex_pattern)
+        
+        current_paths = include_path_element.text.split(";") if include_path_element.text else []
+        removed_paths = [path for path in current_paths if pattern.search(path)]
+        filtered_paths = [path for path in current_paths if not pattern.search(path)]
+        
+        self._set_include_path_text(include_path_element, ";".join(list(set(filtered_paths))))
+        return removed_paths
+    
+    def _set_header_tracking(self, enabled: bool) -> None:
+        """
+        设置后续修改中头文件的增减是否反映到 IncludePath
+        
+        开关本身不修改 XML，不作为修改记录；每条修改记录带有当时的设置，重放时据此恢复。
+        """
+        self._get_index().track_header_changes = enabled
+    
+    @contextmanager
+    def _header_tracking(self, enabled: bool = True) -> Iterator[None]:
+        """
+        扫描驱动的修改期间把头文件的增减反映到 IncludePath，结束后恢复为不反映
+        
+        删除、重命名组和清理失效条目等其他操作只维护引用计数，不会增删 IncludePath（包括用户手动添加的路径）。
+        """
+        self._set_header_tracking(enabled)
+        try:
+            yield
+        finally:
+            self._set_header_tracking(False)
+    
+    def _find_header_dirs(self, path: str) -> List[str]:
+        """查找扫描根目录下含头文件的目录"""
+        return find_folders_with_files(path, SUPPORTED_HEADER_EXTENSIONS, self.follow_symlinks, self.scan_backend)
+    
+    def _seed_header_dirs(self, path: str, folders: Optional[List[str]] = None) -> None:
+        """
+        把扫描根目录下所有含头文件的目录计入引用计数，不记录修改
+        
+        只有叶子目录会成为组，父目录（如同时有 Legacy 子目录的 Inc）中的头文件不在任何组中，
+        由此仍能加入 IncludePath。登记按根目录替换，根目录下不再有头文件的目录随之减少计数。
+        
+        Args:
+            path: 扫描根目录
+            folders: 已查找到的头文件目录，未指定时在此查找
+        """
+        if folders is None:
+            folders = self._find_header_dirs(path)
+        self._get_index().seed_header_dirs(path, folders)
+    
+    def _update_include_refs(self) -> Tuple[List[str], List[str]]:
+        """
+        按头文件目录引用计数的变化更新 IncludePath，不保存
+        
+        只处理上次更新以来计数在 0 与正数之间变化的目录：新出现头文件的目录追加到末尾，
+        不再有头文件的目录从列表中移除，其余路径保持原有顺序。
+        
+        Returns:
+            (新增的路径列表, 移除的路径列表)
+        """
+        index = self._index
+        if index is None or index.root is not self.etree_root:
+            return [], []
+        appeared, disappeared = index.take_header_dir_changes()
+        if not appeared and not disappeared:
+            return [], []
+        
+        include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
+        current_paths = include_path_element.text.split(";") if include_path_element.text else []
+        disappeared = set(disappeared)
+        current_keys = set()
+        kept_paths, removed = [], []
+        for include_path in current_paths:
+            key = index.resolve(include_path) if include_path and "$" not in include_path else None
+            if key in disappeared:
+                removed.append(include_path)
+                continue
+            kept_paths.append(include_path)
+            current_keys.add(key)
+        
+        added = []
+        for folder in appeared:
+            if ProjectIndex.key_for(folder) not in current_keys:
+                added.append(get_relative_path(folder, self.project_path))
+        
+        # 只在 IncludePath 确实变化时记录修改，未变化的操作不会因此保存项目
+        if added or removed:
+            self._record_edit("update_include_refs")
+            self._set_include_path_text(include_path_element, ";".join(kept_paths + added))
+            self._log_message(f"更新头文件路径：新增 {len(added)} 个，移除 {len(removed)} 个")
+        return added, removed
+    
+    @staticmethod
+    def _rebase_path(path: str, template_dir: str, project_path: str) -> str:
+        """将相对于模板目录的路径改为相对于项目，绝对路径和含宏（如 $K）、环境变量的路径保持不变"""
+        if not path or "$" in path or "%" in path or os.path.isabs(path.replace("\\", "/")):
+            return path
+        return get_relative_path(os.path.join(template_dir, path.replace("\\", "/")), project_path)
+    
+    def _rebase_template(self, template_path: str) -> None:
+        """原地修改模板副本中的 FilePath 和 IncludePath，使其相对于本项目"""
+        template_dir = os.path.dirname(template_path)
+        if os.path.normcase(template_dir) == os.path.normcase(os.path.dirname(self.project_path)):
+            return
+        for file_path in self.etree_root.iter("FilePath"):
+            file_path.text = self._rebase_path(file_path.text or "", template_dir, self.project_path)
+        for include_path in self.etree_root.xpath(XPATH_INCLUDE_PATH):
+            include_path.text = ";".join(
+                self._rebase_path(path, template_dir, self.project_path)
+                for path in (include_path.text or "").split(";") if path
+            )
+    
+    def _sweep_stale_entries(self, remove: bool) -> Tuple[List[Tuple[str, str]], List[str], List[str]]:
+        """
+        找出（并删除）不存在的文件、头文件路径，以及因此变空的组
+        
+        Args:
+            remove: 是否删除
+            
+        Returns:
+            ((组名, FilePath) 列表, 头文件路径列表, 空组名列表)
+        """
+        if remove:
+            self._record_edit("sweep_stale_entries")
+        index = self._get_index()
+        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
+        include_path_element = self.etree_root.xpath(XPATH_INCLUDE_PATH)[0]
+        include_paths = include_path_element.text.split(";") if include_path_element.text else []
+        
+        # 先收集全部路径再批量检查；含 Keil 宏（如 $K）或环境变量的路径无法解析，跳过
+        file_entries = []
+        for group in groups.iterchildren("Group"):
+            for file_element in group.iterfind("Files/File"):
+                file_path = file_element.findtext("FilePath") or ""
+                if file_path and "$" not in file_path and "%" not in file_path:
+                    file_entries.append((group, file_element, file_path, index.resolve(file_path)))
+        include_entries = [
+            (include_path, index.resolve(include_path)) for include_path in include_paths
+            if include_path and "$" not in include_path and "%" not in include_path
+        ]
+        missing_file_keys = find_missing_paths(key for _, _, _, key in file_entries)
+        missing_include_keys = find_missing_paths((key for _, key in include_entries), directories=True)
+        
+        missing_files = []
+        missing_elements = set()
+        touched_groups = set()
+        for group, file_element, file_path, key in file_entries:
+            if key not in missing_file_keys:
+                continue
+            group_name = group.findtext("GroupName") or ""
+            missing_files.append((group_name, file_path))
+            missing_elements.add(file_element)
+            touched_groups.add(group)
+            if remove:
+                files_element = file_element.getparent()
+                file_name = file_element.findtext("FileName") or ""
+                self._journal.record({
+                    "op": "remove_file", "group": group_name, "name": file_name,
+                    "index": files_element.index(file_element),
+                    "xml": etree.tostring(file_element, encoding="unicode")
+                })
+                files_element.remove(file_element)
+                if index.get_group(group_name) is group:
+                    index.remove_file(group_name, file_name)
+        
+        missing_includes = [include_path for include_path, key in include_entries if key in missing_include_keys]
+        if remove and missing_includes:
+            missing_set = set(missing_includes)
+            self._set_include_path_text(
+                include_path_element, ";".join(path for path in include_paths if path not in missing_set)
+            )
+        
+        # 只处理因本次清理而变空的组（只报告时即文件全部失效的组），原本没有文件的组保持不变，
+        # 其中包括只有组名的 RTE 组（如 ::CMSIS）
+        empty_groups = []
+        for group in list(groups.iterchildren("Group")):
+            group_name = group.findtext("GroupName") or ""
+            if group not in touched_groups or group_name.startswith(RTE_GROUP_PREFIX):
+                continue
+            if all(file_element in missing_elements for file_element in group.iterfind("Files/File")):
+                empty_groups.append(group_name)
+                if remove:
+                    self._remove_group_element(groups, group)
+                    if index.get_group(group_name) is group:
+                        index.remove_group(group_name)
+        
+        return missing_files, missing_includes, empty_groups
+    
+    def _set_include_path_text(self, include_path_element: _Element, text: str) -> None:
+        """修改 IncludePath 并记录到撤销日志"""
+        if (include_path_element.text or "") != text:
+            self._journal.record({"op": "set_include_paths", "old": include_path_element.text or "", "new": text})
+        include_path_element.text = text
+    
+    def _check_collisions(self, group_names: List[str]) -> None:
+        """
+        检查本次修改涉及的组是否引入了目标文件名冲突
+        
+        Raises:
+            ObjectNameCollisionError: 检查模式为 error 且存在冲突
+        """
+        if self.collision_check == "off" or not group_names:
+            return
+        
+        index = self._get_index()
+        collisions = index.object_collisions(group_names)
+        duplicates = index.duplicate_files(group_names)
+        for obj, sources in sorted(collisions.items()):
+            details = "; ".join(f"{path} ({', '.join(groups)})" for path, groups in sources.items())
+            self._log_message(f"警告: 目标文件 {obj}.o 冲突: {details}")
+        for path, groups in sorted(duplicates.items()):
+            self._log_message(f"警告: 文件 {path} 被加入了多个组: {', '.join(groups)}")
+        
+        if self.collision_check == "error" and (collisions or duplicates):
+            raise ObjectNameCollisionError(
+                f"发现 {len(collisions)} 处目标文件名冲突、{len(duplicates)} 个重复添加的文件，已放弃本次修改"
+            )
+    
+    def _discard_unsaved_changes(self) -> None:
+        """放弃尚未保存的修改，从磁盘重新加载项目"""
+        self._journal.discard_unsaved()
+        self._index = None
+        self._load_project()
+    
+    def _get_index(self) -> ProjectIndex:
+        """获取反向索引，XML 被替换后自动重建"""
+        index = self._index
+        if index is None or index.root is not self.etree_root:
+            with self._init_lock:
+                if self._index is None or self._index.root is not self.etree_root:
+                    self._index = ProjectIndex(self.etree_root, self.project_path)
+                index = self._index
+        return index
+    
+    def _get_or_create_group(self, name: str) -> _Element:
+        """获取或创建文件组"""
+        index = self._get_index()
+        group = index.get_group(name)
+        if group is not None:
+            return group
+        
+        # 创建新组
+        self._record_edit("create_group", name)
+        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
+        group = etree.Element("Group")
+        
+        group_name = etree.Element("GroupName")
+        group_name.text = name
+        group.append(group_name)
+        
+        files = etree.Element("Files")
+        group.append(files)
+        
+        self._journal.record({"op": "add_group", "group": name, "index": len(groups)})
+        groups.append(group)
+        index.add_group(name, group)
+        return group
+    
+    def _add_file_to_group(self, files_element: _Element, file_info: dict) -> Optional[_Element]:
+        """向文件组添加文件，返回新建的 File 元素，组内已有同名文件时返回 None"""
+        # 检查文件是否已存在
+        index = self._get_index()
+        group_name = files_element.getparent().findtext("GroupName")
+        if index.has_file_name(group_name, file_info["file_name"]):
+            return None
+        
+        self._record_edit("add_file", group_name, dict(file_info))
+        file_path = get_relative_path(file_info["file_path"], self.project_path)
+        file_element = self._create_file_element(file_info["file_name"], file_info["file_type"], file_path)
+        files_element.append(file_element)
+        index.add_file(group_name, file_info["file_name"], file_path)
+        self._journal.record({
+            "op": "add_file", "group": group_name,
+            "name": file_info["file_name"], "type": file_info["file_type"], "path": file_path
+        })
+        return file_element
+    
+    def _create_file_element(self, name: str, file_type: str, path: str) -> _Element:
+        """创建 File 元素"""
+        file_element = etree.Element("File")
+        
+        file_name = etree.Element("FileName")
+        file_name.text = name
+        
+        file_type_element = etree.Element("FileType")
+        file_type_element.text = file_type
+        
+        file_path = etree.Element("FilePath")
+        file_path.text = path
+        
+        file_element.append(file_name)
+        file_element.append(file_type_element)
+        file_element.append(file_path)
+        return file_element
+    
+    def _collect_options(self, prefix: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        收集指定前缀的组中已有的选项
+        
+        Returns:
+            (组名 → GroupOption XML, 文件索引键 → FileOption XML)
+        """
+        index = self._get_index()
+        group_options = {}
+        file_options = {}
+        for name, group in index.groups.items():
+            if name != prefix and not name.startswith(f"{prefix}/"):
+                continue
+            option = group.find("GroupOption")
+            if option is not None:
+                group_options[name] = etree.tostring(option, encoding="unicode", with_tail=False)
+            for file_element in group.iterfind("Files/File"):
+                option = file_element.find("FileOption")
+                if option is not None:
+                    key = index.resolve(file_element.findtext("FilePath") or "")
+                    file_options[key] = etree.tostring(option, encoding="unicode", with_tail=False)
+        return group_options, file_options
+    
+    def _apply_include_in_build(self, regex_pattern: str, include_in_build: bool) -> Tuple[int, int]:
+        """
+        按正则表达式设置 IncludeInBuild，一次遍历所有组和文件
+        
+        Returns:
+            (修改的组数, 修改的文件数)
+        """
+        pattern = re.compile(regex_pattern)
+        value = "1" if include_in_build else "0"
+        
+        groups_changed = 0
+        files_changed = 0
+        for group_name, group in self._get_index().groups.items():
+            if pattern.search(group_name):
+                groups_changed += self._set_include_in_build_flag(group, group_name, None, value)
+                continue
+            for file_element in group.iterfind("Files/File"):
+                if pattern.search((file_element.findtext("FilePath") or "").replace("\\", "/")):
+                    files_changed += self._set_include_in_build_flag(
+                        file_element, group_name, file_element.findtext("FileName"), value
+                    )
+        return groups_changed, files_changed
+    
+    def _set_include_in_build_flag(self, owner: _Element, group_name: str,
+                                   file_name: Optional[str], value: str) -> bool:
+        """设置单个组或文件的 IncludeInBuild，返回是否有修改"""
+        tag = "GroupOption" if file_name is None else "FileOption"
+        option = owner.find(tag)
+        if option is None:
+            # 没有选项时默认参与编译
+            if value == "1":
+                return False
+            option = etree.Element(tag)
+        else:
+            option = deepcopy(option)
+        
+        common = option.find("CommonProperty")
+        if common is None:
+            common = etree.Element("CommonProperty")
+            for name, text in COMMON_PROPERTY_DEFAULTS:
+                etree.SubElement(common, name).text = text
+            option.insert(0, common)
+        
+        flag = common.find("IncludeInBuild")
+        if flag is None:
+            flag = etree.SubElement(common, "IncludeInBuild")
+        if flag.text == value:
+            return False
+        flag.text = value
+        
+        self._set_option(owner, group_name, file_name, etree.tostring(option, encoding="unicode", with_tail=False))
+        return True
+    
+    def _set_option(self, owner: _Element, group_name: str, file_name: Optional[str], xml: Optional[str]) -> None:
+        """替换组的 GroupOption（file_name 为 None）或文件的 FileOption，xml 为 None 时删除"""
+        tag = "GroupOption" if file_name is None else "FileOption"
+        old = owner.find(tag)
+        old_xml = etree.tostring(old, encoding="unicode", with_tail=False) if old is not None else None
+        if old_xml == xml:
+            return
+        
+        self._record_edit("set_option", group_name, file_name, xml)
+        self._journal.record({"op": "set_option", "group": group_name, "name": file_name, "old": old_xml, "new": xml})
+        self._replace_option_element(owner, tag, xml)
+    
+    @staticmethod
+    def _replace_option_element(owner: _Element, tag: str, xml: Optional[str]) -> None:
+        """替换选项元素：GroupOption 位于 GroupName 之后，FileOption 位于 File 末尾"""
+        old = owner.find(tag)
+        if old is not None:
+            owner.remove(old)
+        if xml is None:
+            return
+        
+        option = etree.fromstring(xml)
+        if tag == "GroupOption":
+            owner.insert(1, option)
+        else:
+            owner.append(option)
+    
+    @staticmethod
+    def _find_file_element(group: _Element, file_name: str) -> Optional[_Element]:
+        """在组中按文件名查找 File 元素"""
+        for file_element in group.iterfind("Files/File"):
+            if file_element.findtext("FileName") == file_name:
+                return file_element
+        return None
+    
+    def _remove_group_element(self, groups: _Element, group: _Element) -> None:
+        """删除 Group 元素并记录到撤销日志"""
+        self._journal.record({
+            "op": "remove_group", "group": group.findtext("GroupName"),
+            "index": groups.index(group), "xml": etree.tostring(group, encoding="unicode")
+        })
+        groups.remove(group)
+    
+    def _delete_groups_by_prefix(self, prefix: str) -> List[str]:
         """删除指定前缀的所有组"""
+        self._record_edit("delete_groups_by_prefix", prefix)
         groups = self.etree_root.xpath(XPATH_GROUPS)[0]
         group_name_elements = self.etree_root.xpath(XPATH_GROUP_NAME)
         
@@ -500,15 +2037,298 @@ class KeilProject:
                 deleted_groups.append(group_element.text)
                 groups_to_remove.append(group_element.getparent())
         
+        # 先取得索引：XML 被替换后需要在删除前重建，才能减少被删头文件的目录引用计数
+        index = self._get_index()
         for group_to_remove in groups_to_remove:
-            groups.remove(group_to_remove)
+            self._remove_group_element(groups, group_to_remove)
+        
+        for name in deleted_groups:
+            index.remove_group(name)
         
         return deleted_groups
     
+    def _delete_groups_by_regex(self, regex_pattern: str) -> List[str]:
+        """删除组名匹配正则表达式的所有组"""
+        self._record_edit("delete_groups_by_regex", regex_pattern)
+        pattern = re.compile(regex_pattern)
+        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
+        index = self._get_index()
+        
+        deleted_groups = []
+        for group_name_element in self.etree_root.xpath(XPATH_GROUP_NAME):
+            if pattern.search(group_name_element.text or ""):
+                deleted_groups.append(group_name_element.text)
+                self._remove_group_element(groups, group_name_element.getparent())
+        
+        for name in deleted_groups:
+            index.remove_group(name)
+        
+        return deleted_groups
+    
+    def _rename_groups(self, old_prefix: str, new_prefix: str) -> Tuple[List[str], List[str]]:
+        """
+        将指定前缀的组改为新前缀，新组名已存在时并入已有的组
+        
+        Returns:
+            (重命名的组名列表, 并入已有组的组名列表)，均为原组名
+        """
+        self._record_edit("rename_groups", old_prefix, new_prefix)
+        index = self._get_index()
+        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
+        
+        renames = {}
+        merged = []
+        for name, group in list(index.groups.items()):
+            if name != old_prefix and not name.startswith(f"{old_prefix}/"):
+                continue
+            new_name = new_prefix + name[len(old_prefix):]
+            target = index.get_group(new_name)
+            if target is None:
+                group.find("GroupName").text = new_name
+                self._journal.record({"op": "rename_group", "old": name, "new": new_name})
+                renames[name] = new_name
+                continue
+            
+            # 目标组已存在：逐个移动文件，组内已有同名文件的保留目标组中的
+            target_files = target.find("Files")
+            if target_files is None:
+                target_files = etree.SubElement(target, "Files")
+            files_element = group.find("Files")
+            for file_element in list(files_element if files_element is not None else []):
+                file_name = file_element.findtext("FileName") or ""
+                if index.has_file_name(new_name, file_name):
+                    continue
+                xml = etree.tostring(file_element, encoding="unicode")
+                self._journal.record({
+                    "op": "remove_file", "group": name, "name": file_name,
+                    "index": files_element.index(file_element), "xml": xml
+                })
+                files_element.remove(file_element)
+                target_files.append(file_element)
+                self._journal.record({"op": "insert_file", "group": new_name, "index": len(target_files) - 1, "xml": xml})
+                index.add_file(new_name, file_name, file_element.findtext("FilePath") or "")
+            self._remove_group_element(groups, group)
+            index.remove_group(name)
+            merged.append(name)
+        
+        index.rename_groups(renames)
+        return list(renames), merged
+    
+    def _record_edit(self, kind: str, *args) -> None:
+        """记录一次对 XML 的修改及当时是否维护头文件路径，供外部修改后重放"""
+        index = self._index
+        tracking = index.track_header_changes if index is not None and index.root is self.etree_root else False
+        self._pending_edits.append((kind, args, tracking))
+    
+    def _replay_edits(self, edits: List[Tuple[str, tuple, bool]]) -> None:
+        """在当前 XML 上重放修改记录"""
+        try:
+            for kind, args, tracking in edits:
+                self._set_header_tracking(tracking)
+                self._replay_edit(kind, args)
+        finally:
+            self._set_header_tracking(False)
+    
+    def _replay_edit(self, kind: str, args: tuple) -> None:
+        """重放单条修改记录"""
+        if kind == "create_group":
+            self._get_or_create_group(*args)
+        elif kind == "add_file":
+            group_name, file_info = args
+            files_element = self._get_or_create_group(group_name).xpath('.//Files')[0]
+            self._add_file_to_group(files_element, file_info)
+        elif kind == "delete_groups_by_prefix":
+            self._delete_groups_by_prefix(*args)
+        elif kind == "delete_groups_by_regex":
+            self._delete_groups_by_regex(*args)
+        elif kind == "rename_groups":
+            self._rename_groups(*args)
+        elif kind == "sweep_stale_entries":
+            self._sweep_stale_entries(True)
+        elif kind == "merge_include_paths":
+            self._merge_include_paths(*args)
+        elif kind == "update_include_refs":
+            self._update_include_refs()
+        elif kind == "remove_include_paths":
+            self._remove_include_paths(*args)
+        elif kind == "set_option":
+            group_name, file_name, xml = args
+            group = self._get_index().get_group(group_name)
+            owner = group if group is None or file_name is None else self._find_file_element(group, file_name)
+            if owner is not None:
+                self._set_option(owner, group_name, file_name, xml)
+        elif kind == "apply_delta":
+            self._apply_delta(*args)
+    
+    def _find_group_element(self, groups: _Element, name: str, index: Optional[int] = None) -> Optional[_Element]:
+        """按组名查找 Group 元素，index 为位置提示（存在同名组时优先）"""
+        children = list(groups.iterchildren("Group"))
+        if index is not None and index < len(children) and children[index].findtext("GroupName") == name:
+            return children[index]
+        for group in children:
+            if group.findtext("GroupName") == name:
+                return group
+        return None
+    
+    def _apply_delta(self, delta: dict) -> None:
+        """直接在 XML 上执行一个撤销日志增量（用于撤销/重做，不更新索引）"""
+        self._record_edit("apply_delta", delta)
+        op = delta["op"]
+        groups = self.etree_root.xpath(XPATH_GROUPS)[0]
+        
+        if op == "set_include_paths":
+            self.etree_root.xpath(XPATH_INCLUDE_PATH)[0].text = delta["new"]
+        elif op == "add_group":
+            group = etree.Element("Group")
+            etree.SubElement(group, "GroupName").text = delta["group"]
+            etree.SubElement(group, "Files")
+            groups.insert(delta["index"], group)
+        elif op == "insert_group":
+            groups.insert(delta["index"], etree.fromstring(delta["xml"]))
+        elif op == "remove_group":
+            group = self._find_group_element(groups, delta["group"], delta.get("index"))
+            if group is not None:
+                groups.remove(group)
+        elif op == "rename_group":
+            group = self._find_group_element(groups, delta["old"])
+            if group is None:
+                raise FileOperationError(f"找不到组: {delta['old']}")
+            group.find("GroupName").text = delta["new"]
+        else:
+            group = self._find_group_element(groups, delta["group"])
+            if group is None:
+                raise FileOperationError(f"找不到组: {delta['group']}")
+            files_element = group.find("Files")
+            if files_element is None:
+                files_element = etree.SubElement(group, "Files")
+            
+            if op == "add_file":
+                files_element.append(self._create_file_element(delta["name"], delta["type"], delta["path"]))
+            elif op == "insert_file":
+                files_element.insert(delta["index"], etree.fromstring(delta["xml"]))
+            elif op == "remove_file":
+                file_element = self._find_file_element(group, delta["name"])
+                if file_element is not None:
+                    files_element.remove(file_element)
+            elif op == "set_option":
+                if delta["name"] is None:
+                    self._replace_option_element(group, "GroupOption", delta["new"])
+                else:
+                    file_element = self._find_file_element(group, delta["name"])
+                    if file_element is not None:
+                        self._replace_option_element(file_element, "FileOption", delta["new"])
+    
+    def _journal_path(self) -> str:
+        """撤销日志文件路径"""
+        return f"{self.project_path}{JOURNAL_FILE_SUFFIX}"
+    
+    def _save_journal(self) -> None:
+        """持久化撤销日志；未开启持久化或存在未保存的修改（日志与文件不一致）时不写入"""
+        if not self.persist_journal or self._fingerprint is None or self._pending_edits:
+            return
+        try:
+            self._journal.save(self._journal_path(), self._fingerprint[2])
+        except OSError as e:
+            self._log_message(f"保存撤销日志失败: {str(e)}")
+    
+    def _on_journal_commit(self) -> None:
+        """操作成功保存后调用：持久化撤销日志并输出变更事件"""
+        self._save_journal()
+        entry = self._journal.undo_stack[-1]
+        self._emit_changes(entry["label"], entry["deltas"], entry["time"], entry.get("duration", 0.0))
+    
+    def _emit_changes(self, operation: str, deltas: List[dict], timestamp: float, duration: float) -> None:
+        """输出变更事件，输出失败不影响操作本身"""
+        if self._change_feed is None:
+            return
+        try:
+            self._change_feed.emit(operation, deltas, timestamp, duration)
+        except OSError as e:
+            self._log_message(f"输出变更事件失败: {str(e)}")
+    
+    def _read_project_file(self) -> Tuple[_Element, Tuple[int, int, str]]:
+        """读取并解析项目文件，同时返回文件指纹"""
+        with open(self.project_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        fingerprint = (stat.st_mtime_ns, stat.st_size, hashlib.sha1(data).hexdigest())
+        return etree.fromstring(data), fingerprint
+    
+    def _is_modified_on_disk(self) -> bool:
+        """检查项目文件自加载/保存后是否被外部修改"""
+        if self._fingerprint is None:
+            return False
+        try:
+            stat = os.stat(self.project_path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == self._fingerprint[:2]:
+            return False
+        
+        # 时间戳变化但内容相同（例如 uVision 原样重写）不算修改
+        with open(self.project_path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest() != self._fingerprint[2]
+    
+    def _sync_options_file(self) -> Optional[_Element]:
+        """
+        按当前项目 XML 更新 .uvoptx 的组和文件条目
+        
+        Returns:
+            更新后的 .uvoptx 根元素，文件不存在时返回 None
+        """
+        options_path = options_file_path(self.project_path)
+        try:
+            stat = os.stat(options_path)
+        except FileNotFoundError:
+            return None
+        if self._options_root is None or (stat.st_mtime_ns, stat.st_size) != self._options_stat:
+            with open(options_path, 'rb') as f:
+                self._options_root = etree.fromstring(f.read())
+            self._options_stat = (stat.st_mtime_ns, stat.st_size)
+        
+        removed, added = sync_option_groups(self._options_root, self.etree_root)
+        if removed or added:
+            self._log_message(f"同步 .uvoptx：删除 {removed} 个失效条目，新建 {added} 个条目")
+        return self._options_root
+    
     def _save_project(self) -> None:
-        """保存项目文件"""
+        """
+        保存项目文件
+        
+        保存前检查项目文件是否被外部（如 uVision）修改：若已修改，重新读取该文件并在其上
+        重放本次未保存的修改，而不是直接覆盖。保存过程持有建议性文件锁，协调多个工具实例。
+        保存本身不修改 IncludePath；启用 .uvoptx 同步时一并写出 .uvoptx。
+        """
         try:
-            tree = etree.ElementTree(self.etree_root)
-            tree.write(self.project_path, encoding='utf-8', xml_declaration=True)
+            with file_lock(self.project_path):
+                if self._is_modified_on_disk():
+                    self._log_message("检测到项目文件已被外部修改，正在合并未保存的修改...")
+                    edits = self._pending_edits
+                    header_seeds = self._index.header_seeds if self._index is not None else {}
+                    self.etree_root, self._fingerprint = self._read_project_file()
+                    self._pending_edits = []
+                    self._journal.discard_unsaved()
+                    # 根目录登记的头文件目录不在修改记录中，先在新的索引上重新登记，
+                    # 由重放的 update_include_refs 与组的修改一并反映到 IncludePath
+                    with self._header_tracking():
+                        for path, folders in header_seeds.items():
+                            self._get_index().seed_header_dirs(path, folders.values())
+                    self._replay_edits(edits)
+                    # 原操作没有因此修改 IncludePath 的变化，重放后同样不处理
+                    self._get_index().take_header_dir_changes()
+                
+                options_root = self._sync_options_file() if self.sync_options else None
+                # 流式写出，不在内存中生成整个文件的副本
+                digest = write_xml_file(self.project_path, self.etree_root)
+                if options_root is not None:
+                    options_path = options_file_path(self.project_path)
+                    write_xml_file(options_path, options_root)
+                    stat = os.stat(options_path)
+                    self._options_stat = (stat.st_mtime_ns, stat.st_size)
+                
+                stat = os.stat(self.project_path)
+                self._fingerprint = (stat.st_mtime_ns, stat.st_size, digest)
+                self._pending_edits = []
+                self._journal.mark_saved()
         except Exception as e:
             raise FileOperationError(f"保存项目文件失败: {str(e)}")
@@ -0,0 +1,215 @@
+"""
+同步清单解析
+
+清单文件（TOML 或 JSON）声明一组 “组名 ↔ 目录” 映射，供 KeilProject.sync 一次性同步；
+生成清单在此基础上声明模板项目和多个变体，供 generate_projects 批量生成项目。
+
+TOML 示例::
+
+    max_workers = 8
+
+    [[groups]]
+    name = "Drivers"
+    path = "../Drivers"
+    max_depth = 3
+    extensions = [".c", ".h"]
+    exclude = ["/test/", "/examples?/"]
+    include_paths = true
+    min_group_files = 5
+    max_groups = 50
+
+生成清单示例::
+
+    template = "base.uvprojx"
+
+    [[variants]]
+    name = "board_a"
+    output = "boards/board_a/board_a.uvprojx"
+
+    [[variants.groups]]
+    name = "SDK"
+    path = "sdk"
+"""
+
+import json
+import os
+import tomllib
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ..constants import (
+    DEFAULT_MAX_DEPTH,
+    MANIFEST_FILE_EXTENSIONS,
+    PROJECT_FILE_EXTENSION,
+    SUPPORTED_SOURCE_EXTENSIONS,
+    SUPPORTED_HEADER_EXTENSIONS
+)
+from ..exceptions import ManifestError
+from ..utils import normalize_path, validate_regex_pattern
+
+
+@dataclass
+class GroupMapping:
+    """单个组与目录的映射"""
+    name: str
+    path: str
+    max_depth: int = DEFAULT_MAX_DEPTH
+    extensions: List[str] = field(
+        default_factory=lambda: SUPPORTED_SOURCE_EXTENSIONS + SUPPORTED_HEADER_EXTENSIONS
+    )
+    exclude: List[str] = field(default_factory=list)
+    include_paths: bool = True
+    min_group_files: int = 0
+    max_groups: int = 0
+    max_group_depth: int = 0
+
+    def scan_key(self) -> tuple:
+        """影响扫描结果的全部参数，参数相同的映射可以共用一次扫描"""
+        return (
+            self.name, self.path, self.max_depth, tuple(self.extensions), tuple(self.exclude),
+            self.include_paths, self.min_group_files, self.max_groups, self.max_group_depth
+        )
+
+
+@dataclass
+class SyncManifest:
+    """同步清单"""
+    path: str
+    groups: List[GroupMapping]
+    max_workers: Optional[int] = None
+
+
+@dataclass
+class ProjectVariant:
+    """由模板生成的单个项目"""
+    name: str
+    output: str
+    groups: List[GroupMapping]
+
+
+@dataclass
+class GenerationSpec:
+    """生成清单"""
+    path: str
+    template: str
+    variants: List[ProjectVariant]
+    max_workers: Optional[int] = None
+
+
+def _parse_group(entry: dict, base_dir: str, index: int) -> GroupMapping:
+    """解析单个组映射"""
+    if not isinstance(entry, dict):
+        raise ManifestError(f"第 {index + 1} 个组映射格式错误")
+
+    name = entry.get("name")
+    path = entry.get("path")
+    if not name or not path:
+        raise ManifestError(f"第 {index + 1} 个组映射缺少 name 或 path")
+
+    mapping = GroupMapping(name=str(name), path=normalize_path(os.path.join(base_dir, path)))
+
+    for key in ("max_depth", "min_group_files", "max_groups", "max_group_depth"):
+        if key in entry:
+            try:
+                setattr(mapping, key, int(entry[key]))
+            except (TypeError, ValueError):
+                raise ManifestError(f"组 '{name}' 的 {key} 必须是整数")
+
+    if "extensions" in entry:
+        mapping.extensions = [ext if ext.startswith(".") else f".{ext}" for ext in entry["extensions"]]
+
+    mapping.exclude = list(entry.get("exclude", []))
+    for pattern in mapping.exclude:
+        if not validate_regex_pattern(pattern):
+            raise ManifestError(f"组 '{name}' 的过滤表达式无效: {pattern}")
+
+    mapping.include_paths = bool(entry.get("include_paths", True))
+    return mapping
+
+
+def _read_manifest_file(manifest_path: str) -> dict:
+    """读取 TOML 或 JSON 清单文件"""
+    suffix = os.path.splitext(manifest_path)[1].lower()
+    if suffix not in MANIFEST_FILE_EXTENSIONS:
+        raise ManifestError(f"不支持的清单格式: {manifest_path}")
+
+    try:
+        with open(manifest_path, "rb") as f:
+            data = tomllib.load(f) if suffix == ".toml" else json.load(f)
+    except FileNotFoundError:
+        raise ManifestError(f"清单文件不存在: {manifest_path}")
+    except (tomllib.TOMLDecodeError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ManifestError(f"清单文件解析失败: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise ManifestError("清单文件格式错误")
+    return data
+
+
+def load_manifest(manifest_path: str) -> SyncManifest:
+    """
+    读取同步清单
+
+    Args:
+        manifest_path: 清单文件路径（.toml 或 .json），清单中的相对路径以清单所在目录为基准
+
+    Returns:
+        解析后的同步清单
+    """
+    data = _read_manifest_file(manifest_path)
+    entries = data.get("groups")
+    if not entries:
+        raise ManifestError("清单中没有定义任何组映射")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    groups = [_parse_group(entry, base_dir, i) for i, entry in enumerate(entries)]
+
+    max_workers = data.get("max_workers")
+    return SyncManifest(
+        path=normalize_path(manifest_path),
+        groups=groups,
+        max_workers=int(max_workers) if max_workers else None
+    )
+
+
+def load_generation_spec(spec_path: str) -> GenerationSpec:
+    """
+    读取生成清单
+
+    Args:
+        spec_path: 清单文件路径（.toml 或 .json），清单中的相对路径以清单所在目录为基准
+
+    Returns:
+        解析后的生成清单
+    """
+    data = _read_manifest_file(spec_path)
+    base_dir = os.path.dirname(os.path.abspath(spec_path))
+
+    template = data.get("template")
+    if not template:
+        raise ManifestError("生成清单缺少 template")
+
+    entries = data.get("variants")
+    if not entries:
+        raise ManifestError("生成清单中没有定义任何变体")
+
+    variants = []
+    outputs = set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("name"):
+            raise ManifestError(f"第 {i + 1} 个变体缺少 name")
+        name = str(entry["name"])
+        output = normalize_path(os.path.join(base_dir, entry.get("output") or f"{name}{PROJECT_FILE_EXTENSION}"))
+        if output in outputs:
+            raise ManifestError(f"变体 '{name}' 的输出文件与其他变体重复: {output}")
+        outputs.add(output)
+        groups = [_parse_group(group, base_dir, j) for j, group in enumerate(entry.get("groups", []))]
+        variants.append(ProjectVariant(name=name, output=output, groups=groups))
+
+    max_workers = data.get("max_workers")
+    return GenerationSpec(
+        path=normalize_path(spec_path),
+        template=normalize_path(os.path.join(base_dir, template)),
+        variants=variants,
+        max_workers=int(max_workers) if max_workers else None
+    )
@@ -0,0 +1,98 @@
+"""
+最近项目缓存
+
+GUI 在多个项目之间切换时，把已解析的 XML 树、反向索引、撤销日志和尚未使用的预扫描结果按 LRU 缓存，
+切回最近用过的项目时无需重新解析，也无需重新扫描目录。项目文件的修改时间或大小变化后缓存失效；
+预扫描结果在使用时另外按目录树元数据重新校验。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from lxml.etree import _Element
+
+from ..constants import (
+    PROJECT_CACHE_SIZE, PROJECT_CACHE_MAX_MEMORY, PROJECT_CACHE_TREE_FACTOR, PROJECT_CACHE_SCAN_FILE_SIZE
+)
+from .journal import Journal
+from .project_index import ProjectIndex
+
+
+@dataclass
+class CachedProject:
+    """一个已解析项目的状态"""
+    project_path: str
+    etree_root: _Element
+    # 解析时的项目文件指纹 (mtime_ns, size, sha1)
+    fingerprint: Tuple[int, int, str]
+    index: Optional[ProjectIndex]
+    journal: Journal
+    # 尚未使用的预扫描，键为扫描参数，结果为 (扫描结果, 目录树元数据指纹)
+    scans: Dict[tuple, Future] = field(default_factory=dict)
+
+    @property
+    def memory(self) -> int:
+        """估算的内存占用（字节），仍在扫描的结果不计入"""
+        scanned_files = 0
+        for future in self.scans.values():
+            if future.done() and future.exception() is None:
+                scanned_files += sum(len(files) for _, files in future.result()[0])
+        return self.fingerprint[1] * PROJECT_CACHE_TREE_FACTOR + scanned_files * PROJECT_CACHE_SCAN_FILE_SIZE
+
+
+def _cache_key(project_path: str) -> str:
+    """缓存键：绝对路径，按平台规则处理大小写"""
+    return os.path.normcase(os.path.abspath(project_path))
+
+
+class ProjectCache:
+    """按最近使用顺序淘汰的项目缓存"""
+
+    def __init__(self, max_entries: int = PROJECT_CACHE_SIZE, max_memory: int = PROJECT_CACHE_MAX_MEMORY):
+        """
+        Args:
+            max_entries: 最多缓存的项目数
+            max_memory: 估算内存占用的上限（字节），超出时淘汰最久未用的项目
+        """
+        self.max_entries = max_entries
+        self.max_memory = max_memory
+        self._entries: "OrderedDict[str, CachedProject]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, entry: CachedProject) -> None:
+        """缓存项目状态，并标记为最近使用"""
+        key = _cache_key(entry.project_path)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or (
+                    len(self._entries) > 1 and sum(e.memory for e in self._entries.values()) > self.max_memory):
+                self._entries.popitem(last=False)
+
+    def take(self, project_path: str) -> Optional[CachedProject]:
+        """
+        取出项目的缓存状态（取出后不再留在缓存中，切换走时重新放入）
+
+        Returns:
+            缓存状态，未缓存或项目文件的修改时间/大小已变化时返回 None
+        """
+        with self._lock:
+            entry = self._entries.pop(_cache_key(project_path), None)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(project_path)
+        except OSError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != entry.fingerprint[:2]:
+            return None
+        return entry
+
+    def recent_projects(self) -> List[str]:
+        """缓存中的项目路径，最近使用的在前"""
+        with self._lock:
+            return [entry.project_path for entry in reversed(self._entries.values())]
@@ -0,0 +1,306 @@
+"""
+项目反向索引
+
+加载项目时遍历一次 XML，建立 组名 → Group 元素、文件路径 → 所属组、
+目标文件名 → 源文件 的索引，之后随每次修改增量更新，查询时无需再执行 XPath。
+
+同时为每个头文件目录维护引用计数（项目中位于该目录的头文件数），计数在 0 与正数之间变化的目录
+即需要加入或移出 IncludePath 的目录，维护头文件路径时无需重新遍历目录树。
+只有子目录成为组时，父目录中的头文件不在任何组中，这类目录由扫描根目录登记（seed_header_dirs）后同样计入引用计数。
+
+Keil 把所有目标文件输出到同一个 Objects 目录，且只以源文件名（不含扩展名、
+不区分大小写）命名，不同目录下的同名源文件会互相覆盖 .o 文件。
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml.etree import _Element
+
+from ..constants import XPATH_GROUPS, OBJECT_SOURCE_EXTENSIONS, SUPPORTED_HEADER_EXTENSIONS
+
+
+def _normalize_key(path: str) -> str:
+    """索引中使用的路径形式：绝对路径、正斜杠、按平台规则处理大小写"""
+    return os.path.normcase(os.path.normpath(path)).replace("\\", "/")
+
+
+def object_name(file_name: str) -> Optional[str]:
+    """源文件编译后的目标文件名（小写，不含扩展名），头文件等不生成目标文件时返回 None"""
+    stem, ext = os.path.splitext(file_name)
+    if ext.lower() not in OBJECT_SOURCE_EXTENSIONS:
+        return None
+    return stem.lower()
+
+
+class ProjectIndex:
+    """项目中组与文件的反向索引"""
+
+    def __init__(self, root: _Element, project_path: str):
+        """
+        遍历 XML 建立索引
+
+        Args:
+            root: 项目 XML 根元素
+            project_path: 项目文件路径，FilePath 相对于它所在的目录
+        """
+        self.root = root
+        self.project_dir = os.path.dirname(os.path.abspath(project_path))
+
+        self.groups: Dict[str, _Element] = {}
+        self.group_files: Dict[str, Dict[str, str]] = {}
+        self.file_groups: Dict[str, List[str]] = {}
+        # 目标文件名 → {源文件索引键: 包含该文件的组名列表}
+        self.objects: Dict[str, Dict[str, List[str]]] = {}
+        # 头文件目录索引键 → 引用计数、目录的绝对路径
+        self.header_dirs: Dict[str, int] = {}
+        self._header_dir_paths: Dict[str, str] = {}
+        # 上次取出变化以来计数发生变化的头文件目录 → 变化前的计数
+        self._header_dir_changes: Dict[str, int] = {}
+        # 扫描根目录 → {登记的头文件目录索引键: 目录的绝对路径}
+        self.header_seeds: Dict[str, Dict[str, str]] = {}
+        # 为 False 时只维护计数，不记录变化（对应的目录不会自动加入或移出 IncludePath）；
+        # 只有扫描驱动的修改期间才开启
+        self.track_header_changes = False
+
+        for groups_element in root.xpath(XPATH_GROUPS):
+            for group in groups_element.iterchildren("Group"):
+                name = group.findtext("GroupName") or ""
+                self.add_group(name, group)
+                for file_element in group.iterfind("Files/File"):
+                    self.add_file(name, file_element.findtext("FileName") or "",
+                                  file_element.findtext("FilePath") or "")
+
+    def resolve(self, file_path: str) -> str:
+        """将项目中的 FilePath（相对项目目录）转换为索引键"""
+        return _normalize_key(os.path.join(self.project_dir, file_path.replace("\\", "/")))
+
+    @staticmethod
+    def key_for(path: str) -> str:
+        """将绝对路径或相对于当前目录的路径转换为索引键"""
+        return _normalize_key(os.path.abspath(path))
+
+    def add_group(self, name: str, group: _Element) -> None:
+        """登记组，同名组只保留第一个"""
+        if name not in self.groups:
+            self.groups[name] = group
+            self.group_files[name] = {}
+
+    def remove_group(self, name: str) -> None:
+        """移除组及其全部文件"""
+        self.groups.pop(name, None)
+        for file_name, key in self.group_files.pop(name, {}).items():
+            self._unref_header(file_name, key)
+            owners = self.file_groups.get(key)
+            if owners and name in owners:
+                owners.remove(name)
+                if not owners:
+                    del self.file_groups[key]
+            
+            obj = object_name(file_name)
+            sources = self.objects.get(obj) if obj else None
+            if sources and name in sources.get(key, []):
+                sources[key].remove(name)
+                if not sources[key]:
+                    del sources[key]
+                if not sources:
+                    del self.objects[obj]
+
+    def rename_groups(self, renames: Dict[str, str]) -> None:
+        """
+        批量重命名组，组的顺序保持不变
+
+        Args:
+            renames: 原组名 → 新组名，新组名不能与现有组重名
+        """
+        self.groups = {renames.get(name, name): group for name, group in self.groups.items()}
+        for old_name, new_name in renames.items():
+            files = self.group_files.pop(old_name, {})
+            self.group_files[new_name] = files
+            for file_name, key in files.items():
+                owners = self.file_groups.get(key, [])
+                if old_name in owners:
+                    owners[owners.index(old_name)] = new_name
+                obj = object_name(file_name)
+                object_owners = self.objects.get(obj, {}).get(key, []) if obj else []
+                if old_name in object_owners:
+                    object_owners[object_owners.index(old_name)] = new_name
+
+    def add_file(self, group_name: str, file_name: str, file_path: str) -> None:
+        """登记组中的文件"""
+        key = self.resolve(file_path)
+        files = self.group_files.setdefault(group_name, {})
+        if file_name in files:
+            return
+        files[file_name] = key
+        if os.path.splitext(file_name)[1].lower() in SUPPORTED_HEADER_EXTENSIONS and "$" not in file_path:
+            dir_key = os.path.dirname(key)
+            count = self.header_dirs.get(dir_key, 0)
+            if count == 0:
+                self._header_dir_paths[dir_key] = os.path.dirname(
+                    os.path.normpath(os.path.join(self.project_dir, file_path.replace("\\", "/")))
+                )
+            self._change_header_dir(dir_key, count, count + 1)
+        owners = self.file_groups.setdefault(key, [])
+        if group_name not in owners:
+            owners.append(group_name)
+        
+        obj = object_name(file_name)
+        if obj:
+            object_owners = self.objects.setdefault(obj, {}).setdefault(key, [])
+            if group_name not in object_owners:
+                object_owners.append(group_name)
+
+    def remove_file(self, group_name: str, file_name: str) -> None:
+        """移除组中的文件"""
+        key = self.group_files.get(group_name, {}).pop(file_name, None)
+        if key is None:
+            return
+        self._unref_header(file_name, key)
+        owners = self.file_groups.get(key)
+        if owners and group_name in owners:
+            owners.remove(group_name)
+            if not owners:
+                del self.file_groups[key]
+
+        obj = object_name(file_name)
+        sources = self.objects.get(obj) if obj else None
+        if sources and group_name in sources.get(key, []):
+            sources[key].remove(group_name)
+            if not sources[key]:
+                del sources[key]
+            if not sources:
+                del self.objects[obj]
+
+    def _unref_header(self, file_name: str, key: str) -> None:
+        """移除头文件时减少所在目录的引用计数"""
+        if os.path.splitext(file_name)[1].lower() not in SUPPORTED_HEADER_EXTENSIONS:
+            return
+        dir_key = os.path.dirname(key)
+        count = self.header_dirs.get(dir_key, 0)
+        if count:
+            self._change_header_dir(dir_key, count, count - 1)
+
+    def seed_header_dirs(self, owner: str, folders: Iterable[str]) -> bool:
+        """
+        以扫描根目录的名义登记磁盘上含头文件的目录，替换该根目录之前登记的目录
+
+        Args:
+            owner: 扫描根目录
+            folders: 根目录下含头文件的目录的绝对路径
+
+        Returns:
+            登记的目录是否有变化
+        """
+        new_seeds = {self.key_for(folder): folder for folder in folders}
+        old_seeds = self.header_seeds.get(owner, {})
+        if new_seeds.keys() == old_seeds.keys():
+            return False
+
+        for dir_key in old_seeds.keys() - new_seeds.keys():
+            count = self.header_dirs.get(dir_key, 0)
+            if count:
+                self._change_header_dir(dir_key, count, count - 1)
+        for dir_key in new_seeds.keys() - old_seeds.keys():
+            count = self.header_dirs.get(dir_key, 0)
+            if count == 0:
+                self._header_dir_paths[dir_key] = new_seeds[dir_key]
+            self._change_header_dir(dir_key, count, count + 1)
+        if new_seeds:
+            self.header_seeds[owner] = new_seeds
+        else:
+            self.header_seeds.pop(owner, None)
+        return True
+
+    def _change_header_dir(self, dir_key: str, old_count: int, new_count: int) -> None:
+        """修改头文件目录的引用计数并记录变化"""
+        if new_count:
+            self.header_dirs[dir_key] = new_count
+        else:
+            del self.header_dirs[dir_key]
+        if self.track_header_changes:
+            self._header_dir_changes.setdefault(dir_key, old_count)
+
+    def take_header_dir_changes(self) -> Tuple[List[str], List[str]]:
+        """
+        取出自上次调用以来的头文件目录变化，耗时只与变化的目录数有关
+
+        Returns:
+            (新出现头文件的目录绝对路径列表, 不再有头文件的目录索引键列表)
+        """
+        appeared, disappeared = [], []
+        for dir_key, old_count in self._header_dir_changes.items():
+            new_count = self.header_dirs.get(dir_key, 0)
+            if not old_count and new_count:
+                appeared.append(self._header_dir_paths[dir_key])
+            elif old_count and not new_count:
+                disappeared.append(dir_key)
+        self._header_dir_changes.clear()
+        return sorted(appeared), disappeared
+
+    def has_file_name(self, group_name: str, file_name: str) -> bool:
+        """组内是否已有同名文件"""
+        return file_name in self.group_files.get(group_name, {})
+
+    def get_group(self, name: str) -> Optional[_Element]:
+        """按组名查找 Group 元素"""
+        return self.groups.get(name)
+
+    def groups_of(self, path: str) -> List[str]:
+        """
+        查询包含指定文件的组
+
+        Args:
+            path: 文件的绝对路径或相对于当前目录的路径
+
+        Returns:
+            组名列表，文件不在任何组中时为空
+        """
+        return list(self.file_groups.get(self.key_for(path), []))
+
+    def files_of(self, group_name: str) -> List[str]:
+        """组中所有文件的绝对路径"""
+        return list(self.group_files.get(group_name, {}).values())
+
+    def group_names(self) -> List[str]:
+        """所有组名，按项目中的顺序"""
+        return list(self.groups)
+
+    def object_collisions(self, group_names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        查询目标文件名冲突：不同路径的源文件编译后得到同名的 .o 文件
+
+        Args:
+            group_names: 只检查涉及这些组的冲突，None 表示检查整个项目
+
+        Returns:
+            目标文件名 → {源文件路径: 组名列表}，只包含冲突项
+        """
+        if group_names is None:
+            candidates = self.objects.keys()
+        else:
+            candidates = {object_name(file_name)
+                          for group_name in group_names
+                          for file_name in self.group_files.get(group_name, {})}
+            candidates.discard(None)
+        return {obj: {key: list(owners) for key, owners in self.objects[obj].items()}
+                for obj in candidates if len(self.objects.get(obj, {})) > 1}
+
+    def duplicate_files(self, group_names: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        查询被加入多个组的同一源文件（会被重复编译，头文件不计）
+
+        Args:
+            group_names: 只检查涉及这些组的文件，None 表示检查整个项目
+
+        Returns:
+            源文件路径 → 组名列表，只包含出现在多个组中的文件
+        """
+        if group_names is None:
+            candidates = {key for sources in self.objects.values() for key in sources}
+        else:
+            candidates = {key for group_name in group_names
+                          for file_name, key in self.group_files.get(group_name, {}).items()
+                          if object_name(file_name)}
+        return {key: list(self.file_groups[key]) for key in candidates
+                if len(self.file_groups.get(key, [])) > 1}
@@ -0,0 +1,59 @@
+"""
+操作结果定义
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class OperationResult:
+    """一次项目操作的结构化结果"""
+    operation: str
+    groups_created: List[str] = field(default_factory=list)
+    groups_removed: List[str] = field(default_factory=list)
+    files_added: int = 0
+    include_paths_added: List[str] = field(default_factory=list)
+    include_paths_removed: List[str] = field(default_factory=list)
+    scan_time: float = 0.0
+    apply_time: float = 0.0
+    total_time: float = 0.0
+    # 操作失败时的异常
+    error: Optional[Exception] = None
+
+    @property
+    def changed(self) -> bool:
+        """是否修改了项目"""
+        return bool(self.groups_created or self.groups_removed or self.files_added
+                    or self.include_paths_added or self.include_paths_removed)
+
+
+@dataclass
+class GroupScan:
+    """
+    KeilProject.scan_group 的扫描结果，交给 refresh_group/clean_rebuild_group 使用；
+    KeilProject.scan_mapping 的扫描结果，交给 apply_mapping 使用
+    """
+    # scan_group: (组名, 路径, 搜索深度, 是否按深度排序, min_group_files, max_groups, max_group_depth)
+    # scan_mapping: GroupMapping.scan_key()
+    scan_args: tuple
+    groups: List[Tuple[str, List[dict]]]
+    # 扫描根目录下所有含头文件的目录（不维护头文件路径的映射为空列表）
+    header_dirs: List[str]
+    scan_time: float = 0.0
+
+
+@dataclass
+class RefreshPreview:
+    """刷新文件组前的变更预览，不修改项目"""
+    group_name: str
+    groups_added: List[str] = field(default_factory=list)
+    groups_removed: List[str] = field(default_factory=list)
+    files_added: Dict[str, List[str]] = field(default_factory=dict)
+    files_removed: Dict[str, List[str]] = field(default_factory=dict)
+    scan_time: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """刷新是否会修改项目"""
+        return bool(self.groups_added or self.groups_removed or self.files_added or self.files_removed)
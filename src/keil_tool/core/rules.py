@@ -0,0 +1,159 @@
+"""
+按规则分组
+
+规则文件（TOML 或 JSON）按路径前缀、glob 或正则表达式把文件归入按职能命名的组，
+而不是按目录结构生成组名。所有规则编译成一个正则表达式，每个文件只匹配一次即可分类。
+
+TOML 示例::
+
+    default_group = "Other"        # 可选，不匹配任何规则的文件放入该组，未设置时忽略
+    extensions = [".c", ".h", ".s"]
+    exclude = ["/test/"]
+    include_paths = true
+
+    [[rules]]
+    group = "Startup"
+    regex = "startup_\\w+\\.s$"
+    priority = 10
+
+    [[rules]]
+    group = "HAL"
+    glob = "Drivers/*HAL*/*"
+
+    [[rules]]
+    group = "App/Tasks"
+    path = "App/Tasks"
+
+路径均为相对于扫描根目录、以 “/” 分隔的文件路径。path 匹配该目录下的所有文件，
+glob 中的 * 可以跨越目录，regex 在路径中任意位置搜索。多条规则同时匹配时取 priority
+最大的，priority 相同时取先定义的。
+"""
+
+import fnmatch
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ..constants import SUPPORTED_SOURCE_EXTENSIONS, SUPPORTED_HEADER_EXTENSIONS
+from ..exceptions import ManifestError
+from ..utils import normalize_path, validate_regex_pattern
+from .manifest import _read_manifest_file
+
+RULE_KINDS = ("path", "glob", "regex")
+
+
+@dataclass
+class GroupRule:
+    """单条分组规则"""
+    group: str
+    kind: str
+    pattern: str
+    priority: int = 0
+
+    def to_regex(self) -> str:
+        """规则对应的正则表达式，用于匹配完整的相对路径"""
+        if self.kind == "path":
+            prefix = self.pattern.replace("\\", "/").strip("/")
+            return f"{re.escape(prefix)}/.*" if prefix else ".*"
+        if self.kind == "glob":
+            # fnmatch.translate 生成 (?s:...)\Z，可以直接嵌入
+            return fnmatch.translate(self.pattern.replace("\\", "/"))
+        return f".*?(?:{self.pattern}).*"
+
+
+@dataclass
+class RuleSet:
+    """规则文件"""
+    path: str
+    rules: List[GroupRule]
+    default_group: Optional[str] = None
+    extensions: List[str] = field(
+        default_factory=lambda: SUPPORTED_SOURCE_EXTENSIONS + SUPPORTED_HEADER_EXTENSIONS
+    )
+    exclude: List[str] = field(default_factory=list)
+    include_paths: bool = True
+
+    @property
+    def group_names(self) -> List[str]:
+        """规则涉及的所有组名，按首次出现的顺序"""
+        names = [rule.group for rule in self.rules]
+        if self.default_group:
+            names.append(self.default_group)
+        return list(dict.fromkeys(names))
+
+
+class RuleMatcher:
+    """把所有规则编译成一个正则表达式的分类器"""
+
+    def __init__(self, rule_set: RuleSet):
+        # 按优先级排序后拼成一个分支表达式，fullmatch 命中的第一个分支即优先级最高的规则
+        ordered = sorted(rule_set.rules, key=lambda rule: -rule.priority)
+        self._groups = [rule.group for rule in ordered]
+        self.default_group = rule_set.default_group
+        self._pattern = re.compile(
+            "|".join(f"(?P<_rule{i}>{rule.to_regex()})" for i, rule in enumerate(ordered)),
+            re.DOTALL
+        ) if ordered else None
+
+    def classify(self, relative_path: str) -> Optional[str]:
+        """
+        返回文件所属的组
+
+        Args:
+            relative_path: 相对于扫描根目录的文件路径
+
+        Returns:
+            组名，不匹配任何规则且没有默认组时返回 None
+        """
+        match = self._pattern.fullmatch(relative_path.replace("\\", "/")) if self._pattern else None
+        if match is None:
+            return self.default_group
+        return self._groups[int(match.lastgroup[len("_rule"):])]
+
+
+def load_rules(rules_path: str) -> RuleSet:
+    """
+    读取规则文件
+
+    Args:
+        rules_path: 规则文件路径（.toml 或 .json）
+
+    Returns:
+        解析后的规则
+    """
+    data = _read_manifest_file(rules_path)
+    entries = data.get("rules")
+    if not entries:
+        raise ManifestError("规则文件中没有定义任何规则")
+
+    rules = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("group"):
+            raise ManifestError(f"第 {i + 1} 条规则缺少 group")
+        kinds = [kind for kind in RULE_KINDS if kind in entry]
+        if len(kinds) != 1:
+            raise ManifestError(f"第 {i + 1} 条规则必须且只能指定 path、glob、regex 之一")
+        kind = kinds[0]
+        pattern = str(entry[kind])
+        if kind == "regex" and not validate_regex_pattern(pattern):
+            raise ManifestError(f"第 {i + 1} 条规则的正则表达式无效: {pattern}")
+        try:
+            priority = int(entry.get("priority", 0))
+        except (TypeError, ValueError):
+            raise ManifestError(f"第 {i + 1} 条规则的 priority 必须是整数")
+        rules.append(GroupRule(group=str(entry["group"]).strip("/"), kind=kind, pattern=pattern, priority=priority))
+
+    rule_set = RuleSet(path=normalize_path(rules_path), rules=rules, default_group=data.get("default_group") or None)
+    if "extensions" in data:
+        rule_set.extensions = [ext if ext.startswith(".") else f".{ext}" for ext in data["extensions"]]
+    rule_set.exclude = list(data.get("exclude", []))
+    for pattern in rule_set.exclude:
+        if not validate_regex_pattern(pattern):
+            raise ManifestError(f"过滤表达式无效: {pattern}")
+    rule_set.include_paths = bool(data.get("include_paths", True))
+
+    try:
+        RuleMatcher(rule_set)
+    except re.error as e:
+        raise ManifestError(f"规则无法组合成一个表达式: {str(e)}")
+    return rule_set
@@ -0,0 +1,38 @@
+"""
+项目旁的工具状态文件
+
+保存无法写进 .uvprojx 的信息（例如各组的内容指纹），文件名为 <项目文件>.keiltool.json。
+"""
+
+import json
+import os
+
+from ..constants import STATE_FILE_SUFFIX
+from ..exceptions import FileOperationError
+
+
+def state_file_path(project_path: str) -> str:
+    """状态文件路径"""
+    return f"{project_path}{STATE_FILE_SUFFIX}"
+
+
+def load_state(project_path: str) -> dict:
+    """读取状态文件，不存在或损坏时返回空状态"""
+    try:
+        with open(state_file_path(project_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(project_path: str, state: dict) -> None:
+    """写入状态文件"""
+    path = state_file_path(project_path)
+    try:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, path)
+    except OSError as e:
+        raise FileOperationError(f"保存状态文件失败: {str(e)}")
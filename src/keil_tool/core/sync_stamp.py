@@ -0,0 +1,179 @@
+"""
+同步戳文件
+
+构建前钩子每次都执行 sync，但绝大多数时候什么都没有变化。sync 成功后在项目文件旁写入
+<项目文件>.sync.stamp，记录项目文件的 (mtime_ns, size)、工具配置与清单内容的指纹、
+清单中的扫描根目录，以及各目录树的目录元数据（目录的增删改名都会改变所在目录的 mtime）。
+
+下次 sync 前按代价从低到高逐项比较，全部一致时直接跳过：不解析项目、不扫描文件、
+不写回项目文件。清单内容未变化时扫描根目录直接取自戳文件，不需要解析清单。
+本模块不依赖 lxml，只导入很少的标准库模块，可以在导入 KeilProject 之前调用。
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from ..constants import (
+    APP_VERSION,
+    SYNC_STAMP_SUFFIX,
+    DEFAULT_FOLLOW_SYMLINKS,
+    DEFAULT_SCAN_BACKEND
+)
+from ..exceptions import FileOperationError, KeilToolError
+from ..utils.git_index import find_git_repository
+
+
+def stamp_file_path(project_path: str) -> str:
+    """同步戳文件路径"""
+    return f"{project_path}{SYNC_STAMP_SUFFIX}"
+
+
+def stamp_config(follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS, scan_backend: str = DEFAULT_SCAN_BACKEND,
+                 sync_options: bool = False) -> dict:
+    """影响 sync 结果的工具配置，默认值与 KeilProject 一致"""
+    return {
+        "version": APP_VERSION,
+        "follow_symlinks": follow_symlinks,
+        "scan_backend": scan_backend,
+        "sync_options": sync_options
+    }
+
+
+def _hash_manifest(manifest_path: str) -> str:
+    """清单文件内容的指纹"""
+    with open(manifest_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _project_stat(project_path: str) -> List[int]:
+    """项目文件的 [mtime_ns, size]"""
+    stat = os.stat(project_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def tree_digest(roots: Iterable[str], follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                scan_backend: str = DEFAULT_SCAN_BACKEND) -> str:
+    """
+    目录树元数据的指纹：只读取目录（不读取文件），记录每个目录的路径和 mtime
+
+    git 后端按 .git/index 列出文件，同时记录各工作区 index 文件的 mtime。
+
+    Args:
+        roots: 清单中的扫描根目录
+        follow_symlinks: 是否跟随目录符号链接
+        scan_backend: 文件枚举后端
+
+    Returns:
+        十六进制指纹
+    """
+    entries: List[Tuple[str, int]] = []
+    visited = set()
+    for root in sorted(set(roots)):
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                stat = os.stat(path)
+            except OSError:
+                entries.append((path, -1))
+                continue
+            identity = (stat.st_dev, stat.st_ino)
+            if identity in visited:
+                continue
+            visited.add(identity)
+            entries.append((path, stat.st_mtime_ns))
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+        if scan_backend != "disk":
+            repository = find_git_repository(root)
+            if repository is not None:
+                index_path = os.path.join(repository[1], "index")
+                try:
+                    entries.append((index_path, os.stat(index_path).st_mtime_ns))
+                except OSError:
+                    entries.append((index_path, -1))
+
+    digest = hashlib.sha1()
+    for path, mtime in sorted(entries):
+        digest.update(f"{path}\0{mtime}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def is_sync_up_to_date(project_path: str, manifest_path: str, config: Optional[dict] = None) -> bool:
+    """
+    检查自上次 sync 以来项目文件、配置、清单和清单中的目录树是否都没有变化
+
+    Args:
+        project_path: 项目文件路径
+        manifest_path: 清单文件路径
+        config: stamp_config 的返回值，None 表示默认配置
+
+    Returns:
+        全部未变化时返回 True；戳文件不存在、损坏或任一项变化时返回 False
+    """
+    config = config or stamp_config()
+    try:
+        with open(stamp_file_path(project_path), "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+        if not isinstance(stamp, dict):
+            return False
+        if stamp.get("project") != _project_stat(project_path):
+            return False
+        if stamp.get("config") != config:
+            return False
+        if stamp.get("manifest_path") != os.path.abspath(manifest_path):
+            return False
+        if stamp.get("manifest") != _hash_manifest(manifest_path):
+            return False
+        # 清单内容未变化，扫描根目录与上次相同
+        roots = stamp.get("roots")
+        if not isinstance(roots, list):
+            return False
+        return stamp.get("tree") == tree_digest(roots, config["follow_symlinks"], config["scan_backend"])
+    except (OSError, ValueError, KeilToolError):
+        return False
+
+
+def write_sync_stamp(project_path: str, manifest_path: str, config: dict, roots: List[str], digest: str) -> None:
+    """
+    sync 完成后写入同步戳
+
+    Args:
+        project_path: 项目文件路径，在保存之后读取其 mtime 和大小
+        manifest_path: 清单文件路径
+        config: stamp_config 的返回值
+        roots: 清单中的扫描根目录
+        digest: 扫描开始前计算的 tree_digest，扫描期间发生的变化会使下次检查失败而不是被漏掉
+    """
+    path = stamp_file_path(project_path)
+    stamp = {
+        "project": _project_stat(project_path),
+        "config": config,
+        "manifest_path": os.path.abspath(manifest_path),
+        "manifest": _hash_manifest(manifest_path),
+        "roots": roots,
+        "tree": digest
+    }
+    data = json.dumps(stamp, sort_keys=True)
+    try:
+        # 内容相同时不重写，避免无变化的同步改动项目目录
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == data:
+                    return
+        except OSError:
+            pass
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError as e:
+        raise FileOperationError(f"保存同步戳失败: {str(e)}")
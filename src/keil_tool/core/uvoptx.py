@@ -0,0 +1,136 @@
+"""
+项目选项文件（.uvoptx）同步
+
+uVision 在项目文件旁的 .uvoptx 中为每个组和文件保存界面状态（展开状态、编号等），
+组和文件与 .uvprojx 不一致时，uVision 打开项目需要逐项核对，条目也会越积越多。
+这里直接按内存中已修改的项目 XML 重建 .uvoptx 的组和文件条目，不再扫描目录：
+仍存在的组和文件沿用原有的界面状态，已不存在的条目被删除，新条目使用默认值。
+RTE 组（如 ::CMSIS）在项目文件中只有组名，其文件由 uVision 按 RTE 配置生成，.uvoptx 中的条目原样保留。
+"""
+
+import os
+from typing import Dict, Tuple
+
+from lxml import etree
+from lxml.etree import _Element
+
+from ..constants import OPTIONS_FILE_EXTENSION, XPATH_GROUPS
+
+# 新建组、文件条目的默认子元素（按 uVision 写出的顺序）
+GROUP_DEFAULTS = [("tvExp", "0"), ("tvExpOptDlg", "0"), ("cbSel", "0"), ("RteFlg", "0")]
+FILE_DEFAULTS = [("tvExp", "0"), ("tvExpOptDlg", "0"), ("bDave2", "0")]
+FILE_TRAILING_DEFAULTS = [("RteFlg", "0"), ("bShared", "0")]
+
+# RTE 组（如 ::CMSIS）由 uVision 管理，项目文件中只记录组名
+RTE_GROUP_PREFIX = "::"
+
+
+def options_file_path(project_path: str) -> str:
+    """项目文件对应的 .uvoptx 路径"""
+    return os.path.splitext(project_path)[0] + OPTIONS_FILE_EXTENSION
+
+
+def _path_key(file_path: str) -> str:
+    """比较文件路径时使用的形式"""
+    return os.path.normcase(file_path.replace("/", "\\"))
+
+
+def _create_file_entry(file_type: str, file_path: str, file_name: str) -> _Element:
+    """按默认值创建 .uvoptx 中的 File 元素"""
+    entry = etree.Element("File")
+    etree.SubElement(entry, "GroupNumber")
+    etree.SubElement(entry, "FileNumber")
+    etree.SubElement(entry, "FileType").text = file_type
+    for tag, value in FILE_DEFAULTS:
+        etree.SubElement(entry, tag).text = value
+    etree.SubElement(entry, "PathWithFileName").text = file_path
+    etree.SubElement(entry, "FilenameWithoutPath").text = file_name
+    for tag, value in FILE_TRAILING_DEFAULTS:
+        etree.SubElement(entry, tag).text = value
+    return entry
+
+
+def _set_child_text(element: _Element, tag: str, text: str) -> None:
+    """设置子元素文本，子元素不存在时创建"""
+    child = element.find(tag)
+    if child is None:
+        child = etree.SubElement(element, tag)
+    child.text = text
+
+
+def sync_option_groups(options_root: _Element, project_root: _Element) -> Tuple[int, int]:
+    """
+    按项目 XML 重建 .uvoptx 中的组和文件条目
+
+    Args:
+        options_root: .uvoptx 的根元素（ProjectOpt），原地修改
+        project_root: 项目 XML 根元素
+
+    Returns:
+        (删除的失效条目数, 新建的条目数)，组和文件都计入
+    """
+    old_groups: Dict[str, _Element] = {}
+    old_files: Dict[Tuple[str, str], _Element] = {}
+    rte_groups = []
+    insert_at = None
+    for group in list(options_root.iterchildren("Group")):
+        if insert_at is None:
+            insert_at = options_root.index(group)
+        name = group.findtext("GroupName") or ""
+        options_root.remove(group)
+        if name.startswith(RTE_GROUP_PREFIX):
+            rte_groups.append(group)
+            continue
+        old_groups.setdefault(name, group)
+        for entry in group.iterchildren("File"):
+            old_files.setdefault((name, _path_key(entry.findtext("PathWithFileName") or "")), entry)
+            group.remove(entry)
+    if insert_at is None:
+        insert_at = len(options_root)
+
+    # RTE 组保留 .uvoptx 中原有的条目，在下面统一排到最后
+    groups_elements = project_root.xpath(XPATH_GROUPS)
+    project_groups = [
+        group for group in (groups_elements[0].iterchildren("Group") if groups_elements else [])
+        if not (group.findtext("GroupName") or "").startswith(RTE_GROUP_PREFIX)
+    ]
+
+    added = 0
+    file_number = 0
+    new_groups = []
+    for group_number, project_group in enumerate(project_groups, start=1):
+        name = project_group.findtext("GroupName") or ""
+        group = old_groups.pop(name, None)
+        if group is None:
+            group = etree.Element("Group")
+            etree.SubElement(group, "GroupName").text = name
+            for tag, value in GROUP_DEFAULTS:
+                etree.SubElement(group, tag).text = value
+            added += 1
+
+        for file_element in project_group.iterfind("Files/File"):
+            file_path = file_element.findtext("FilePath") or ""
+            entry = old_files.pop((name, _path_key(file_path)), None)
+            if entry is None:
+                entry = _create_file_entry(file_element.findtext("FileType") or "", file_path,
+                                           file_element.findtext("FileName") or "")
+                added += 1
+            file_number += 1
+            _set_child_text(entry, "GroupNumber", str(group_number))
+            _set_child_text(entry, "FileNumber", str(file_number))
+            group.append(entry)
+        new_groups.append(group)
+
+    # RTE 组排在最后，只更新编号
+    for group_number, group in enumerate(rte_groups, start=len(new_groups) + 1):
+        for entry in group.iterchildren("File"):
+            file_number += 1
+            _set_child_text(entry, "GroupNumber", str(group_number))
+            _set_child_text(entry, "FileNumber", str(file_number))
+        new_groups.append(group)
+
+    for offset, group in enumerate(new_groups):
+        options_root.insert(insert_at + offset, group)
+
+    removed = len(old_groups) + len(old_files)
+    return removed, added
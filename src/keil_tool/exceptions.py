@@ -21,3 +21,11 @@ class ProjectNotLoadedError(KeilToolError):
 class FileOperationError(KeilToolError):
     """文件操作异常"""
     pass
+
+class ManifestError(KeilToolError):
+    """同步清单文件异常"""
+    pass
+
+class ObjectNameCollisionError(KeilToolError):
+    """目标文件名冲突异常"""
+    pass
@@ -2,7 +2,16 @@
 UI模块
 """
 
-from .cli import run_cli
-from .gui import run_gui
+import importlib
 
-__all__ = ["run_cli", "run_gui"]
+_EXPORTS = {"run_cli": ".cli", "run_sync": ".cli", "run_gui": ".gui"}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    # 命令行模式不需要导入 tkinter
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
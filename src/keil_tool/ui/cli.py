@@ -2,17 +2,18 @@
 命令行界面
 """
 
-from typing import Dict, Callable, List, Any
+from typing import Dict, Callable, List, Any, Optional
 
 from ..constants import APP_AUTHOR, APP_GITHUB, APP_CREATE_TIME
-from ..core import KeilProject
+from ..core import KeilProject, generate_projects
+from ..exceptions import KeilToolError
 
 
 class KeilCLI:
     """Keil 工具命令行界面"""
     
-    def __init__(self):
-        self.keil_project = KeilProject()
+    def __init__(self, change_feed: Optional[str] = None):
+        self.keil_project = KeilProject(change_feed=change_feed)
         self.command_table = self._setup_commands()
     
     def _setup_commands(self) -> Dict[str, Callable]:
@@ -23,7 +24,27 @@ class KeilCLI:
             "refresh_group": self.keil_project.refresh_group,
             "clean_rebuild_group": self.keil_project.clean_rebuild_group,
             "del_exist_group": self.keil_project.delete_existing_groups,
+            "rename_groups": self.keil_project.rename_groups,
             "refresh_project": self.keil_project.refresh_project,
+            "sweep": self.keil_project.sweep_stale_entries,
+            "sync": self.keil_project.sync,
+            "group_rules": self.keil_project.group_by_rules,
+            "generate": self.generate_projects,
+            "which": self.show_file_groups,
+            "group_files": self.show_group_files,
+            "list_groups": self.show_groups,
+            "list_include_paths": self.show_include_paths,
+            "change_detection": self.keil_project.set_change_detection,
+            "collisions": self.show_collisions,
+            "exclude_from_build": lambda *patterns: self.keil_project.set_include_in_build(list(patterns), False),
+            "include_in_build": lambda *patterns: self.keil_project.set_include_in_build(list(patterns), True),
+            "collision_check": self.keil_project.set_collision_check,
+            "change_feed": self.keil_project.set_change_feed,
+            "scan_backend": self.keil_project.set_scan_backend,
+            "uvoptx": lambda mode: self.keil_project.set_options_sync(mode == "on"),
+            "journal": lambda mode: self.keil_project.set_journal_persistence(mode == "on"),
+            "undo": self.keil_project.undo,
+            "redo": self.keil_project.redo,
             "help": self.show_help
         }
     
@@ -34,6 +55,55 @@ class KeilCLI:
         else:
             self._print_help_cn()
     
+    def generate_projects(self, spec_path: str, max_workers: Optional[int] = None) -> bool:
+        """按生成清单从模板批量生成项目，沿用当前的符号链接和扫描后端设置"""
+        try:
+            generate_projects(
+                spec_path, max_workers, self.keil_project.log_message,
+                self.keil_project.follow_symlinks, self.keil_project.scan_backend
+            )
+            return True
+        except (KeilToolError, OSError) as e:
+            self.keil_project.log_message(f"批量生成项目失败: {str(e)}")
+            return False
+    
+    def show_file_groups(self, *file_paths: str) -> None:
+        """显示文件所属的组"""
+        for file_path, groups in self.keil_project.find_file_groups(list(file_paths)).items():
+            print(f"{file_path}: {', '.join(groups) if groups else '(不在任何组中)'}")
+    
+    def show_group_files(self, group_name: str) -> None:
+        """显示组中的文件"""
+        files = self.keil_project.list_group_files(group_name)
+        for file_path in files:
+            print(file_path)
+        print(f"组 '{group_name}' 共 {len(files)} 个文件")
+    
+    def show_collisions(self) -> None:
+        """显示目标文件名冲突和重复添加的源文件"""
+        collisions, duplicates = self.keil_project.find_collisions()
+        for obj, sources in sorted(collisions.items()):
+            print(f"{obj}.o:")
+            for path, groups in sources.items():
+                print(f"\t{path} ({', '.join(groups)})")
+        for path, groups in sorted(duplicates.items()):
+            print(f"{path}: {', '.join(groups)}")
+        print(f"共 {len(collisions)} 处目标文件名冲突，{len(duplicates)} 个文件被加入了多个组")
+    
+    def show_groups(self) -> None:
+        """显示所有组"""
+        groups = self.keil_project.list_groups()
+        for group_name in groups:
+            print(group_name)
+        print(f"共 {len(groups)} 个组")
+    
+    def show_include_paths(self) -> None:
+        """显示所有头文件路径"""
+        include_paths = self.keil_project.list_include_paths()
+        for include_path in include_paths:
+            print(include_path)
+        print(f"共 {len(include_paths)} 个头文件路径")
+    
     def _print_help_en(self) -> None:
         """打印英文帮助"""
         print("Available Commands:")
@@ -41,14 +111,56 @@ class KeilCLI:
         print("\t\t- Set project file path. <path> is the path to the .uvprojx file.")
         print("\tcreate_files_group <path> <max_depth> [group_root_name]")
         print("\t\t- Create a file group. <path> is the starting path, <max_depth> is max search depth.")
-        print("\trefresh_group <group_name> <path> [max_depth]")
+        print("\trefresh_group <group_name> <path> [max_depth] [min_group_files] [max_groups] [max_group_depth]")
         print("\t\t- Refresh a specific file group (automatically updates include paths).")
-        print("\tclean_rebuild_group <group_name> <path> [max_depth]")
+        print("\tclean_rebuild_group <group_name> <path> [max_depth] [min_group_files] [max_groups] [max_group_depth]")
         print("\t\t- Clean and rebuild a specific file group.")
+        print("\t\t- Sub groups with fewer than <min_group_files> files are merged into their parent group;")
+        print("\t\t  <max_groups> and <max_group_depth> cap the group count and depth (0 = unlimited).")
         print("\tdel_exist_group <regex_pattern>")
         print("\t\t- Delete existing file groups using regex pattern.")
+        print("\trename_groups <old_prefix> <new_prefix>")
+        print("\t\t- Rename/move all groups under a prefix without rescanning; merges into existing target groups.")
         print("\trefresh_project")
         print("\t\t- Refresh the project.")
+        print("\tsweep [report]")
+        print("\t\t- Remove files and include paths that no longer exist, and empty groups (report: only list them).")
+        print("\tsync <manifest_path> [max_workers]")
+        print("\t\t- Sync all group mappings declared in a TOML/JSON manifest and save once.")
+        print("\tgroup_rules <path> <rules_path>")
+        print("\t\t- Walk <path> once and put each file into the group of the first matching path/glob/regex rule.")
+        print("\tgenerate <spec_path> [max_workers]")
+        print("\t\t- Generate one project per variant from a template project; shared group mappings are scanned once.")
+        print("\twhich <file_path> [file_path ...]")
+        print("\t\t- Show which groups contain the given source files.")
+        print("\tgroup_files <group_name>")
+        print("\t\t- List the files of a group.")
+        print("\tlist_groups")
+        print("\t\t- List all groups of the project.")
+        print("\tlist_include_paths")
+        print("\t\t- List the include paths of the project.")
+        print("\tchange_detection <off|list|content>")
+        print("\t\t- Skip refresh_group/sync when group membership is unchanged; content also reports groups whose file contents changed.")
+        print("\tcollisions")
+        print("\t\t- Report sources compiling to the same object file name, and sources added to several groups.")
+        print("\tcollision_check <off|warn|error>")
+        print("\t\t- Check object name collisions after create/refresh/sync; error aborts the change.")
+        print("\texclude_from_build <regex> [regex ...]")
+        print("\t\t- Exclude matching groups (by name) or files (by path) from the build; kept across refresh.")
+        print("\tinclude_in_build <regex> [regex ...]")
+        print("\t\t- Include matching groups or files in the build again.")
+        print("\tscan_backend <disk|git|git-untracked>")
+        print("\t\t- Enumerate files by walking the disk, or from .git/index (tracked files, optionally plus untracked-but-not-ignored).")
+        print("\tuvoptx <on|off>")
+        print("\t\t- Also update the group and file entries of the sibling .uvoptx on every save, dropping stale ones.")
+        print("\tchange_feed <path|-|off>")
+        print("\t\t- Write one JSON Lines event per group/file/include path added or removed (- for stdout).")
+        print("\tjournal <on|off>")
+        print("\t\t- Keep the undo journal in <project>.journal.jsonl so undo survives a restart (off: memory only).")
+        print("\tundo")
+        print("\t\t- Undo the last operation that modified the project.")
+        print("\tredo")
+        print("\t\t- Redo the last undone operation.")
         print("\texit")
         print("\t\t- Exit the program.")
         print("Project Information:")
@@ -63,14 +175,56 @@ class KeilCLI:
         print("\t\t- 设置项目文件路径。<path> 是 .uvprojx 文件的路径。")
         print("\tcreate_files_group <path> <max_depth> [group_root_name]")
         print("\t\t- 创建文件组。<path> 是起始路径，<max_depth> 是查找的最大深度。")
-        print("\trefresh_group <group_name> <path> [max_depth]")
+        print("\trefresh_group <group_name> <path> [max_depth] [min_group_files] [max_groups] [max_group_depth]")
         print("\t\t- 刷新指定文件组（自动更新头文件路径）。<group_name> 是要刷新的组名。")
-        print("\tclean_rebuild_group <group_name> <path> [max_depth]")
+        print("\tclean_rebuild_group <group_name> <path> [max_depth] [min_group_files] [max_groups] [max_group_depth]")
         print("\t\t- 清理重建指定文件组，确保没有重复组。")
+        print("\t\t- 文件数少于 <min_group_files> 的子组并入上一级组；")
+        print("\t\t  <max_groups> 和 <max_group_depth> 限制组数和组深度（0 表示不限制）。")
         print("\tdel_exist_group <regex_pattern>")
         print("\t\t- 删除存在的文件组。<regex_pattern> 是一个正则表达式。")
+        print("\trename_groups <old_prefix> <new_prefix>")
+        print("\t\t- 不重新扫描磁盘，把前缀下的所有组改名/移动到新前缀，目标组已存在时合并。")
         print("\trefresh_project")
         print("\t\t- 刷新项目。")
+        print("\tsweep [report]")
+        print("\t\t- 删除已不存在的文件、头文件路径以及空组（report 只列出不修改）。")
+        print("\tsync <manifest_path> [max_workers]")
+        print("\t\t- 按 TOML/JSON 清单并发扫描并同步所有组映射，只保存一次。")
+        print("\tgroup_rules <path> <rules_path>")
+        print("\t\t- 只遍历一次 <path>，按规则文件中的路径/glob/正则规则把文件归入按职能命名的组。")
+        print("\tgenerate <spec_path> [max_workers]")
+        print("\t\t- 按生成清单从模板项目为每个变体生成项目文件，相同的组映射只扫描一次。")
+        print("\twhich <file_path> [file_path ...]")
+        print("\t\t- 查询源文件属于哪些组。")
+        print("\tgroup_files <group_name>")
+        print("\t\t- 列出组中的文件。")
+        print("\tlist_groups")
+        print("\t\t- 列出项目中的所有组。")
+        print("\tlist_include_paths")
+        print("\t\t- 列出项目的头文件路径。")
+        print("\tchange_detection <off|list|content>")
+        print("\t\t- 组成员未变化时 refresh_group/sync 跳过修改和保存；content 另外报告文件内容有变化的组。")
+        print("\tcollisions")
+        print("\t\t- 列出编译后目标文件同名的源文件，以及被加入多个组的源文件。")
+        print("\tcollision_check <off|warn|error>")
+        print("\t\t- 创建/刷新/同步后检查目标文件名冲突；error 时放弃本次修改。")
+        print("\texclude_from_build <regex> [regex ...]")
+        print("\t\t- 将组名或文件路径匹配的组/文件排除出编译，刷新组时保留该设置。")
+        print("\tinclude_in_build <regex> [regex ...]")
+        print("\t\t- 将匹配的组/文件恢复参与编译。")
+        print("\tscan_backend <disk|git|git-untracked>")
+        print("\t\t- 文件枚举方式：遍历磁盘，或读取 .git/index 只收录已跟踪的文件（可同时收录未跟踪且未被忽略的文件）。")
+        print("\tuvoptx <on|off>")
+        print("\t\t- 每次保存时同时更新同名 .uvoptx 中的组和文件条目，并删除失效条目。")
+        print("\tchange_feed <path|-|off>")
+        print("\t\t- 以 JSON Lines 输出每个组/文件/头文件路径的增删事件（- 表示标准输出）。")
+        print("\tjournal <on|off>")
+        print("\t\t- 把撤销日志保存到 <项目文件>.journal.jsonl，重启后仍可撤销（off 时只保存在内存中）。")
+        print("\tundo")
+        print("\t\t- 撤销最近一次修改项目的操作。")
+        print("\tredo")
+        print("\t\t- 重做最近一次撤销的操作。")
         print("\texit")
         print("\t\t- 退出程序。")
         print("项目信息:")
@@ -90,11 +244,44 @@ class KeilCLI:
             group_name = params[0]
             path = params[1]
             max_depth = int(params[2]) if len(params) >= 3 else 3
-            return [group_name, path, max_depth]
+            consolidation = [int(value) for value in params[3:6]]
+            return [group_name, path, max_depth, *consolidation]
         elif command == "del_exist_group":
             return [params[0]]
+        elif command == "rename_groups":
+            if len(params) < 2:
+                raise ValueError("rename_groups 需要2个参数: <old_prefix> <new_prefix>")
+            return [params[0], params[1]]
         elif command == "refresh_project":
             return []
+        elif command == "sweep":
+            return [not (params and params[0] == "report")]
+        elif command == "group_rules":
+            if len(params) < 2:
+                raise ValueError("group_rules 需要2个参数: <path> <rules_path>")
+            return [params[0], params[1]]
+        elif command in ["sync", "generate"]:
+            return [params[0], int(params[1]) if len(params) >= 2 else None]
+        elif command == "which":
+            if not params:
+                raise ValueError("which 需要至少1个参数: <file_path> [file_path ...]")
+            return params
+        elif command == "group_files":
+            return [params[0]]
+        elif command in ["list_groups", "list_include_paths", "undo", "redo"]:
+            return []
+        elif command in ["change_detection", "collision_check", "change_feed", "scan_backend"]:
+            return [params[0]]
+        elif command in ["uvoptx", "journal"]:
+            if not params or params[0] not in ("on", "off"):
+                raise ValueError(f"{command} 需要1个参数: <on|off>")
+            return [params[0]]
+        elif command in ["exclude_from_build", "include_in_build"]:
+            if not params:
+                raise ValueError(f"{command} 需要至少1个参数: <regex> [regex ...]")
+            return params
+        elif command == "collisions":
+            return []
         elif command == "help":
             return [params[0] if len(params) >= 1 else "cn"]
         return []
@@ -106,7 +293,7 @@ class KeilCLI:
         # 尝试自动搜索项目文件
         project_file = self.keil_project.find_uvprojx_files()
         if project_file:
-            if self.keil_project.set_project_file(project_file):
+            if self.keil_project.set_project_file(project_file, prefetch=True):
                 print(f"已自动加载项目: {project_file}")
             else:
                 print("项目文件加载失败")
@@ -130,7 +317,8 @@ class KeilCLI:
                     continue
                 
                 # 检查是否需要项目文件
-                if command not in ["set_project", "help"] and not self.keil_project.project_path:
+                if command not in ["set_project", "help", "generate", "change_detection", "collision_check",
+                                   "change_feed", "scan_backend", "uvoptx", "journal"] and not self.keil_project.project_path:
                     print("请先使用 'set_project <path>' 命令设置项目文件")
                     continue
                 
@@ -151,7 +339,33 @@ class KeilCLI:
                 print(f"执行命令时出错: {e}")
 
 
-def run_cli() -> None:
-    """运行命令行界面"""
-    cli = KeilCLI()
+def run_cli(change_feed: Optional[str] = None) -> None:
+    """
+    运行命令行界面
+    
+    Args:
+        change_feed: 变更事件输出目标，见 KeilProject.set_change_feed
+    """
+    cli = KeilCLI(change_feed)
     cli.run()
+
+
+def run_sync(manifest_path: str, project_path: Optional[str] = None, change_feed: Optional[str] = None) -> bool:
+    """
+    非交互地按清单同步一次，供构建前钩子调用
+
+    Args:
+        manifest_path: 清单文件路径
+        project_path: 项目文件路径，未指定时在当前目录搜索
+        change_feed: 变更事件输出目标，见 KeilProject.set_change_feed
+
+    Returns:
+        是否成功同步
+    """
+    keil_project = KeilProject(change_feed=change_feed)
+    project_path = project_path or keil_project.find_uvprojx_files()
+    if not project_path:
+        return False
+    # 只设置路径，项目在需要时才解析，同步戳未过期时不会解析
+    keil_project.project_path = project_path
+    return keil_project.sync(manifest_path)
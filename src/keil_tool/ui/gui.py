@@ -7,8 +7,9 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
 
-from ..constants import APP_TITLE, APP_AUTHOR, APP_GITHUB
-from ..core import KeilProject
+from ..constants import APP_TITLE, APP_AUTHOR, APP_GITHUB, CHANGE_DETECTION_MODES, COLLISION_CHECK_MODES, SCAN_BACKENDS
+from ..core import KeilProject, ProjectCache
+from .project_tree import ProjectTree, show_refresh_preview
 
 
 class KeilGUI:
@@ -17,11 +18,11 @@ class KeilGUI:
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title(APP_TITLE)
-        self.root.geometry("800x600")
+        self.root.geometry("1000x700")
         self.root.resizable(True, True)
         
         # 初始化Keil项目管理器
-        self.keil_project = KeilProject(callback_func=self.log_message)
+        self.keil_project = KeilProject(callback_func=self.log_message, project_cache=ProjectCache())
         
         self._setup_ui()
         self._init_project()
@@ -36,7 +37,7 @@ class KeilGUI:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(1, weight=1)
-        main_frame.rowconfigure(3, weight=1)  # 日志区域可扩展
+        main_frame.rowconfigure(3, weight=1)  # 项目结构和日志区域可扩展
         
         # 创建各个UI组件
         self._create_project_info_frame(main_frame)
@@ -61,6 +62,13 @@ class KeilGUI:
         button_frame.grid(row=0, column=2, padx=(5, 0))
         ttk.Button(button_frame, text="选择项目", command=self._select_project_file).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="自动搜索", command=self._auto_find_project).pack(side=tk.LEFT)
+        
+        # 最近项目（已解析的项目缓存在内存中，切回时无需重新解析）
+        ttk.Label(info_frame, text="最近项目:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        self.recent_project_var = tk.StringVar()
+        self.recent_project_combo = ttk.Combobox(info_frame, textvariable=self.recent_project_var, state="readonly")
+        self.recent_project_combo.grid(row=1, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=(10, 0), pady=(5, 0))
+        self.recent_project_combo.bind("<<ComboboxSelected>>", self._switch_recent_project)
     
     def _create_group_management_frame(self, parent: ttk.Frame) -> None:
         """创建文件组管理框架"""
@@ -85,19 +93,57 @@ class KeilGUI:
         self.group_name_var = tk.StringVar()
         ttk.Entry(group_frame, textvariable=self.group_name_var).grid(row=2, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(5, 0))
         
+        # 组合并设置（0 表示不限制）
+        ttk.Label(group_frame, text="合并:").grid(row=3, column=0, sticky=tk.W, pady=(5, 0))
+        consolidate_frame = ttk.Frame(group_frame)
+        consolidate_frame.grid(row=3, column=1, sticky=tk.W, padx=(5, 5), pady=(5, 0))
+        self.min_group_files_var = tk.StringVar(value="0")
+        self.max_groups_var = tk.StringVar(value="0")
+        self.max_group_depth_var = tk.StringVar(value="0")
+        ttk.Label(consolidate_frame, text="每组最少文件").pack(side=tk.LEFT)
+        ttk.Spinbox(consolidate_frame, from_=0, to=1000, textvariable=self.min_group_files_var, width=6).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(consolidate_frame, text="最大组数").pack(side=tk.LEFT)
+        ttk.Spinbox(consolidate_frame, from_=0, to=10000, textvariable=self.max_groups_var, width=6).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(consolidate_frame, text="最大组深度").pack(side=tk.LEFT)
+        ttk.Spinbox(consolidate_frame, from_=0, to=10, textvariable=self.max_group_depth_var, width=6).pack(side=tk.LEFT, padx=(5, 0))
+        
         # 操作按钮
         button_group_frame = ttk.Frame(group_frame)
-        button_group_frame.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+        button_group_frame.grid(row=4, column=0, columnspan=3, pady=(10, 0))
         
         ttk.Button(button_group_frame, text="创建文件组", command=self._create_files_group).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_group_frame, text="预览刷新", command=self._preview_refresh).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_group_frame, text="刷新指定组", command=self._refresh_group).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(button_group_frame, text="清理重建组", command=self._clean_rebuild_group).pack(side=tk.LEFT)
+        ttk.Button(button_group_frame, text="清理重建组", command=self._clean_rebuild_group).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_group_frame, text="规则分组", command=self._group_by_rules).pack(side=tk.LEFT)
         
         # 删除文件组
-        ttk.Label(group_frame, text="删除组(正则):").grid(row=4, column=0, sticky=tk.W, pady=(10, 0))
+        ttk.Label(group_frame, text="删除组(正则):").grid(row=5, column=0, sticky=tk.W, pady=(10, 0))
         self.del_group_pattern_var = tk.StringVar()
-        ttk.Entry(group_frame, textvariable=self.del_group_pattern_var).grid(row=4, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(10, 0))
-        ttk.Button(group_frame, text="删除", command=self._del_exist_group).grid(row=4, column=2, pady=(10, 0))
+        ttk.Entry(group_frame, textvariable=self.del_group_pattern_var).grid(row=5, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(10, 0))
+        ttk.Button(group_frame, text="删除", command=self._del_exist_group).grid(row=5, column=2, pady=(10, 0))
+        
+        # 排除出编译
+        ttk.Label(group_frame, text="排除编译(正则):").grid(row=6, column=0, sticky=tk.W, pady=(5, 0))
+        self.build_pattern_var = tk.StringVar()
+        ttk.Entry(group_frame, textvariable=self.build_pattern_var).grid(row=6, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(5, 0))
+        build_button_frame = ttk.Frame(group_frame)
+        build_button_frame.grid(row=6, column=2, pady=(5, 0))
+        ttk.Button(build_button_frame, text="排除", command=lambda: self._set_include_in_build(False)).pack(side=tk.LEFT)
+        ttk.Button(build_button_frame, text="恢复", command=lambda: self._set_include_in_build(True)).pack(side=tk.LEFT)
+        
+        # 重命名/移动组
+        ttk.Label(group_frame, text="重命名组前缀:").grid(row=7, column=0, sticky=tk.W, pady=(5, 0))
+        rename_frame = ttk.Frame(group_frame)
+        rename_frame.grid(row=7, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(5, 0))
+        rename_frame.columnconfigure(0, weight=1)
+        rename_frame.columnconfigure(2, weight=1)
+        self.rename_old_var = tk.StringVar()
+        self.rename_new_var = tk.StringVar()
+        ttk.Entry(rename_frame, textvariable=self.rename_old_var).grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Label(rename_frame, text="→").grid(row=0, column=1, padx=5)
+        ttk.Entry(rename_frame, textvariable=self.rename_new_var).grid(row=0, column=2, sticky=(tk.W, tk.E))
+        ttk.Button(group_frame, text="重命名", command=self._rename_groups).grid(row=7, column=2, pady=(5, 0))
     
     def _create_operation_buttons_frame(self, parent: ttk.Frame) -> None:
         """创建操作按钮框架"""
@@ -105,13 +151,57 @@ class KeilGUI:
         button_frame.grid(row=2, column=0, columnspan=2, pady=(10, 10))
         
         ttk.Button(button_frame, text="刷新项目", command=self._refresh_project).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="清单同步", command=self._sync_manifest).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="清理失效条目", command=self._sweep_stale_entries).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="撤销", command=self._undo).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="重做", command=self._redo).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="清空日志", command=self._clear_log).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(button_frame, text="帮助", command=self._show_help).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="帮助", command=self._show_help).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Label(button_frame, text="变化检测:").pack(side=tk.LEFT)
+        self.change_detection_var = tk.StringVar(value=self.keil_project.change_detection)
+        change_detection_box = ttk.Combobox(button_frame, textvariable=self.change_detection_var,
+                                            values=CHANGE_DETECTION_MODES, state="readonly", width=8)
+        change_detection_box.pack(side=tk.LEFT, padx=(5, 0))
+        change_detection_box.bind("<<ComboboxSelected>>",
+                                  lambda event: self.keil_project.set_change_detection(self.change_detection_var.get()))
+        
+        ttk.Label(button_frame, text="扫描:").pack(side=tk.LEFT, padx=(10, 0))
+        self.scan_backend_var = tk.StringVar(value=self.keil_project.scan_backend)
+        scan_backend_box = ttk.Combobox(button_frame, textvariable=self.scan_backend_var,
+                                        values=SCAN_BACKENDS, state="readonly", width=12)
+        scan_backend_box.pack(side=tk.LEFT, padx=(5, 0))
+        scan_backend_box.bind("<<ComboboxSelected>>",
+                              lambda event: self.keil_project.set_scan_backend(self.scan_backend_var.get()))
+        
+        ttk.Label(button_frame, text="冲突检查:").pack(side=tk.LEFT, padx=(10, 0))
+        self.collision_check_var = tk.StringVar(value=self.keil_project.collision_check)
+        collision_check_box = ttk.Combobox(button_frame, textvariable=self.collision_check_var,
+                                           values=COLLISION_CHECK_MODES, state="readonly", width=6)
+        collision_check_box.pack(side=tk.LEFT, padx=(5, 0))
+        collision_check_box.bind("<<ComboboxSelected>>",
+                                 lambda event: self.keil_project.set_collision_check(self.collision_check_var.get()))
+        
+        self.sync_options_var = tk.BooleanVar(value=self.keil_project.sync_options)
+        ttk.Checkbutton(button_frame, text="同步 .uvoptx", variable=self.sync_options_var,
+                        command=lambda: self.keil_project.set_options_sync(self.sync_options_var.get())
+                        ).pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.persist_journal_var = tk.BooleanVar(value=self.keil_project.persist_journal)
+        ttk.Checkbutton(button_frame, text="保存撤销日志", variable=self.persist_journal_var,
+                        command=lambda: self.keil_project.set_journal_persistence(self.persist_journal_var.get())
+                        ).pack(side=tk.LEFT, padx=(10, 0))
     
     def _create_log_frame(self, parent: ttk.Frame) -> None:
-        """创建日志输出框架"""
-        log_frame = ttk.LabelFrame(parent, text="日志输出", padding="5")
-        log_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        """创建项目结构和日志输出框架"""
+        paned = ttk.PanedWindow(parent, orient=tk.HORIZONTAL)
+        paned.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.project_tree = ProjectTree(paned, self.keil_project)
+        paned.add(self.project_tree, weight=1)
+        
+        log_frame = ttk.LabelFrame(paned, text="日志输出", padding="5")
+        paned.add(log_frame, weight=2)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
@@ -141,14 +231,45 @@ class KeilGUI:
         else:
             update_log()
     
+    def _reload_tree_later(self) -> None:
+        """重新加载项目结构树（可在子线程中调用，读取项目在后台线程中进行）"""
+        self.root.after(0, self.project_tree.reload)
+    
+    def _update_recent_projects_later(self) -> None:
+        """在主线程中更新最近项目列表（在子线程中调用：查询持有项目的读锁，不能在界面线程中等待）"""
+        recent_projects = self.keil_project.recent_projects()
+        project_path = self.keil_project.project_path
+        
+        def update():
+            self.recent_project_combo["values"] = recent_projects
+            self.recent_project_var.set(project_path)
+        
+        self.root.after(0, update)
+    
+    def _switch_recent_project(self, event: tk.Event) -> None:
+        """切换到最近项目列表中选中的项目"""
+        file_path = self.recent_project_var.get()
+        if not file_path:
+            return
+        
+        def switch():
+            if self.keil_project.set_project_file(file_path, prefetch=True):
+                self.project_path_var.set(file_path)
+                self._reload_tree_later()
+            self._update_recent_projects_later()
+        
+        threading.Thread(target=switch, daemon=True).start()
+    
     def _init_project(self) -> None:
         """初始化项目"""
         def init():
             try:
                 project_file = self.keil_project.find_uvprojx_files()
                 if project_file:
-                    if self.keil_project.set_project_file(project_file):
+                    if self.keil_project.set_project_file(project_file, prefetch=True):
                         self.project_path_var.set(project_file)
+                        self._reload_tree_later()
+                        self._update_recent_projects_later()
                     else:
                         self.project_path_var.set("项目加载失败")
                 else:
@@ -169,9 +290,11 @@ class KeilGUI:
         if file_path:
             def load_project():
                 self.log_message(f"正在加载项目文件: {file_path}")
-                if self.keil_project.set_project_file(file_path):
+                if self.keil_project.set_project_file(file_path, prefetch=True):
                     self.project_path_var.set(file_path)
                     self.log_message("项目文件加载成功")
+                    self._reload_tree_later()
+                    self._update_recent_projects_later()
                 else:
                     self.log_message("项目文件加载失败")
             
@@ -183,9 +306,11 @@ class KeilGUI:
             self.log_message("正在搜索项目文件...")
             project_file = self.keil_project.find_uvprojx_files()
             if project_file:
-                if self.keil_project.set_project_file(project_file):
+                if self.keil_project.set_project_file(project_file, prefetch=True):
                     self.project_path_var.set(project_file)
                     self.log_message("自动搜索完成")
+                    self._reload_tree_later()
+                    self._update_recent_projects_later()
                 else:
                     self.project_path_var.set("项目加载失败")
             else:
@@ -200,11 +325,60 @@ class KeilGUI:
             if self.keil_project.refresh_project():
                 self.project_path_var.set(self.keil_project.project_path)
                 self.log_message("项目刷新完成")
+                self._reload_tree_later()
             else:
                 self.project_path_var.set("刷新失败")
         
         threading.Thread(target=refresh, daemon=True).start()
     
+    def _group_by_rules(self) -> None:
+        """按规则文件把路径下的文件归入按职能命名的组"""
+        path = self.group_path_var.get().strip()
+        if not path:
+            messagebox.showwarning("警告", "请输入路径")
+            return
+        rules_path = filedialog.askopenfilename(
+            title="选择规则文件",
+            filetypes=[("Rule Files", "*.toml *.json"), ("All Files", "*.*")],
+            initialdir=os.getcwd()
+        )
+        if not rules_path:
+            return
+        
+        def group():
+            if self.keil_project.group_by_rules(path, rules_path):
+                self._reload_tree_later()
+        
+        threading.Thread(target=group, daemon=True).start()
+    
+    def _sync_manifest(self) -> None:
+        """按同步清单刷新所有组"""
+        manifest_path = filedialog.askopenfilename(
+            title="选择同步清单",
+            filetypes=[("Manifest Files", "*.toml *.json"), ("All Files", "*.*")],
+            initialdir=os.getcwd()
+        )
+        if not manifest_path:
+            return
+        
+        def sync():
+            self.log_message(f"正在按清单同步: {manifest_path}")
+            if self.keil_project.sync(manifest_path):
+                self.log_message("清单同步成功")
+                self._reload_tree_later()
+            else:
+                self.log_message("清单同步失败")
+        
+        threading.Thread(target=sync, daemon=True).start()
+    
+    def _sweep_stale_entries(self) -> None:
+        """删除已不存在的文件、头文件路径和空组"""
+        def sweep():
+            if self.keil_project.sweep_stale_entries():
+                self._reload_tree_later()
+        
+        threading.Thread(target=sweep, daemon=True).start()
+    
     def _browse_group_path(self) -> None:
         """浏览选择文件组路径"""
         path = filedialog.askdirectory(title="选择文件组路径")
@@ -236,6 +410,7 @@ class KeilGUI:
             group_root_name = group_name if group_name else None
             if self.keil_project.create_files_group(path, depth, group_root_name):
                 self.log_message("创建文件组成功")
+                self._reload_tree_later()
             else:
                 self.log_message("创建文件组失败")
         
@@ -261,8 +436,9 @@ class KeilGUI:
         
         try:
             depth = int(max_depth)
+            consolidation = self._get_consolidation()
         except ValueError:
-            messagebox.showerror("错误", "深度必须是整数")
+            messagebox.showerror("错误", "深度和合并设置必须是整数")
             return
         
         # 确认操作
@@ -270,15 +446,50 @@ class KeilGUI:
         if not result:
             return
         
+        self._start_refresh(group_name, path, depth, consolidation)
+    
+    def _start_refresh(self, group_name: str, path: str, depth: int, consolidation: tuple) -> None:
+        """在后台刷新文件组"""
         def refresh():
             self.log_message(f"正在刷新文件组: 组名={group_name}, 路径={path}, 深度={depth}")
-            if self.keil_project.refresh_group(group_name, path, depth):
+            if self.keil_project.refresh_group(group_name, path, depth, *consolidation):
                 self.log_message("刷新文件组成功")
+                self._reload_tree_later()
             else:
                 self.log_message("刷新文件组失败")
         
         threading.Thread(target=refresh, daemon=True).start()
     
+    def _preview_refresh(self) -> None:
+        """预览刷新指定文件组将要做的修改，确认后再应用"""
+        path = self.group_path_var.get().strip()
+        group_name = self.group_name_var.get().strip()
+        
+        if not path or not group_name:
+            messagebox.showwarning("警告", "预览刷新时必须指定路径和组名")
+            return
+        
+        if not os.path.exists(path):
+            messagebox.showerror("错误", "指定的路径不存在")
+            return
+        
+        try:
+            depth = int(self.max_depth_var.get().strip())
+            consolidation = self._get_consolidation()
+        except ValueError:
+            messagebox.showerror("错误", "深度和合并设置必须是整数")
+            return
+        
+        def preview():
+            self.log_message(f"正在预览刷新: 组名={group_name}, 路径={path}, 深度={depth}")
+            result = self.keil_project.preview_refresh(group_name, path, depth, *consolidation)
+            if result is not None:
+                self.root.after(0, lambda: show_refresh_preview(
+                    self.root, result, lambda: self._start_refresh(group_name, path, depth, consolidation)
+                ))
+        
+        threading.Thread(target=preview, daemon=True).start()
+    
     def _clean_rebuild_group(self) -> None:
         """清理并重建指定文件组"""
         path = self.group_path_var.get().strip()
@@ -299,8 +510,9 @@ class KeilGUI:
         
         try:
             depth = int(max_depth)
+            consolidation = self._get_consolidation()
         except ValueError:
-            messagebox.showerror("错误", "深度必须是整数")
+            messagebox.showerror("错误", "深度和合并设置必须是整数")
             return
         
         # 确认操作
@@ -310,13 +522,22 @@ class KeilGUI:
         
         def clean_rebuild():
             self.log_message(f"正在清理重建文件组: 组名={group_name}, 路径={path}, 深度={depth}")
-            if self.keil_project.clean_rebuild_group(group_name, path, depth):
+            if self.keil_project.clean_rebuild_group(group_name, path, depth, *consolidation):
                 self.log_message("清理重建文件组成功")
+                self._reload_tree_later()
             else:
                 self.log_message("清理重建文件组失败")
         
         threading.Thread(target=clean_rebuild, daemon=True).start()
     
+    def _get_consolidation(self) -> tuple:
+        """读取组合并设置：(每组最少文件, 最大组数, 最大组深度)"""
+        return (
+            int(self.min_group_files_var.get().strip() or 0),
+            int(self.max_groups_var.get().strip() or 0),
+            int(self.max_group_depth_var.get().strip() or 0)
+        )
+    
     def _del_exist_group(self) -> None:
         """删除文件组"""
         pattern = self.del_group_pattern_var.get().strip()
@@ -328,11 +549,51 @@ class KeilGUI:
             self.log_message(f"正在删除匹配的文件组: {pattern}")
             if self.keil_project.delete_existing_groups(pattern):
                 self.log_message("删除文件组成功")
+                self._reload_tree_later()
             else:
                 self.log_message("删除文件组失败")
         
         threading.Thread(target=del_group, daemon=True).start()
     
+    def _rename_groups(self) -> None:
+        """把组名前缀下的所有组改到新前缀"""
+        old_prefix = self.rename_old_var.get().strip()
+        new_prefix = self.rename_new_var.get().strip()
+        if not old_prefix or not new_prefix:
+            messagebox.showwarning("警告", "请输入原组名前缀和新组名前缀")
+            return
+        
+        def rename():
+            if self.keil_project.rename_groups(old_prefix, new_prefix):
+                self._reload_tree_later()
+        
+        threading.Thread(target=rename, daemon=True).start()
+    
+    def _set_include_in_build(self, include_in_build: bool) -> None:
+        """按正则表达式设置组/文件是否参与编译，多个表达式以空格分隔"""
+        patterns = self.build_pattern_var.get().split()
+        if not patterns:
+            messagebox.showwarning("警告", "请输入正则表达式")
+            return
+        
+        threading.Thread(target=self.keil_project.set_include_in_build, args=(patterns, include_in_build), daemon=True).start()
+    
+    def _undo(self) -> None:
+        """撤销最近一次操作"""
+        def undo():
+            if self.keil_project.undo():
+                self._reload_tree_later()
+        
+        threading.Thread(target=undo, daemon=True).start()
+    
+    def _redo(self) -> None:
+        """重做最近一次撤销的操作"""
+        def redo():
+            if self.keil_project.redo():
+                self._reload_tree_later()
+        
+        threading.Thread(target=redo, daemon=True).start()
+    
     def _clear_log(self) -> None:
         """清空日志"""
         self.log_text.delete(1.0, tk.END)
@@ -345,10 +606,25 @@ class KeilGUI:
    - 路径: 选择要添加到项目的源代码文件夹
    - 深度: 指定搜索子文件夹的最大深度
    - 组名前缀: 可选，用于自定义文件组的名称前缀
+   - 合并: 刷新/重建时把文件数少于阈值的子组并入上一级组，并限制组数和组深度（0 表示不限制）
    - 创建文件组: 根据指定路径和深度创建新的文件组
+   - 预览刷新: 只扫描不修改，列出刷新将新增/删除的组和文件，确认后再应用
    - 刷新指定组: 刷新已存在的文件组，会自动更新头文件路径
+   - 项目结构: 左侧按组名层级显示项目中的组和文件，展开时才加载子节点
    - 清理重建组: 完全清理并重建文件组，确保没有重复
+   - 规则分组: 选择规则文件，按路径/glob/正则规则把路径下的文件归入 HAL、Startup 等按职能命名的组
    - 删除组: 使用正则表达式匹配要删除的文件组名称
+   - 重命名组前缀: 不重新扫描磁盘，把前缀下的所有组移动到新前缀（如 Drivers → BSP/Drivers），目标组已存在时合并文件
+   - 清单同步: 选择 TOML/JSON 清单，并发扫描所有组映射后一次性保存
+   - 清理失效条目: 删除指向已不存在文件的条目、不存在的头文件路径以及空组，避免 uVision 编译中途报错
+   - 变化检测: list 在组成员未变化时跳过刷新，content 另外报告文件内容有变化的组，都不会只因时间戳或内容变化而改写项目
+   - 排除编译: 组名或文件路径匹配正则表达式（多个以空格分隔）的组/文件不参与编译，刷新组时保留该设置
+   - 扫描: disk 遍历磁盘；git 读取 .git/index，只收录已跟踪的文件；git-untracked 同时收录未跟踪且未被忽略的文件
+   - 冲突检查: 创建/刷新/同步后检查同名源文件（Keil 的 .o 文件会互相覆盖）和被加入多个组的文件，warn 只提示，error 放弃本次修改
+   - 同步 .uvoptx: 每次保存时同时更新 uVision 的 .uvoptx 中的组和文件条目并删除失效条目，打开项目时无需再核对
+   - 撤销/重做: 撤销或重做最近一次修改项目的操作，撤销记录默认只保存在内存中
+   - 保存撤销日志: 把撤销日志写入项目文件旁的 .journal.jsonl，重新打开项目后仍可撤销
+   - 最近项目: 最近打开过的项目保留在内存中，切回未被修改的项目时无需重新解析
 
 2. 常用正则表达式示例:
    - '^path/to/.*' - 匹配以 'path/to/' 开头的路径
@@ -357,9 +633,10 @@ class KeilGUI:
 
 3. 注意事项:
    - 请确保在包含 .uvprojx 文件的目录中运行此工具
-   - 操作前建议备份项目文件
+   - 误操作可以通过“撤销”恢复，重要修改前仍建议提交版本控制
    - 所有操作都会在后台执行，请查看日志输出
-   - 刷新和重建文件组时会自动更新相关的头文件路径
+   - 组中头文件的增删会自动反映到头文件路径：新出现头文件的目录被加入，不再有头文件的目录被移除
+   - 保存前会检查项目文件是否已被 uVision 修改，若已修改会在新内容上合并本次修改而不是直接覆盖
 
 作者: {APP_AUTHOR}
 GitHub: {APP_GITHUB}
@@ -0,0 +1,240 @@
+"""
+项目结构树与刷新预览
+
+树节点在展开时才加载子节点，子节点过多时分批插入，拥有成千上万个组的项目也能立即打开。
+项目结构树在后台线程中读取项目：查询持有项目的读锁，修改操作进行期间会等待，不能阻塞界面线程。
+"""
+
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Tuple
+
+from ..core import KeilProject, RefreshPreview
+
+# 每次插入的子节点数，剩余的子节点通过 “更多” 节点双击加载
+TREE_BATCH_SIZE = 200
+
+# (节点键, 显示文本, 是否有子节点, 标签)
+TreeNode = Tuple[str, str, bool, Tuple[str, ...]]
+
+_PLACEHOLDER = "__placeholder__"
+_LOADING = "加载中…"
+
+
+class LazyTree(ttk.Frame):
+    """按需加载子节点的树形视图"""
+
+    def __init__(self, parent: tk.Misc, load_children: Callable[[str], List[TreeNode]],
+                 batch_size: int = TREE_BATCH_SIZE, load_in_background: bool = False):
+        """
+        Args:
+            parent: 父控件
+            load_children: 根据节点键返回子节点列表，根节点的键为 ""
+            batch_size: 每批插入的子节点数
+            load_in_background: 是否在后台线程中调用 load_children，加载期间显示 “加载中” 节点
+        """
+        super().__init__(parent)
+        self.load_children = load_children
+        self.batch_size = batch_size
+        self.load_in_background = load_in_background
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, show="tree", selectmode="browse")
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.tag_configure("added", foreground="green")
+        self.tree.tag_configure("removed", foreground="red")
+        self.tree.tag_configure("more", foreground="gray")
+
+        # 树节点 → 节点键；“更多” 节点 → (父节点, 剩余子节点)
+        self._keys: Dict[str, str] = {}
+        self._remaining: Dict[str, Tuple[str, List[TreeNode]]] = {}
+
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+    def reset(self) -> None:
+        """清空并重新加载第一层节点"""
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._remaining.clear()
+        self._load("", "")
+    
+    def _load(self, parent_item: str, key: str) -> None:
+        """加载节点的子节点并插入，后台加载时先插入 “加载中” 节点，加载完成后在界面线程中替换"""
+        if not self.load_in_background:
+            self._insert_batch(parent_item, self.load_children(key))
+            return
+        
+        loading = self.tree.insert(parent_item, tk.END, text=_LOADING, tags=("more",))
+        
+        def insert(nodes: List[TreeNode]) -> None:
+            # 加载期间树被重置时 “加载中” 节点已不存在，丢弃结果
+            if self.tree.exists(loading):
+                self.tree.delete(loading)
+                self._insert_batch(parent_item, nodes)
+        
+        def load() -> None:
+            nodes = self.load_children(key)
+            self.after(0, lambda: insert(nodes))
+        
+        threading.Thread(target=load, daemon=True).start()
+
+    def _insert_batch(self, parent_item: str, nodes: List[TreeNode]) -> None:
+        """插入一批子节点，其余的放到 “更多” 节点后面"""
+        for key, text, has_children, tags in nodes[:self.batch_size]:
+            item = self.tree.insert(parent_item, tk.END, text=text, tags=tags)
+            self._keys[item] = key
+            if has_children:
+                # 占位子节点让树显示展开标记，展开时再替换为真实子节点
+                self.tree.insert(item, tk.END, text=_PLACEHOLDER)
+
+        rest = nodes[self.batch_size:]
+        if rest:
+            more = self.tree.insert(parent_item, tk.END, text=f"… 还有 {len(rest)} 项（双击加载）", tags=("more",))
+            self._remaining[more] = (parent_item, rest)
+
+    def _on_open(self, event: tk.Event) -> None:
+        """展开节点时加载子节点"""
+        item = self.tree.focus()
+        children = self.tree.get_children(item)
+        if len(children) == 1 and self.tree.item(children[0], "text") == _PLACEHOLDER:
+            self.tree.delete(children[0])
+            self._load(item, self._keys.get(item, ""))
+
+    def _on_double_click(self, event: tk.Event) -> None:
+        """双击 “更多” 节点加载下一批子节点"""
+        item = self.tree.identify_row(event.y)
+        if item in self._remaining:
+            parent_item, rest = self._remaining.pop(item)
+            self.tree.delete(item)
+            self._insert_batch(parent_item, rest)
+
+
+class ProjectTree(ttk.LabelFrame):
+    """项目中的组和文件，组名按 “/” 分层显示"""
+
+    def __init__(self, parent: tk.Misc, keil_project: KeilProject):
+        super().__init__(parent, text="项目结构", padding="5")
+        self.keil_project = keil_project
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        ttk.Button(self, text="刷新", command=self.reload).grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        self.lazy_tree = LazyTree(self, self._load_children, load_in_background=True)
+        self.lazy_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # 组名前缀 → 下一级前缀列表；实际存在的组名集合
+        self._children: Dict[str, List[str]] = {}
+        self._groups = set()
+        # 每次 reload 递增，只采用最后一次读取的结果
+        self._generation = 0
+
+    def reload(self) -> None:
+        """在后台线程中重新读取项目中的组（只建立组名前缀树，文件在展开时才读取），完成后在界面线程中重建树"""
+        self._generation += 1
+        generation = self._generation
+        
+        def load() -> None:
+            groups = set(self.keil_project.list_groups()) if self.keil_project.project_path else set()
+            children: Dict[str, List[str]] = {}
+            seen = set()
+            for group_name in groups:
+                parts = group_name.split("/")
+                for depth in range(1, len(parts) + 1):
+                    prefix = "/".join(parts[:depth])
+                    if prefix not in seen:
+                        seen.add(prefix)
+                        children.setdefault("/".join(parts[:depth - 1]), []).append(prefix)
+            for prefixes in children.values():
+                prefixes.sort()
+            self.after(0, lambda: apply(groups, children))
+        
+        def apply(groups: set, children: Dict[str, List[str]]) -> None:
+            if generation != self._generation:
+                return
+            self._groups = groups
+            self._children = children
+            self.lazy_tree.reset()
+        
+        threading.Thread(target=load, daemon=True).start()
+
+    def _load_children(self, prefix: str) -> List[TreeNode]:
+        """组名前缀的子节点：下一级前缀，以及该前缀本身是组时组内的文件（在后台线程中调用）"""
+        nodes = [
+            (child, child.rsplit("/", 1)[-1], child in self._children or child in self._groups, ())
+            for child in self._children.get(prefix, [])
+        ]
+        if prefix and prefix in self._groups:
+            nodes.extend(
+                (file_path, os.path.basename(file_path), False, ("file",))
+                for file_path in self.keil_project.list_group_files(prefix)
+            )
+        return nodes
+
+
+def show_refresh_preview(parent: tk.Misc, preview: RefreshPreview, on_apply: Callable[[], None]) -> None:
+    """
+    显示刷新预览窗口
+
+    Args:
+        parent: 父窗口
+        preview: 变更预览
+        on_apply: 点击 “应用刷新” 时调用
+    """
+    window = tk.Toplevel(parent)
+    window.title(f"刷新预览 - {preview.group_name}")
+    window.geometry("600x500")
+    window.columnconfigure(0, weight=1)
+    window.rowconfigure(1, weight=1)
+
+    files_added = sum(len(files) for files in preview.files_added.values())
+    files_removed = sum(len(files) for files in preview.files_removed.values())
+    summary = (f"新增 {len(preview.groups_added)} 个组，删除 {len(preview.groups_removed)} 个组，"
+               f"新增 {files_added} 个文件，移除 {files_removed} 个文件（扫描耗时 {preview.scan_time:.2f}s）")
+    if not preview.changed:
+        summary = "没有变化"
+    ttk.Label(window, text=summary).grid(row=0, column=0, sticky=tk.W, padx=10, pady=(10, 5))
+
+    changed_groups = sorted(
+        set(preview.groups_added) | set(preview.groups_removed)
+        | set(preview.files_added) | set(preview.files_removed)
+    )
+
+    def load_children(group_name: str) -> List[TreeNode]:
+        if not group_name:
+            nodes = []
+            for name in changed_groups:
+                if name in preview.groups_added:
+                    nodes.append((name, f"+ {name}", True, ("added",)))
+                elif name in preview.groups_removed:
+                    nodes.append((name, f"- {name}", True, ("removed",)))
+                else:
+                    nodes.append((name, f"~ {name}", True, ()))
+            return nodes
+        return (
+            [("", f"+ {file_name}", False, ("added",)) for file_name in preview.files_added.get(group_name, [])]
+            + [("", f"- {file_name}", False, ("removed",)) for file_name in preview.files_removed.get(group_name, [])]
+        )
+
+    lazy_tree = LazyTree(window, load_children)
+    lazy_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10)
+    lazy_tree.reset()
+
+    def apply() -> None:
+        window.destroy()
+        on_apply()
+
+    button_frame = ttk.Frame(window)
+    button_frame.grid(row=2, column=0, sticky=tk.E, padx=10, pady=10)
+    apply_button = ttk.Button(button_frame, text="应用刷新", command=apply)
+    apply_button.pack(side=tk.LEFT, padx=(0, 5))
+    if not preview.changed:
+        apply_button.state(["disabled"])
+    ttk.Button(button_frame, text="取消", command=window.destroy).pack(side=tk.LEFT)
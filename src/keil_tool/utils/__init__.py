@@ -1,21 +1,43 @@
 """
 工具函数包
+
+导出项在首次访问时才导入，构建前钩子的快速路径只加载用到的模块（如 git_index），
+不会连带导入 concurrent.futures、pathlib 等。
 """
 
-from .file_utils import (
-    normalize_path,
-    get_relative_path,
-    validate_regex_pattern,
-    get_subfolders,
-    find_files_by_extensions,
-    find_folders_with_files
-)
+import importlib
+
+_EXPORTS = {
+    "normalize_path": ".file_utils",
+    "get_relative_path": ".file_utils",
+    "validate_regex_pattern": ".file_utils",
+    "walk_directories": ".file_utils",
+    "walk_tree": ".file_utils",
+    "iter_subfolders": ".file_utils",
+    "get_subfolders": ".file_utils",
+    "find_files_by_extensions": ".file_utils",
+    "find_folders_with_files": ".file_utils",
+    "find_missing_paths": ".file_utils",
+    "find_git_repository": ".git_index",
+    "list_git_files": ".git_index",
+    "walk_git_files": ".git_index",
+    "file_lock": ".file_lock",
+    "ReadWriteLock": ".rw_lock",
+    "read_locked": ".rw_lock",
+    "write_locked": ".rw_lock",
+    "iter_in_background": ".pipeline",
+    "hash_file": ".fingerprint",
+    "hash_files": ".fingerprint",
+    "membership_digest": ".fingerprint",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "normalize_path",
-    "get_relative_path", 
-    "validate_regex_pattern",
-    "get_subfolders",
-    "find_files_by_extensions",
-    "find_folders_with_files"
-]
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
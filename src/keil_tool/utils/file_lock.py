@@ -0,0 +1,90 @@
+"""
+跨进程的建议性文件锁
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from ..constants import LOCK_FILE_SUFFIX, DEFAULT_LOCK_TIMEOUT
+from ..exceptions import FileOperationError
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _is_current(f, lock_path: str) -> bool:
+    """判断已加锁的文件是否仍是 lock_path 指向的文件（上一个持有者释放时可能已将其删除）"""
+    try:
+        current = os.stat(lock_path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = DEFAULT_LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    获取 path 对应的建议性锁（锁文件为 path + LOCK_FILE_SUFFIX，释放时删除）
+
+    只能协调同样使用该锁的工具实例，无法阻止 uVision 等其他程序写入。
+
+    Args:
+        path: 要保护的文件路径
+        timeout: 等待锁的最长秒数
+    """
+    lock_path = f"{path}{LOCK_FILE_SUFFIX}"
+    deadline = time.monotonic() + timeout
+    while True:
+        f = open(lock_path, "a+")
+        try:
+            _try_lock(f)
+        except OSError:
+            f.close()
+            if time.monotonic() >= deadline:
+                raise FileOperationError(f"等待文件锁超时: {lock_path}")
+            time.sleep(0.05)
+            continue
+        if _is_current(f, lock_path):
+            break
+        # 加锁前锁文件已被删除，锁住的是孤立的旧文件，重新打开
+        _unlock(f)
+        f.close()
+
+    try:
+        yield
+    finally:
+        if os.name == "nt":
+            # Windows 上无法删除仍被打开的文件，先释放再尝试删除；其他实例正打开时保留锁文件
+            _unlock(f)
+            f.close()
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+        else:
+            # 持锁期间删除，等待中的实例加锁后会发现文件已不是当前锁文件并重新打开
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            _unlock(f)
+            f.close()
@@ -5,7 +5,10 @@
 import os
 import re
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..constants import FILE_TYPE_MAP, DEFAULT_FOLLOW_SYMLINKS, DEFAULT_SCAN_BACKEND
+from .git_index import walk_git_files
 
 def normalize_path(path: str) -> str:
     """标准化路径"""
@@ -42,56 +45,197 @@ def validate_regex_pattern(pattern: str) -> bool:
     except re.error:
         return False
 
-def get_subfolders(path: str, max_depth: int) -> List[str]:
-    """获取指定深度的子文件夹"""
-    result = []
+def _file_identity(path: str) -> Tuple:
+    """文件或目录的物理标识 (st_dev, st_ino)，不支持 inode 的文件系统退化为真实路径"""
+    stat = os.stat(path)
+    if stat.st_ino:
+        return (stat.st_dev, stat.st_ino)
+    return (os.path.realpath(path),)
+
+def walk_directories(top: str, follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                     visited: Optional[Set[Tuple]] = None) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    自顶向下遍历目录，用法与 os.walk 相同（可通过修改 dirnames 剪枝）
+    
+    记录每个目录和文件的 (st_dev, st_ino)，同一物理目录只列出一次，通过不同链接路径
+    到达的同一文件也只返回一次，循环链接不会导致无限遍历。
+    
+    Args:
+        top: 起始目录
+        follow_symlinks: 是否进入指向目录的符号链接、返回指向文件的符号链接
+        visited: 已访问的物理标识集合，多次遍历共享同一集合即可跨遍历去重
+        
+    Returns:
+        (目录路径, 子目录名列表, 文件名列表) 迭代器
+    """
+    if visited is None:
+        visited = set()
+    
+    def walk(path: str, device: int) -> Iterator[Tuple[str, List[str], List[str]]]:
+        dirnames = []
+        filenames = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_link = entry.is_symlink()
+                        if is_link and not follow_symlinks:
+                            continue
+                        if entry.is_dir():
+                            dirnames.append(entry.name)
+                        elif entry.is_file():
+                            # 普通文件直接用 scandir 返回的 inode，只有链接才需要额外 stat
+                            if is_link or not entry.inode():
+                                identity = _file_identity(entry.path)
+                            else:
+                                identity = (device, entry.inode())
+                            if identity not in visited:
+                                visited.add(identity)
+                                filenames.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        
+        yield path, dirnames, filenames
+        
+        for dirname in dirnames:
+            child = os.path.join(path, dirname)
+            try:
+                identity = _file_identity(child)
+            except OSError:
+                continue
+            if identity in visited:
+                continue
+            visited.add(identity)
+            yield from walk(child, identity[0] if len(identity) == 2 else device)
+    
+    try:
+        top_identity = _file_identity(top)
+    except OSError:
+        return
+    if top_identity in visited:
+        return
+    visited.add(top_identity)
+    yield from walk(top, top_identity[0] if len(top_identity) == 2 else 0)
+
+def walk_tree(top: str, follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+              visited: Optional[Set[Tuple]] = None,
+              backend: str = DEFAULT_SCAN_BACKEND) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    按文件枚举后端遍历目录，用法与 walk_directories 相同
+    
+    Args:
+        backend: disk 遍历磁盘；git / git-untracked 读取 git 索引，top 不在 git 工作区中时退回 disk
+    """
+    if backend != "disk":
+        walker = walk_git_files(top, backend == "git-untracked", follow_symlinks, visited)
+        if walker is not None:
+            return walker
+    return walk_directories(top, follow_symlinks, visited)
+
+def iter_subfolders(path: str, max_depth: int, follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                    backend: str = DEFAULT_SCAN_BACKEND) -> Iterator[str]:
+    """逐个返回指定深度的子文件夹，边遍历边产出"""
     path = normalize_path(path)
     
-    for root, dirs, files in os.walk(path):
+    for root, dirs, files in walk_tree(path, follow_symlinks, backend=backend):
         depth = root[len(path):].count(os.sep)
         if depth < max_depth:
             # 如果没有子目录，添加当前目录
             if not dirs:
-                result.append(root)
+                yield normalize_path(root)
                 del dirs[:]
             # 如果达到最大深度-1，添加所有子目录
             if depth == max_depth - 1:
                 for dir_name in dirs:
-                    result.append(os.path.join(root, dir_name))
+                    yield normalize_path(os.path.join(root, dir_name))
                 del dirs[:]
         else:
             del dirs[:]
-    
-    return [normalize_path(p) for p in result]
 
-def find_files_by_extensions(directory: str, extensions: List[str]) -> List[dict]:
-    """根据扩展名查找文件"""
-    from ..constants import FILE_TYPE_MAP
+def get_subfolders(path: str, max_depth: int, follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                   backend: str = DEFAULT_SCAN_BACKEND) -> List[str]:
+    """获取指定深度的子文件夹"""
+    return list(iter_subfolders(path, max_depth, follow_symlinks, backend))
+
+def find_files_by_extensions(directory: str, extensions: List[str],
+                             follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                             visited: Optional[Set[Tuple]] = None,
+                             backend: str = DEFAULT_SCAN_BACKEND) -> List[dict]:
+    """
+    根据扩展名递归查找文件
     
+    Args:
+        directory: 起始目录
+        extensions: 文件扩展名列表
+        follow_symlinks: 是否跟随符号链接
+        visited: 已访问的物理标识集合，在多次调用间共享可避免重复返回同一文件
+        backend: 文件枚举后端，见 walk_tree
+    """
     file_info_list = []
-    directory_path = Path(directory)
     
-    for file_path in directory_path.rglob("*"):
-        if file_path.suffix in extensions:
-            file_info = {
-                "file_name": file_path.name,
-                "file_path": str(file_path),
-                "file_type": str(FILE_TYPE_MAP.get(file_path.suffix, 1))
-            }
-            file_info_list.append(file_info)
+    for root, dirs, files in walk_tree(directory, follow_symlinks, visited, backend):
+        for file_name in files:
+            suffix = os.path.splitext(file_name)[1]
+            if suffix in extensions:
+                file_info = {
+                    "file_name": file_name,
+                    "file_path": os.path.join(root, file_name),
+                    "file_type": str(FILE_TYPE_MAP.get(suffix, 1))
+                }
+                file_info_list.append(file_info)
     
     return file_info_list
 
-def find_folders_with_files(root_dir: str, extensions: List[str]) -> List[str]:
-    """查找包含指定扩展名文件的文件夹"""
+def find_folders_with_files(root_dir: str, extensions: List[str],
+                            follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                            backend: str = DEFAULT_SCAN_BACKEND) -> List[str]:
+    """查找包含指定扩展名文件的文件夹（不含 root_dir 本身）"""
     result = []
-    root_path = Path(root_dir)
+    root_path = os.path.abspath(root_dir)
     
-    for dir_path in root_path.rglob('*'):
-        if dir_path.is_dir():
-            for file_path in dir_path.glob('*'):
-                if file_path.is_file() and file_path.suffix in extensions:
-                    result.append(normalize_path(str(dir_path)))
-                    break
+    for dir_path, dirs, files in walk_tree(root_path, follow_symlinks, backend=backend):
+        if dir_path == root_path:
+            continue
+        if any(os.path.splitext(file_name)[1] in extensions for file_name in files):
+            result.append(normalize_path(dir_path))
     
     return result
+
+def find_missing_paths(paths: Iterable[str], directories: bool = False) -> Set[str]:
+    """
+    批量检查路径是否存在：按父目录分组，每个父目录只列一次，而不是对每个路径单独 stat
+    
+    Args:
+        paths: 绝对路径
+        directories: 是否要求路径是目录
+        
+    Returns:
+        不存在（或要求目录时不是目录）的路径集合
+    """
+    # 父目录 → {规范化的名称: 是否为目录}，父目录不存在时为 None
+    listings: Dict[str, Optional[Dict[str, bool]]] = {}
+    missing = set()
+    
+    for path in paths:
+        parent, name = os.path.split(os.path.normpath(path))
+        if not name:
+            # 根目录
+            if not os.path.isdir(path):
+                missing.add(path)
+            continue
+        
+        if parent not in listings:
+            try:
+                with os.scandir(parent) as entries:
+                    listings[parent] = {os.path.normcase(entry.name): entry.is_dir() for entry in entries}
+            except OSError:
+                listings[parent] = None
+        
+        listing = listings[parent]
+        is_dir = listing.get(os.path.normcase(name)) if listing is not None else None
+        if is_dir is None or (directories and not is_dir):
+            missing.add(path)
+    
+    return missing
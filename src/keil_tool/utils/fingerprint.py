@@ -0,0 +1,58 @@
+"""
+文件列表与文件内容指纹
+"""
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Mapping, Optional
+
+from ..constants import DEFAULT_SYNC_WORKERS
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """计算单个文件内容的哈希（blake2b-128）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(paths: Iterable[str], max_workers: int = DEFAULT_SYNC_WORKERS) -> Dict[str, str]:
+    """
+    在线程池中并发计算多个文件内容的哈希
+
+    Args:
+        paths: 文件路径
+        max_workers: 线程数
+
+    Returns:
+        文件路径 → 内容哈希
+    """
+    paths = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(hash_file, paths)))
+
+
+def membership_digest(groups: Mapping[str, Mapping[str, str]],
+                      content_hashes: Optional[Mapping[str, str]] = None) -> str:
+    """
+    计算组成员关系的指纹
+
+    Args:
+        groups: 组名 → {文件名: 文件路径}
+        content_hashes: 文件路径 → 内容哈希，提供时指纹同时覆盖文件内容
+
+    Returns:
+        十六进制指纹，与组、文件的顺序无关
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for group_name in sorted(groups):
+        digest.update(f"G\0{group_name}\0".encode("utf-8"))
+        for file_name, file_path in sorted(groups[group_name].items()):
+            digest.update(f"F\0{file_name}\0{file_path}\0".encode("utf-8"))
+            if content_hashes is not None:
+                digest.update(content_hashes.get(file_path, "").encode("ascii"))
+    return digest.hexdigest()
@@ -0,0 +1,383 @@
+"""
+从 git 索引枚举文件
+
+直接解析 .git/index（不调用 git 程序），一次顺序读取即可得到所有已跟踪文件，
+不会扫到构建输出和未跟踪的临时文件。可选地合并未跟踪且未被 .gitignore 忽略的文件。
+"""
+
+import bisect
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..constants import DEFAULT_FOLLOW_SYMLINKS
+
+_ENTRY_HEADER = struct.Struct(">10I")
+_MODE_TYPE_MASK = 0o170000
+_MODE_REGULAR = 0o100000
+_MODE_SYMLINK = 0o120000
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE = 0x3000
+_FLAG_NAME_MASK = 0x0FFF
+_EXTENDED_SKIP_WORKTREE = 0x4000
+
+# 索引文件路径 → (mtime_ns, size, [(相对路径, 是否符号链接)])，按路径排序
+_index_cache: Dict[str, Tuple[int, int, List[Tuple[str, bool]]]] = {}
+_cache_lock = threading.Lock()
+
+
+def find_git_repository(path: str) -> Optional[Tuple[str, str]]:
+    """
+    向上查找包含 path 的 git 工作区
+
+    Returns:
+        (工作区根目录, git 目录)，不在 git 工作区中时返回 None
+    """
+    current = os.path.realpath(path)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            # 子模块和 git worktree 的 .git 是一个指向真实 git 目录的文件
+            try:
+                with open(dot_git, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if content.startswith("gitdir:"):
+                git_dir = content[len("gitdir:"):].strip()
+                return current, os.path.normpath(os.path.join(current, git_dir))
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _object_id_size(git_dir: str) -> int:
+    """对象 ID 长度：默认 SHA-1（20 字节），仓库配置为 sha256 时为 32 字节"""
+    config_dirs = [git_dir]
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            config_dirs.append(os.path.normpath(os.path.join(git_dir, f.read().strip())))
+    except OSError:
+        pass
+    for config_dir in config_dirs:
+        try:
+            with open(os.path.join(config_dir, "config"), "r", encoding="utf-8") as f:
+                if re.search(r"^\s*objectformat\s*=\s*sha256\s*$", f.read(), re.MULTILINE | re.IGNORECASE):
+                    return 32
+        except OSError:
+            continue
+    return 20
+
+
+def parse_git_index(data: bytes, oid_size: int = 20) -> List[Tuple[str, bool]]:
+    """
+    解析 git 索引文件（版本 2、3、4）
+
+    跳过子模块、稀疏检出中不在工作区的条目，冲突文件只返回一次。
+
+    Args:
+        data: 索引文件内容
+        oid_size: 对象 ID 长度
+
+    Returns:
+        (相对工作区根目录的路径, 是否符号链接) 列表，按路径排序
+    """
+    if len(data) < 12 or data[:4] != b"DIRC":
+        raise ValueError("不是有效的 git 索引文件")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise ValueError(f"不支持的 git 索引版本: {version}")
+
+    entries = []
+    offset = 12
+    previous_name = b""
+    fixed_size = _ENTRY_HEADER.size + oid_size
+    for _ in range(count):
+        entry_start = offset
+        fields = _ENTRY_HEADER.unpack_from(data, offset)
+        mode = fields[6]
+        offset += fixed_size
+        (flags,) = struct.unpack_from(">H", data, offset)
+        offset += 2
+        extended_flags = 0
+        if flags & _FLAG_EXTENDED and version >= 3:
+            (extended_flags,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+        if version == 4:
+            # 路径前缀压缩：先去掉上一个路径末尾的 N 个字节，再接上本条目的后缀
+            byte = data[offset]
+            offset += 1
+            strip = byte & 0x7F
+            while byte & 0x80:
+                byte = data[offset]
+                offset += 1
+                strip = ((strip + 1) << 7) | (byte & 0x7F)
+            end = data.index(b"\0", offset)
+            name = previous_name[:len(previous_name) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            name_length = flags & _FLAG_NAME_MASK
+            if name_length == _FLAG_NAME_MASK:
+                end = data.index(b"\0", offset)
+            else:
+                end = offset + name_length
+            name = data[offset:end]
+            # 条目以 1~8 个 NUL 结尾，总长度为 8 的倍数
+            offset = entry_start + ((end - entry_start + 8) & ~7)
+        previous_name = name
+
+        if flags & _FLAG_STAGE and entries and entries[-1][0] == name:
+            continue
+        if extended_flags & _EXTENDED_SKIP_WORKTREE:
+            continue
+        file_type = mode & _MODE_TYPE_MASK
+        if file_type not in (_MODE_REGULAR, _MODE_SYMLINK):
+            continue
+        entries.append((name, file_type == _MODE_SYMLINK))
+
+    return [(name.decode("utf-8", "surrogateescape"), is_link) for name, is_link in entries]
+
+
+def read_git_index(git_dir: str) -> List[Tuple[str, bool]]:
+    """
+    读取 git 目录中的索引，索引文件未变化时使用缓存
+
+    Returns:
+        (相对工作区根目录的路径, 是否符号链接) 列表，按路径排序
+    """
+    index_path = os.path.join(git_dir, "index")
+    stat = os.stat(index_path)
+    with _cache_lock:
+        cached = _index_cache.get(index_path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+    with open(index_path, "rb") as f:
+        data = f.read()
+    entries = parse_git_index(data, _object_id_size(git_dir))
+    entries.sort()
+
+    with _cache_lock:
+        _index_cache[index_path] = (stat.st_mtime_ns, stat.st_size, entries)
+    return entries
+
+
+def _translate_ignore_pattern(pattern: str) -> str:
+    """把 .gitignore 通配符转换为正则表达式"""
+    result = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            result.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            result.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            result.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                result.append(re.escape("["))
+                i += 1
+            else:
+                content = pattern[i + 1:end]
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                result.append(f"[{content}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(result)
+
+
+class GitIgnore:
+    """.gitignore 规则匹配（支持取反、仅目录、锚定和 ** 通配）"""
+
+    def __init__(self):
+        # (所在目录相对路径, 正则, 是否取反, 是否仅匹配目录)
+        self._rules: List[Tuple[str, re.Pattern, bool, bool]] = []
+
+    def add_file(self, ignore_file: str, base: str) -> None:
+        """
+        读取一个忽略规则文件
+
+        Args:
+            ignore_file: 规则文件路径
+            base: 规则文件所在目录相对工作区根目录的路径，根目录为 ""
+        """
+        try:
+            with open(ignore_file, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                # 含有斜杠的规则相对规则文件所在目录锚定
+                regex = _translate_ignore_pattern(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _translate_ignore_pattern(line)
+            self._rules.append((base, re.compile(f"{regex}$"), negate, dir_only))
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """判断相对工作区根目录的路径是否被忽略，后面的规则优先"""
+        for base, regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(f"{base}/"):
+                    continue
+                relative = path[len(base) + 1:]
+            else:
+                relative = path
+            if regex.match(relative):
+                return not negate
+        return False
+
+
+def _find_untracked(worktree: str, git_dir: str, prefix: str, tracked: Set[str]) -> List[Tuple[str, bool]]:
+    """遍历 prefix 目录，返回未跟踪且未被忽略的文件"""
+    ignore = GitIgnore()
+    ignore.add_file(os.path.join(git_dir, "info", "exclude"), "")
+    # prefix 的各级上级目录中的 .gitignore 同样生效
+    parts = prefix.split("/") if prefix else []
+    for depth in range(len(parts)):
+        base = "/".join(parts[:depth])
+        ignore.add_file(os.path.join(worktree, base, ".gitignore"), base)
+
+    untracked = []
+    start = os.path.join(worktree, prefix) if prefix else worktree
+    for dir_path, dir_names, file_names in os.walk(start):
+        relative_dir = os.path.relpath(dir_path, worktree).replace("\\", "/")
+        relative_dir = "" if relative_dir == "." else relative_dir
+        if ".gitignore" in file_names:
+            ignore.add_file(os.path.join(dir_path, ".gitignore"), relative_dir)
+
+        def relative(name: str) -> str:
+            return f"{relative_dir}/{name}" if relative_dir else name
+
+        dir_names[:] = [
+            name for name in dir_names
+            if name != ".git" and not ignore.is_ignored(relative(name), True)
+        ]
+        for name in file_names:
+            path = relative(name)
+            if path not in tracked and not ignore.is_ignored(path, False):
+                untracked.append((path, os.path.islink(os.path.join(dir_path, name))))
+    return untracked
+
+
+def list_git_files(top: str, include_untracked: bool = False) -> Optional[List[Tuple[str, bool]]]:
+    """
+    列出 top 目录下 git 跟踪的文件
+
+    Args:
+        top: 起始目录
+        include_untracked: 是否合并未跟踪且未被忽略的文件
+
+    Returns:
+        (相对 top 的路径, 是否符号链接) 列表，按路径排序；top 不在 git 工作区中时返回 None
+    """
+    repository = find_git_repository(top)
+    if repository is None:
+        return None
+    worktree, git_dir = repository
+    try:
+        entries = read_git_index(git_dir)
+    except FileNotFoundError:
+        # 还没有提交过任何文件的新仓库
+        entries = []
+
+    prefix = os.path.relpath(os.path.realpath(top), worktree).replace("\\", "/")
+    prefix = "" if prefix == "." else prefix
+
+    if prefix:
+        # 索引按路径排序，二分查找 prefix 目录下的条目
+        start = bisect.bisect_left(entries, (f"{prefix}/",))
+        end = bisect.bisect_left(entries, (f"{prefix}0",))
+        selected = entries[start:end]
+    else:
+        selected = entries
+
+    if include_untracked:
+        tracked = {path for path, _ in selected}
+        selected = sorted(selected + _find_untracked(worktree, git_dir, prefix, tracked))
+
+    skip = len(prefix) + 1 if prefix else 0
+    return [(path[skip:], is_link) for path, is_link in selected]
+
+
+def walk_git_files(top: str, include_untracked: bool = False,
+                   follow_symlinks: bool = DEFAULT_FOLLOW_SYMLINKS,
+                   visited: Optional[Set[Tuple]] = None) -> Optional[Iterator[Tuple[str, List[str], List[str]]]]:
+    """
+    按 git 索引自顶向下遍历目录，用法与 walk_directories 相同（可通过修改 dirnames 剪枝）
+
+    Args:
+        top: 起始目录
+        include_untracked: 是否合并未跟踪且未被忽略的文件
+        follow_symlinks: 是否返回被跟踪的、指向文件的符号链接
+        visited: 已返回的文件集合，多次遍历共享同一集合即可跨遍历去重
+
+    Returns:
+        (目录路径, 子目录名列表, 文件名列表) 迭代器；top 不在 git 工作区中时返回 None
+    """
+    files = list_git_files(top, include_untracked)
+    if files is None:
+        return None
+    if visited is None:
+        visited = set()
+
+    # 由文件列表构建目录树：目录名 → (子目录树, 文件名列表)
+    tree: Tuple[Dict, List[str]] = ({}, [])
+    for path, is_link in files:
+        if is_link and not (follow_symlinks and os.path.isfile(os.path.join(top, path))):
+            continue
+        *dir_parts, file_name = path.split("/")
+        node = tree
+        for part in dir_parts:
+            node = node[0].setdefault(part, ({}, []))
+        node[1].append(file_name)
+
+    def walk(path: str, node: Tuple[Dict, List[str]]) -> Iterator[Tuple[str, List[str], List[str]]]:
+        dir_names = list(node[0])
+        file_names = []
+        for file_name in node[1]:
+            identity = ("git", os.path.normcase(os.path.join(path, file_name)))
+            if identity not in visited:
+                visited.add(identity)
+                file_names.append(file_name)
+        yield path, dir_names, file_names
+        for dir_name in dir_names:
+            if dir_name in node[0]:
+                yield from walk(os.path.join(path, dir_name), node[0][dir_name])
+
+    return walk(top, tree)
@@ -0,0 +1,59 @@
+"""
+后台流水线
+"""
+
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+from ..constants import DEFAULT_PIPELINE_QUEUE_SIZE
+
+T = TypeVar("T")
+
+_END = object()
+
+
+def iter_in_background(iterable: Iterable[T], maxsize: int = DEFAULT_PIPELINE_QUEUE_SIZE) -> Iterator[T]:
+    """
+    在后台线程中消费 iterable，通过有界队列把结果逐个交给调用方
+
+    生产（如遍历文件系统）与消费（如修改 XML）重叠执行，总耗时接近两者中的较大值；
+    队列有界，生产者领先过多时会阻塞，内存占用不随目录规模增长。生产者抛出的异常
+    会在调用方重新抛出；调用方提前结束迭代时生产者随之停止。
+
+    Args:
+        iterable: 要在后台执行的可迭代对象（通常是生成器）
+        maxsize: 队列容量
+    """
+    items: queue.Queue = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as e:
+            put((_END, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
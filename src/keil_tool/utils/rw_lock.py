@@ -0,0 +1,114 @@
+"""
+读写锁
+
+KeilProject 的多个操作可能在不同线程中同时执行（GUI 为每个操作启动线程）。
+只读查询之间可以并发，修改 XML 的操作独占；等待中的写操作优先，避免持续的读操作让写操作饿死。
+同一线程持有写锁时可以再次获取读锁或写锁；持有读锁时不能升级为写锁。
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class ReadWriteLock:
+    """写优先、可重入的读写锁"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        # 每个线程持有的读锁层数，以及持有写锁期间获取的读锁层数
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        """获取读锁"""
+        local = self._local
+        if self._writer == threading.get_ident():
+            local.nested_reads = getattr(local, "nested_reads", 0) + 1
+            return
+        reads = getattr(local, "reads", 0)
+        if not reads:
+            with self._cond:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+        local.reads = reads + 1
+
+    def release_read(self) -> None:
+        """释放读锁"""
+        local = self._local
+        if getattr(local, "nested_reads", 0):
+            local.nested_reads -= 1
+            return
+        local.reads -= 1
+        if not local.reads:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        """获取写锁"""
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("持有读锁时不能获取写锁")
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """释放写锁"""
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """在读锁内执行"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """在写锁内执行"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def read_locked(func: Callable) -> Callable:
+    """在对象的 _rw_lock 读锁内执行方法"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._rw_lock.read():
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def write_locked(func: Callable) -> Callable:
+    """在对象的 _rw_lock 写锁内执行方法"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._rw_lock.write():
+            return func(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,48 @@
+"""
+测试公用的夹具
+"""
+
+import os
+
+import pytest
+
+PROJECT_TEMPLATE = """<?xml version="1.0" encoding="UTF-8" standalone="no" ?>
+<Project>
+  <Targets>
+    <Target>
+      <TargetOption>
+        <TargetArmAds>
+          <Cads>
+            <VariousControls>
+              <IncludePath></IncludePath>
+            </VariousControls>
+          </Cads>
+        </TargetArmAds>
+      </TargetOption>
+      <Groups>
+        <Group>
+          <GroupName>::CMSIS</GroupName>
+        </Group>
+      </Groups>
+    </Target>
+  </Targets>
+</Project>
+"""
+
+
+def write_files(root: str, paths: list) -> None:
+    """在 root 下创建空文件，自动创建所在目录"""
+    for path in paths:
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        open(full_path, "w").close()
+
+
+@pytest.fixture
+def project_file(tmp_path) -> str:
+    """tmp_path/proj 下的最小 .uvprojx，只包含一个 RTE 组"""
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    path = project_dir / "test.uvprojx"
+    path.write_text(PROJECT_TEMPLATE, encoding="utf-8")
+    return str(path)
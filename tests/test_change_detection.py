@@ -0,0 +1,52 @@
+"""
+刷新前的变化检测（list/content）
+"""
+
+import os
+
+import pytest
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+
+def _open(project_file: str, mode: str, messages: list) -> KeilProject:
+    project = KeilProject(callback_func=messages.append, change_detection=mode)
+    assert project.set_project_file(project_file)
+    return project
+
+
+@pytest.mark.parametrize("mode", ["list", "content"])
+def test_content_only_change_does_not_rewrite_project(tmp_path, project_file, mode):
+    source_dir = str(tmp_path / "src")
+    write_files(source_dir, ["app/app.c", "app/app.h"])
+    messages = []
+    project = _open(project_file, mode, messages)
+    assert project.refresh_group("SRC", source_dir)
+    saved = os.stat(project_file).st_mtime_ns
+
+    with open(os.path.join(source_dir, "app", "app.c"), "w") as f:
+        f.write("int main(void) { return 0; }\n")
+    assert project.refresh_group("SRC", source_dir)
+
+    assert os.stat(project_file).st_mtime_ns == saved
+    assert "组 'SRC' 未发生变化，跳过刷新" in messages
+    if mode == "content":
+        assert "组 'SRC' 的文件内容有变化，组成员未变，无需修改项目" in messages
+
+
+@pytest.mark.parametrize("mode", ["list", "content"])
+def test_membership_change_rewrites_project(tmp_path, project_file, mode):
+    source_dir = str(tmp_path / "src")
+    write_files(source_dir, ["app/app.c"])
+    project = _open(project_file, mode, [])
+    assert project.refresh_group("SRC", source_dir)
+
+    write_files(source_dir, ["app/extra.c"])
+    assert project.refresh_group("SRC", source_dir)
+
+    files = sorted(os.path.basename(path) for path in project.list_group_files("SRC/app"))
+    assert files == ["app.c", "extra.c"]
+    reloaded = _open(project_file, mode, [])
+    assert sorted(os.path.basename(path) for path in reloaded.list_group_files("SRC/app")) == files
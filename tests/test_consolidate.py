@@ -0,0 +1,51 @@
+"""
+子组合并
+"""
+
+from keil_tool.core.consolidate import consolidate_groups
+
+
+def _files(*names: str) -> list:
+    return [{"file_name": name} for name in names]
+
+
+def _summary(result: list) -> list:
+    return [(name, sorted(file_info["file_name"] for file_info in files)) for name, files in result]
+
+
+SCAN = [
+    ("SDK/hal/uart", _files("uart.c")),
+    ("SDK/hal/spi", _files("spi.c", "spi_dma.c")),
+    ("SDK/app", _files("main.c", "app.c", "cli.c")),
+]
+
+
+def test_no_limits_returns_scan_unchanged():
+    assert consolidate_groups("SDK", SCAN) is SCAN
+
+
+def test_small_groups_merge_upwards():
+    # uart 并入 SDK/hal 后仍不足 2 个文件，继续并入根组
+    result = consolidate_groups("SDK", SCAN, min_group_files=2)
+    assert _summary(result) == [
+        ("SDK", ["uart.c"]),
+        ("SDK/hal/spi", ["spi.c", "spi_dma.c"]),
+        ("SDK/app", ["app.c", "cli.c", "main.c"]),
+    ]
+
+
+def test_max_group_depth():
+    result = consolidate_groups("SDK", SCAN, max_group_depth=1)
+    assert [name for name, _ in result] == ["SDK/hal", "SDK/app"]
+
+
+def test_max_groups():
+    result = consolidate_groups("SDK", SCAN, max_groups=1)
+    assert _summary(result) == [("SDK", ["app.c", "cli.c", "main.c", "spi.c", "spi_dma.c", "uart.c"])]
+
+
+def test_merge_skipped_when_file_names_collide():
+    scan = [("SDK/a", _files("util.c")), ("SDK/b", _files("util.c"))]
+    result = consolidate_groups("SDK", scan, max_groups=1)
+    assert sum(len(files) for _, files in result) == 2
+    assert all(len({f["file_name"] for f in files}) == len(files) for _, files in result)
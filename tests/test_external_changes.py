@@ -0,0 +1,65 @@
+"""
+保存前合并外部修改
+"""
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+
+def _open(project_file: str) -> KeilProject:
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    return project
+
+
+def test_refresh_is_replayed_on_externally_modified_project(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h"])
+    write_files(str(tmp_path / "ext"), ["lib/lib.c", "lib/lib.h"])
+    project = _open(project_file)
+
+    # 另一个实例（相当于 uVision）在本实例加载之后修改了项目文件
+    other = _open(project_file)
+    assert other.refresh_group("EXT", str(tmp_path / "ext"))
+    external_paths = other.list_include_paths()
+
+    assert project.refresh_group("SRC", str(tmp_path / "src"))
+    assert project.list_groups() == ["::CMSIS", "EXT/lib", "SRC/app"]
+
+    reopened = _open(project_file)
+    assert reopened.list_groups() == ["::CMSIS", "EXT/lib", "SRC/app"]
+    include_paths = reopened.list_include_paths()
+    assert include_paths[:len(external_paths)] == external_paths
+    assert len(include_paths) == len(external_paths) + 1
+    assert include_paths[-1].replace("\\", "/").endswith("src/app")
+
+
+def test_replayed_delete_keeps_include_paths(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h"])
+    write_files(str(tmp_path / "ext"), ["lib/lib.c"])
+    project = _open(project_file)
+    assert project.refresh_group("SRC", str(tmp_path / "src"))
+    include_paths = project.list_include_paths()
+
+    other = _open(project_file)
+    assert other.refresh_group("EXT", str(tmp_path / "ext"))
+
+    # 删除组不维护头文件路径，重放到新内容上时也不能移除
+    assert project.delete_existing_groups("^SRC/")
+    reopened = _open(project_file)
+    assert reopened.list_groups() == ["::CMSIS", "EXT/lib"]
+    assert reopened.list_include_paths() == include_paths
+
+
+def test_undo_after_external_modification(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c"])
+    write_files(str(tmp_path / "ext"), ["lib/lib.c"])
+    project = _open(project_file)
+    assert project.refresh_group("SRC", str(tmp_path / "src"))
+
+    other = _open(project_file)
+    assert other.refresh_group("EXT", str(tmp_path / "ext"))
+
+    # 撤销同样重放到外部修改后的内容上，保留外部新增的组
+    assert project.undo()
+    assert _open(project_file).list_groups() == ["::CMSIS", "EXT/lib"]
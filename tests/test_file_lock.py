@@ -0,0 +1,51 @@
+"""
+跨进程文件锁
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from keil_tool.exceptions import FileOperationError
+from keil_tool.utils.file_lock import file_lock
+
+
+def test_lock_file_removed_after_release(tmp_path):
+    path = str(tmp_path / "test.uvprojx")
+    with file_lock(path):
+        assert os.path.exists(f"{path}.lock")
+    assert not os.path.exists(f"{path}.lock")
+
+
+def test_lock_excludes_concurrent_holders(tmp_path):
+    path = str(tmp_path / "test.uvprojx")
+    holders = []
+    overlaps = []
+
+    def worker():
+        for _ in range(20):
+            with file_lock(path, timeout=10):
+                holders.append(1)
+                if len(holders) > 1:
+                    overlaps.append(1)
+                time.sleep(0.001)
+                holders.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not overlaps
+    assert not os.path.exists(f"{path}.lock")
+
+
+def test_lock_timeout(tmp_path):
+    path = str(tmp_path / "test.uvprojx")
+    with file_lock(path):
+        with pytest.raises(FileOperationError):
+            with file_lock(path, timeout=0.1):
+                pass
@@ -0,0 +1,108 @@
+"""
+解析 git 索引
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from keil_tool.utils.git_index import list_git_files, parse_git_index
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git 生成索引文件")
+
+FILES = [
+    "Core/Src/main.c",
+    "Core/Src/stm32f4xx_it.c",
+    "Core/Inc/main.h",
+    "Drivers/STM32F4xx_HAL_Driver/Src/stm32f4xx_hal.c",
+    "Drivers/STM32F4xx_HAL_Driver/Src/stm32f4xx_hal_uart.c",
+    "Drivers/STM32F4xx_HAL_Driver/Inc/Legacy/stm32_hal_legacy.h",
+    "README.md",
+]
+
+
+def _git(repo: str, *args: str) -> None:
+    subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path) -> str:
+    """包含 FILES 的 git 仓库，所有文件已加入索引"""
+    repo = str(tmp_path / "repo")
+    for path in FILES:
+        full_path = os.path.join(repo, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(path)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    return repo
+
+
+def _read_index(repo: str, version: int) -> bytes:
+    _git(repo, "update-index", "--index-version", str(version))
+    with open(os.path.join(repo, ".git", "index"), "rb") as f:
+        data = f.read()
+    assert int.from_bytes(data[4:8], "big") == version
+    return data
+
+
+@pytest.mark.parametrize("version", [2, 4])
+def test_parse_index_versions(repo, version):
+    entries = parse_git_index(_read_index(repo, version))
+    assert entries == [(path, False) for path in sorted(FILES)]
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_extended_flags(repo, version):
+    # 带扩展标志的条目只能写入版本 3 及以上的索引：intent-to-add 的文件照常收录，
+    # 稀疏检出中不在工作区的（skip-worktree）文件跳过
+    with open(os.path.join(repo, "Core", "Src", "new.c"), "w", encoding="utf-8"):
+        pass
+    _git(repo, "add", "--intent-to-add", "Core/Src/new.c")
+    _git(repo, "update-index", "--skip-worktree", "README.md")
+    entries = parse_git_index(_read_index(repo, version))
+    expected = sorted([path for path in FILES if path != "README.md"] + ["Core/Src/new.c"])
+    assert entries == [(path, False) for path in expected]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="需要创建符号链接")
+def test_symlinks_are_flagged(repo):
+    os.symlink("main.c", os.path.join(repo, "Core", "Src", "link.c"))
+    _git(repo, "add", ".")
+    entries = dict(parse_git_index(_read_index(repo, 4)))
+    assert entries["Core/Src/link.c"] is True
+    assert entries["Core/Src/main.c"] is False
+
+
+def test_invalid_index_is_rejected(repo):
+    data = _read_index(repo, 2)
+    with pytest.raises(ValueError):
+        parse_git_index(b"NOPE" + data[4:])
+    with pytest.raises(ValueError):
+        parse_git_index(data[:4] + (5).to_bytes(4, "big") + data[8:])
+
+
+def test_list_git_files_under_subdirectory(repo):
+    _read_index(repo, 4)
+    driver_dir = os.path.join(repo, "Drivers", "STM32F4xx_HAL_Driver")
+    with open(os.path.join(driver_dir, "Src", "untracked.c"), "w", encoding="utf-8"):
+        pass
+    with open(os.path.join(repo, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("*.o\n")
+    with open(os.path.join(driver_dir, "Src", "build.o"), "w", encoding="utf-8"):
+        pass
+
+    assert list_git_files(driver_dir) == [
+        ("Inc/Legacy/stm32_hal_legacy.h", False),
+        ("Src/stm32f4xx_hal.c", False),
+        ("Src/stm32f4xx_hal_uart.c", False),
+    ]
+    assert [path for path, _ in list_git_files(driver_dir, include_untracked=True)] == [
+        "Inc/Legacy/stm32_hal_legacy.h",
+        "Src/stm32f4xx_hal.c",
+        "Src/stm32f4xx_hal_uart.c",
+        "Src/untracked.c",
+    ]
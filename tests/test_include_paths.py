@@ -0,0 +1,63 @@
+"""
+按头文件目录引用计数维护 IncludePath
+"""
+
+import os
+import shutil
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+HAL_FILES = ["Inc/stm32.h", "Inc/Legacy/old.h", "Src/hal.c"]
+
+
+def _open(project_file: str) -> KeilProject:
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    return project
+
+
+def test_refresh_adds_parent_header_directories(tmp_path, project_file):
+    hal = str(tmp_path / "hal")
+    write_files(hal, HAL_FILES)
+    project = _open(project_file)
+    assert project.refresh_group("HAL", hal)
+
+    # Inc 只有 Legacy 子目录成为组，其中的头文件仍需加入 IncludePath
+    assert project.list_groups() == ["::CMSIS", "HAL/Inc/Legacy", "HAL/Src"]
+    assert project.list_include_paths() == ["../hal/Inc", "../hal/Inc/Legacy"]
+
+
+def test_refresh_removes_directories_without_headers(tmp_path, project_file):
+    hal = str(tmp_path / "hal")
+    write_files(hal, HAL_FILES)
+    project = _open(project_file)
+    assert project.refresh_group("HAL", hal)
+
+    shutil.rmtree(os.path.join(hal, "Inc", "Legacy"))
+    assert project.refresh_group("HAL", hal)
+
+    assert project.list_include_paths() == ["../hal/Inc"]
+
+
+def test_non_scan_operations_keep_include_paths(tmp_path, project_file):
+    hal = str(tmp_path / "hal")
+    write_files(hal, HAL_FILES)
+    assert _open(project_file).refresh_group("HAL", hal)
+
+    # 用户在 uVision 中手动添加的路径
+    with open(project_file, encoding="utf-8") as f:
+        data = f.read()
+    with open(project_file, "w", encoding="utf-8") as f:
+        f.write(data.replace("../hal/Inc/Legacy</IncludePath>", "../hal/Inc/Legacy;../manual</IncludePath>"))
+    expected = ["../hal/Inc", "../hal/Inc/Legacy", "../manual"]
+
+    project = _open(project_file)
+    assert project.rename_groups("HAL", "BSP/HAL")
+    assert project.list_include_paths() == expected
+    assert project.delete_existing_groups("^BSP/")
+    assert project.list_include_paths() == expected
+    assert project.undo()
+    assert project.list_include_paths() == expected
+    assert _open(project_file).list_include_paths() == expected
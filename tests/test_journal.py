@@ -0,0 +1,110 @@
+"""
+撤销日志
+"""
+
+import os
+
+import pytest
+from lxml import etree
+
+from keil_tool.core import KeilProject
+from keil_tool.core.journal import invert_delta
+
+from conftest import write_files
+
+
+def _refresh(project: KeilProject, tmp_path) -> None:
+    write_files(str(tmp_path / "src"), ["app/app.c"])
+    assert project.refresh_group("SRC", str(tmp_path / "src"))
+
+
+def test_journal_kept_in_memory_by_default(tmp_path, project_file):
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    _refresh(project, tmp_path)
+
+    assert not os.path.exists(f"{project_file}.journal.jsonl")
+    assert project.undo()
+    assert project.list_groups() == ["::CMSIS"]
+
+
+def test_persisted_journal_survives_reopen(tmp_path, project_file):
+    project = KeilProject(callback_func=lambda message: None, persist_journal=True)
+    assert project.set_project_file(project_file)
+    _refresh(project, tmp_path)
+    assert os.path.exists(f"{project_file}.journal.jsonl")
+
+    reopened = KeilProject(callback_func=lambda message: None, persist_journal=True)
+    assert reopened.set_project_file(project_file)
+    assert reopened.undo()
+    assert reopened.list_groups() == ["::CMSIS"]
+
+
+def _snapshot(project: KeilProject) -> bytes:
+    """规范化的项目 XML，空元素的两种写法视为相同"""
+    return etree.tostring(project.etree_root, method="c14n")
+
+
+def test_invert_delta():
+    file_xml = "<File><FileName>app.c</FileName><FileType>1</FileType><FilePath>app.c</FilePath></File>"
+    assert invert_delta({"op": "add_group", "group": "SRC", "index": 1}) == \
+        {"op": "remove_group", "group": "SRC", "index": 1}
+    assert invert_delta({"op": "remove_group", "group": "SRC", "index": 1, "xml": "<Group/>"}) == \
+        {"op": "insert_group", "index": 1, "xml": "<Group/>"}
+    assert invert_delta({"op": "add_file", "group": "SRC", "name": "app.c", "type": 1, "path": "app.c"}) == \
+        {"op": "remove_file", "group": "SRC", "name": "app.c"}
+    assert invert_delta({"op": "remove_file", "group": "SRC", "name": "app.c", "index": 0, "xml": file_xml}) == \
+        {"op": "insert_file", "group": "SRC", "index": 0, "xml": file_xml}
+    assert invert_delta({"op": "insert_file", "group": "SRC", "index": 0, "xml": file_xml}) == \
+        {"op": "remove_file", "group": "SRC", "name": "app.c"}
+    assert invert_delta({"op": "rename_group", "old": "A", "new": "B"}) == \
+        {"op": "rename_group", "old": "B", "new": "A"}
+    assert invert_delta({"op": "set_include_paths", "old": "a", "new": "a;b"}) == \
+        {"op": "set_include_paths", "old": "a;b", "new": "a"}
+    assert invert_delta({"op": "set_option", "group": "SRC", "name": None, "old": "<x/>", "new": "<y/>"}) == \
+        {"op": "set_option", "group": "SRC", "name": None, "old": "<y/>", "new": "<x/>"}
+    with pytest.raises(ValueError):
+        invert_delta({"op": "unknown"})
+
+
+def test_undo_redo_restores_each_operation(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h", "drivers/uart.c", "tests/test_app.c"])
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+
+    operations = [
+        lambda: project.refresh_group("SRC", str(tmp_path / "src")),
+        lambda: project.set_include_in_build(["^SRC/tests$"], False),
+        lambda: project.rename_groups("SRC", "BSP"),
+        lambda: project.delete_existing_groups("^BSP/drivers$"),
+    ]
+    snapshots = [_snapshot(project)]
+    for operation in operations:
+        assert operation()
+        snapshots.append(_snapshot(project))
+    assert project.list_groups() == ["::CMSIS", "BSP/app", "BSP/tests"]
+
+    for snapshot in reversed(snapshots[:-1]):
+        assert project.undo()
+        assert _snapshot(project) == snapshot
+    assert not project.undo()
+    assert project.list_include_paths() == []
+
+    for snapshot in snapshots[1:]:
+        assert project.redo()
+        assert _snapshot(project) == snapshot
+    assert not project.redo()
+
+    # 撤销/重做同样写入项目文件
+    reopened = KeilProject(callback_func=lambda message: None)
+    assert reopened.set_project_file(project_file)
+    assert _snapshot(reopened) == snapshots[-1]
+
+
+def test_new_operation_clears_redo(tmp_path, project_file):
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    _refresh(project, tmp_path)
+    assert project.undo()
+    assert project.delete_existing_groups("^::CMSIS$")
+    assert not project.redo()
@@ -0,0 +1,51 @@
+"""
+打开项目时的预扫描
+"""
+
+import os
+import time
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+
+def _refresh_then_reopen(project_file: str, source_dir: str) -> KeilProject:
+    """刷新一次以记录扫描参数，再用新实例打开项目并等待预扫描完成"""
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    assert project.refresh_group("SRC", source_dir)
+
+    reopened = KeilProject(callback_func=lambda message: None)
+    assert reopened.set_project_file(project_file, prefetch=True)
+    for future in reopened._prefetched.values():
+        future.result()
+    return reopened
+
+
+def test_prefetched_scan_is_used_when_tree_is_unchanged(tmp_path, project_file, monkeypatch):
+    source_dir = str(tmp_path / "src")
+    write_files(source_dir, ["app/app.c", "app/app.h"])
+    project = _refresh_then_reopen(project_file, source_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("预扫描结果有效时不应重新扫描")
+
+    monkeypatch.setattr(project, "_stream_group_scan", fail)
+    assert project.refresh_group("SRC", source_dir)
+    assert project.list_groups() == ["::CMSIS", "SRC/app"]
+
+
+def test_prefetched_scan_is_discarded_after_files_change(tmp_path, project_file):
+    source_dir = str(tmp_path / "src")
+    write_files(source_dir, ["app/app.c", "app/app.h"])
+    project = _refresh_then_reopen(project_file, source_dir)
+
+    # 预扫描完成后新增文件和目录，目录的 mtime 随之变化
+    time.sleep(0.01)
+    write_files(source_dir, ["app/extra.c", "drivers/uart.c"])
+    assert project.refresh_group("SRC", source_dir)
+
+    assert project.list_groups() == ["::CMSIS", "SRC/app", "SRC/drivers"]
+    app_files = [os.path.basename(path) for path in project.list_group_files("SRC/app")]
+    assert sorted(app_files) == ["app.c", "app.h", "extra.c"]
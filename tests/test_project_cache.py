@@ -0,0 +1,53 @@
+"""
+最近项目缓存
+"""
+
+from keil_tool.core import KeilProject, ProjectCache
+
+from conftest import PROJECT_TEMPLATE, write_files
+
+
+def _other_project(tmp_path) -> str:
+    path = tmp_path / "other" / "other.uvprojx"
+    path.parent.mkdir()
+    path.write_text(PROJECT_TEMPLATE, encoding="utf-8")
+    return str(path)
+
+
+def test_switching_back_reuses_tree_and_prefetched_scans(tmp_path, project_file, monkeypatch):
+    source_dir = str(tmp_path / "src")
+    write_files(source_dir, ["app/app.c", "app/app.h"])
+    seed = KeilProject(callback_func=lambda message: None)
+    assert seed.set_project_file(project_file)
+    assert seed.refresh_group("SRC", source_dir)
+
+    project = KeilProject(callback_func=lambda message: None, project_cache=ProjectCache())
+    assert project.set_project_file(project_file, prefetch=True)
+    tree = project.etree_root
+    for future in project._prefetched.values():
+        future.result()
+
+    assert project.set_project_file(_other_project(tmp_path), prefetch=True)
+    assert not project._prefetched
+
+    def fail(*args, **kwargs):
+        raise AssertionError("切回项目时应使用缓存的预扫描结果")
+
+    monkeypatch.setattr(project, "_stream_group_scan", fail)
+    monkeypatch.setattr(project, "_prefetch_scan", fail)
+    assert project.set_project_file(project_file, prefetch=True)
+    assert project.etree_root is tree
+    assert project.refresh_group("SRC", source_dir)
+    assert project.list_groups() == ["::CMSIS", "SRC/app"]
+
+
+def test_modified_project_is_parsed_again(tmp_path, project_file):
+    project = KeilProject(callback_func=lambda message: None, project_cache=ProjectCache())
+    assert project.set_project_file(project_file)
+    tree = project.etree_root
+    assert project.set_project_file(_other_project(tmp_path))
+
+    with open(project_file, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert project.set_project_file(project_file)
+    assert project.etree_root is not tree
@@ -0,0 +1,138 @@
+"""
+读写锁与 KeilProject 并发读写的测试
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from keil_tool.core import KeilProject
+from keil_tool.utils import ReadWriteLock
+
+from conftest import write_files
+
+# 压力测试的持续时间（秒）
+STRESS_DURATION = 2.0
+
+
+def _start(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def reader():
+        with lock.read():
+            # 三个读线程必须同时持有读锁才能通过屏障
+            inside.wait()
+
+    threads = [_start(reader) for _ in range(3)]
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_write()
+    thread = _start(lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+    time.sleep(0.1)
+    assert events == []
+    events.append("write done")
+    lock.release_write()
+    thread.join(5)
+    assert events == ["write done", "read"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+    writer = _start(lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+    time.sleep(0.1)
+    # 写线程正在等待，新的读线程排在它之后
+    reader = _start(lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+    time.sleep(0.1)
+    assert events == []
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+    assert events == ["write", "read"]
+
+
+def test_reentrant_for_the_writing_thread():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    # 完全释放后其他线程可以获取写锁
+    thread = _start(lambda: lock.write().__enter__())
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_cannot_upgrade_read_to_write():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+
+def test_concurrent_readers_and_writers(tmp_path, project_file):
+    """写线程交替用两组文件重建同一个组，读线程只能看到其中一种完整状态"""
+    source_a = str(tmp_path / "src_a")
+    source_b = str(tmp_path / "src_b")
+    write_files(source_a, ["a1.c", "a2.c", "a1.h"])
+    write_files(source_b, ["b1.c", "b2.c", "b3.c", "b4.c"])
+    valid_states = {
+        frozenset(os.path.join(source_a, name) for name in ["a1.c", "a2.c", "a1.h"]),
+        frozenset(os.path.join(source_b, name) for name in ["b1.c", "b2.c", "b3.c", "b4.c"]),
+    }
+
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    assert project.refresh_group("SRC", source_a, 1)
+
+    stop = threading.Event()
+    errors = []
+    counts = {"read": 0, "write": 0}
+    counts_lock = threading.Lock()
+
+    def writer(offset: int):
+        sources = [source_a, source_b]
+        i = offset
+        while not stop.is_set():
+            if not project.refresh_group("SRC", sources[i % 2], 1):
+                errors.append("refresh_group failed")
+            i += 1
+            with counts_lock:
+                counts["write"] += 1
+
+    def reader():
+        while not stop.is_set():
+            files = frozenset(project.list_group_files("SRC"))
+            groups = project.list_groups()
+            if files not in valid_states:
+                errors.append(f"inconsistent files: {sorted(files)}")
+            if "SRC" not in groups or "::CMSIS" not in groups:
+                errors.append(f"inconsistent groups: {groups}")
+            with counts_lock:
+                counts["read"] += 1
+
+    threads = [_start(writer, i) for i in range(2)] + [_start(reader) for _ in range(6)]
+    time.sleep(STRESS_DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert not any(thread.is_alive() for thread in threads), "deadlock"
+    assert errors == []
+    assert counts["read"] > 0 and counts["write"] > 0
@@ -0,0 +1,55 @@
+"""
+清理失效条目与变更事件流
+"""
+
+import json
+import shutil
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+
+def test_sweep_removes_missing_files_include_paths_and_empty_groups(tmp_path, project_file):
+    source_dir = tmp_path / "src"
+    write_files(str(source_dir), ["app/app.c", "app/app.h", "drivers/uart.c", "drivers/uart.h"])
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    assert project.refresh_group("SRC", str(source_dir))
+    assert len(project.list_include_paths()) == 2
+
+    shutil.rmtree(source_dir / "drivers")
+    (source_dir / "app" / "app.c").unlink()
+
+    assert project.sweep_stale_entries(remove=False)
+    assert project.list_groups() == ["::CMSIS", "SRC/app", "SRC/drivers"]
+
+    assert project.sweep_stale_entries()
+    assert project.list_groups() == ["::CMSIS", "SRC/app"]
+    assert [path.replace("\\", "/").rsplit("/", 1)[-1] for path in project.list_group_files("SRC/app")] == ["app.h"]
+    assert len(project.list_include_paths()) == 1
+
+    # 清理同样可以撤销
+    assert project.undo()
+    assert project.list_groups() == ["::CMSIS", "SRC/app", "SRC/drivers"]
+
+
+def test_change_feed_reports_saved_operations(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h"])
+    feed = tmp_path / "feed.jsonl"
+    project = KeilProject(callback_func=lambda message: None, change_feed=str(feed))
+    assert project.set_project_file(project_file)
+    assert project.refresh_group("SRC", str(tmp_path / "src"))
+    assert project.undo()
+
+    events = [json.loads(line) for line in feed.read_text(encoding="utf-8").splitlines()]
+    refresh = [event for event in events if event["operation"] == "refresh_group"]
+    undo = [event for event in events if event["operation"] == "undo"]
+    assert {event["event"] for event in refresh} == {
+        "group_added", "file_added", "include_path_added", "operation"
+    }
+    assert sorted(event["file"] for event in refresh if event["event"] == "file_added") == ["app.c", "app.h"]
+    assert refresh[-1] == dict(refresh[-1], event="operation", changes=len(refresh) - 1)
+    assert {event["event"] for event in undo} == {
+        "group_removed", "file_removed", "include_path_removed", "operation"
+    }
@@ -0,0 +1,61 @@
+"""
+按同步清单刷新多个组
+"""
+
+import os
+
+from keil_tool.core import KeilProject
+
+from conftest import write_files
+
+
+def _write_manifest(tmp_path, include_paths: bool = True) -> str:
+    manifest = tmp_path / "keil_sync.toml"
+    source_path = (tmp_path / "src").as_posix()
+    manifest.write_text(
+        f'[[groups]]\nname = "SRC"\npath = "{source_path}"\ninclude_paths = {str(include_paths).lower()}\n',
+        encoding="utf-8"
+    )
+    return str(manifest)
+
+
+def _open(project_file: str) -> KeilProject:
+    project = KeilProject(callback_func=lambda message: None)
+    assert project.set_project_file(project_file)
+    return project
+
+
+def test_sync_without_changes_does_not_rewrite_project(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h"])
+    manifest = _write_manifest(tmp_path)
+    project = _open(project_file)
+    assert project.sync(manifest)
+    saved = os.stat(project_file).st_mtime_ns
+    stamp = os.stat(f"{project_file}.sync.stamp").st_mtime_ns
+
+    # 目录 mtime 变化使同步戳失效，但组成员不变
+    os.utime(str(tmp_path / "src" / "app"))
+    assert project.sync(manifest)
+
+    assert os.stat(project_file).st_mtime_ns == saved
+    assert os.stat(f"{project_file}.sync.stamp").st_mtime_ns != stamp
+
+
+def test_sync_applies_changed_groups_once(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h", "drivers/uart.c"])
+    manifest = _write_manifest(tmp_path)
+    project = _open(project_file)
+    assert project.sync(manifest)
+
+    assert project.list_groups() == ["::CMSIS", "SRC/app", "SRC/drivers"]
+    assert project.list_include_paths() == ["../src/app"]
+    assert _open(project_file).list_groups() == ["::CMSIS", "SRC/app", "SRC/drivers"]
+
+
+def test_sync_without_include_paths_keeps_include_path_untouched(tmp_path, project_file):
+    write_files(str(tmp_path / "src"), ["app/app.c", "app/app.h"])
+    project = _open(project_file)
+    assert project.sync(_write_manifest(tmp_path, include_paths=False))
+
+    assert project.list_groups() == ["::CMSIS", "SRC/app"]
+    assert project.list_include_paths() == []
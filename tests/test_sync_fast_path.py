@@ -0,0 +1,81 @@
+"""
+构建前钩子快速路径（main.py --sync）的耗时与导入检查
+
+同步戳未过期时 --sync 不能导入 lxml。整个进程（含解释器启动）应在 SYNC_FAST_PATH_TARGET 内结束，
+这一项依赖机器负载，标记为 benchmark，默认不运行，需要时执行 pytest -m benchmark。
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import write_files
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+# 无变化时 --sync 的耗时目标（秒）
+SYNC_FAST_PATH_TARGET = 0.1
+# 取多次运行中最快的一次，排除偶发的调度延迟
+TIMING_RUNS = 5
+
+
+def _run_sync(manifest: str, project_file: str, *python_args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *python_args, MAIN, "--sync", manifest, "--project", project_file],
+        capture_output=True, text=True, encoding="utf-8", timeout=60
+    )
+
+
+def _prepare(tmp_path, project_file: str) -> str:
+    """写入源文件和清单并执行一次完整同步，返回清单路径"""
+    write_files(str(tmp_path / "src"), ["main.c", "app/app.c", "app/app.h", "drivers/uart.c"])
+    manifest = tmp_path / "keil_sync.toml"
+    source_path = (tmp_path / "src").as_posix()
+    manifest.write_text(f'[[groups]]\nname = "SRC"\npath = "{source_path}"\n', encoding="utf-8")
+
+    result = _run_sync(str(manifest), project_file)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert os.path.exists(f"{project_file}.sync.stamp")
+    return str(manifest)
+
+
+def test_noop_sync_does_not_import_lxml(tmp_path, project_file):
+    manifest = _prepare(tmp_path, project_file)
+    mtime = os.stat(project_file).st_mtime_ns
+
+    # -X importtime 把每个导入的模块写到标准错误
+    result = _run_sync(manifest, project_file, "-X", "importtime")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "跳过同步" in result.stdout
+    imported = [line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line]
+    assert not [name for name in imported if name == "lxml" or name.startswith("lxml.")]
+    assert os.stat(project_file).st_mtime_ns == mtime
+
+
+@pytest.mark.benchmark
+def test_noop_sync_latency(tmp_path, project_file):
+    manifest = _prepare(tmp_path, project_file)
+
+    timings = []
+    for _ in range(TIMING_RUNS):
+        start = time.perf_counter()
+        result = _run_sync(manifest, project_file)
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "跳过同步" in result.stdout
+
+    assert min(timings) < SYNC_FAST_PATH_TARGET, f"no-op --sync took {min(timings) * 1000:.0f} ms"
+
+
+def test_changed_tree_runs_full_sync(tmp_path, project_file):
+    manifest = _prepare(tmp_path, project_file)
+    write_files(str(tmp_path / "src"), ["drivers/spi.c"])
+
+    result = _run_sync(manifest, project_file)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "跳过同步" not in result.stdout
+    with open(project_file, encoding="utf-8") as f:
+        assert "spi.c" in f.read()
@@ -0,0 +1,58 @@
+"""
+流式写出与 ElementTree.write 的逐字节一致性
+"""
+
+import hashlib
+import io
+
+import pytest
+from lxml import etree
+
+from keil_tool.core import xml_writer
+from keil_tool.core.xml_writer import write_xml_file
+
+from conftest import PROJECT_TEMPLATE
+
+DOCUMENTS = [
+    PROJECT_TEMPLATE.encode("utf-8"),
+    "<Project><Name>中文路径</Name></Project>".encode("utf-8"),
+    b'<?xml version="1.0" encoding="utf-8"?>\n<Project/>\n',
+    b'<?xml version="1.0" encoding="UTF-8"?>\n<!-- head --><?keil pi?>\n'
+    b'<Project xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="project.xsd">\n'
+    b'  <A>1</A>\n</Project>\n<!-- tail -->\n',
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_matches_element_tree_write(tmp_path, document):
+    source = tmp_path / "source.uvprojx"
+    source.write_bytes(document)
+    root = etree.parse(str(source)).getroot()
+
+    expected_path = tmp_path / "expected.uvprojx"
+    etree.ElementTree(root).write(str(expected_path), encoding="utf-8", xml_declaration=True)
+    streamed_path = tmp_path / "streamed.uvprojx"
+    digest = write_xml_file(str(streamed_path), root)
+
+    expected = expected_path.read_bytes()
+    assert streamed_path.read_bytes() == expected
+    assert digest == hashlib.sha1(expected).hexdigest()
+    assert expected.startswith(b"<?xml version='1.0' encoding='UTF-8'?>")
+
+
+def test_failed_write_keeps_original(tmp_path, monkeypatch):
+    target = tmp_path / "test.uvprojx"
+    target.write_bytes(b"original")
+    root = etree.fromstring(PROJECT_TEMPLATE.encode("utf-8"))
+
+    class FullDisk(io.FileIO):
+        def write(self, data):
+            raise OSError("磁盘已满")
+
+    # xmlfile 会吞掉写入回调的异常，写出失败时仍必须抛出，不能用不完整的内容替换原文件
+    monkeypatch.setattr(xml_writer, "open", lambda path, mode: FullDisk(path, "w"), raising=False)
+    with pytest.raises(OSError):
+        xml_writer.write_xml_file(str(target), root)
+
+    assert target.read_bytes() == b"original"
+    assert not (tmp_path / "test.uvprojx.tmp").exists()